@@ -0,0 +1,69 @@
+"""AES-GCM envelope columns for encrypted fields
+
+Revision ID: 7c2d9e4a1b36
+Revises: 0f046f8f5302
+Create Date: 2026-10-18 10:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d9e4a1b36'
+down_revision = '0f046f8f5302'
+branch_labels = None
+depends_on = None
+
+
+# table → new envelope columns
+SEALED_COLUMNS = {
+    'messages': ['content_sealed'],
+    'feedback': ['feedback_text_sealed'],
+    'stories': ['title_sealed', 'content_sealed'],
+    'contact_forms': ['name_sealed', 'email_sealed', 'message_sealed'],
+}
+
+# Legacy CBC columns become optional (rows written as envelopes leave them NULL)
+LEGACY_COLUMNS = {
+    'messages': [('content_encrypted', sa.Text()), ('encryption_iv', sa.String(length=32))],
+    'stories': [
+        ('title_encrypted', sa.Text()),
+        ('content_encrypted', sa.Text()),
+        ('encryption_iv', sa.String(length=32)),
+    ],
+    'contact_forms': [('message_encrypted', sa.Text()), ('message_iv', sa.String(length=32))],
+}
+
+
+def _existing_tables():
+    # stories / contact_forms are created by create_all(), not by a migration
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    tables = _existing_tables()
+
+    for table, columns in SEALED_COLUMNS.items():
+        if table not in tables:
+            continue
+        for column in columns:
+            op.add_column(table, sa.Column(column, sa.LargeBinary(), nullable=True))
+
+    for table, columns in LEGACY_COLUMNS.items():
+        if table not in tables:
+            continue
+        for column, type_ in columns:
+            op.alter_column(table, column, existing_type=type_, nullable=True)
+
+
+def downgrade() -> None:
+    # ⚠️ Data of rows already stored as envelopes is lost; legacy columns
+    # stay nullable (NULL rows would violate NOT NULL again).
+    tables = _existing_tables()
+
+    for table, columns in SEALED_COLUMNS.items():
+        if table not in tables:
+            continue
+        for column in columns:
+            op.drop_column(table, column)
@@ -0,0 +1,27 @@
+"""AES-GCM envelope column for training_data
+
+Revision ID: a41f6b2c8d57
+Revises: 7c2d9e4a1b36
+Create Date: 2026-10-18 14:03:11.452907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f6b2c8d57'
+down_revision = '7c2d9e4a1b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('training_data', sa.Column('content_sealed', sa.LargeBinary(), nullable=True))
+    op.alter_column('training_data', 'content_encrypted', existing_type=sa.Text(), nullable=True)
+    op.alter_column('training_data', 'encryption_iv', existing_type=sa.String(length=32), nullable=True)
+
+
+def downgrade() -> None:
+    # ⚠️ Data of rows already stored as envelopes is lost
+    op.drop_column('training_data', 'content_sealed')
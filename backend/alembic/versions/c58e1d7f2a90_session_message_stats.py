@@ -0,0 +1,45 @@
+"""Denormalized message stats on sessions
+
+Revision ID: c58e1d7f2a90
+Revises: a41f6b2c8d57
+Create Date: 2026-10-18 16:40:52.307715
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58e1d7f2a90'
+down_revision = 'a41f6b2c8d57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('message_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('sessions', sa.Column('has_crisis', sa.Boolean(), server_default=sa.text('false'), nullable=False))
+    op.add_column('sessions', sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Backfill from existing messages (one pass over messages)
+    op.execute("""
+        UPDATE sessions AS s
+        SET message_count = m.message_count,
+            has_crisis = m.has_crisis,
+            last_message_at = m.last_message_at
+        FROM (
+            SELECT session_id,
+                   count(*) AS message_count,
+                   coalesce(bool_or(is_crisis_detected), false) AS has_crisis,
+                   max(created_at) AS last_message_at
+            FROM messages
+            GROUP BY session_id
+        ) AS m
+        WHERE s.id = m.session_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('sessions', 'last_message_at')
+    op.drop_column('sessions', 'has_crisis')
+    op.drop_column('sessions', 'message_count')
@@ -0,0 +1,29 @@
+"""Index for keyset pagination over all messages (admin listing)
+
+Revision ID: e93b0a6c4f18
+Revises: c58e1d7f2a90
+Create Date: 2026-10-18 18:21:07.664130
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93b0a6c4f18'
+down_revision = 'c58e1d7f2a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY: không khóa ghi bảng messages trong lúc tạo index
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_messages_created_id', 'messages', ['created_at', 'id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_messages_created_id', table_name='messages', postgresql_concurrently=True)
@@ -2,15 +2,16 @@
 # File: backend/app/admin/routes/analytics.py
 # ============================================
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from app.database import get_db
 from app.admin.auth import get_current_admin
 from app.models import Session as ChatSession, Message
+from app.utils.health_metrics import query_health_metrics
 
 #router = APIRouter(prefix="/admin/analytics", tags=["Analytics"])
 router = APIRouter(tags=["Analytics"])
@@ -88,4 +89,31 @@ async def get_crisis_events(
             "is_active": session.is_active
         }
         for session in crisis_sessions
-    ]
\ No newline at end of file
+    ]
+
+
+@router.get("/system-health")
+async def get_system_health(
+    hours: int = Query(24, ge=1, le=24 * 90),
+    resolution: Optional[str] = Query(None, pattern="^(1m|1h|1d)$"),
+    metrics: Optional[str] = Query(None, description="Comma-separated metric names (default: all)"),
+    admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    System health trends (latency percentiles, LLM latency and tokens,
+    crisis rate, DB pool saturation)
+    
+    Served from the 1h / 1d rollups; resolution defaults to 1m up to 6
+    hours, 1h up to 14 days, 1d beyond.
+    """
+    names = [name.strip() for name in metrics.split(",") if name.strip()] if metrics else None
+    try:
+        return query_health_metrics(
+            db,
+            names=names,
+            start=datetime.now(timezone.utc) - timedelta(hours=hours),
+            resolution=resolution
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
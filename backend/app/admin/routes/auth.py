@@ -10,6 +10,7 @@ from datetime import datetime
 from app.database import get_db
 from app.admin.models import AdminUser
 from app.admin.auth import verify_password, create_access_token, get_password_hash
+from app.utils.executor import run_in_worker
 
 #router = APIRouter(prefix="/admin/auth", tags=["Admin Auth"])
 router = APIRouter(tags=["Admin Auth"])
@@ -37,7 +38,8 @@ async def admin_login(request: LoginRequest, db: Session = Depends(get_db)):
     """Admin login endpoint"""
     admin = db.query(AdminUser).filter(AdminUser.email == request.email).first()
     
-    if not admin or not verify_password(request.password, admin.password_hash):
+    # argon2 cố ý chậm (~50-100ms): chạy trên worker pool, không chặn event loop
+    if not admin or not await run_in_worker(verify_password, request.password, admin.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     if not admin.is_active:
@@ -77,7 +79,7 @@ async def create_first_admin(request: AdminCreateRequest, db: Session = Depends(
         raise HTTPException(status_code=403, detail="Admin already exists")
     
     # Create first admin
-    password_hash = get_password_hash(request.password)
+    password_hash = await run_in_worker(get_password_hash, request.password)
     admin = AdminUser(
         email=request.email,
         password_hash=password_hash,
@@ -12,7 +12,7 @@ from app.database import get_db
 from app.admin.auth import get_current_admin
 from app.admin.models import AdminUser
 from app.models.contact import ContactForm
-from app.utils.encryption import decrypt_message
+from app.utils.sealed_fields import read_fields_many_async, reencrypt_on_read
 
 router = APIRouter()
 
@@ -44,39 +44,34 @@ async def get_contact_forms(
     total = forms_query.count()
     forms = forms_query.offset(skip).limit(limit).all()
     
-    # Decrypt and format
+    # Decrypt all fields of the page in one batch (message, name, email)
+    values = await read_fields_many_async(forms)
+    
+    # Format
     result_forms = []
-    for form in forms:
-        try:
-            message = decrypt_message(form.message_encrypted, form.message_iv)
-            
-            # Decrypt optional fields
-            name = None
-            email = None
-            if form.name_encrypted and form.encryption_iv:
-                try:
-                    name = decrypt_message(form.name_encrypted, form.encryption_iv)
-                except:
-                    name = "[Encrypted]"
-            
-            if form.email_encrypted and form.encryption_iv:
-                try:
-                    email = decrypt_message(form.email_encrypted, form.encryption_iv)
-                except:
-                    email = "[Encrypted]"
-            
-            result_forms.append({
-                "id": str(form.id),
-                "name": name,
-                "email": email,
-                "subject": form.subject,
-                "message": message,
-                "is_read": form.is_read,
-                "created_at": form.created_at.isoformat() if form.created_at else None
-            })
-        except Exception as e:
-            print(f"Failed to decrypt contact form {form.id}: {e}")
+    for form, fields in zip(forms, values):
+        message, name, email = fields['message'], fields['name'], fields['email']
+        if message is None:
+            print(f"Failed to decrypt contact form {form.id}")
             continue
+        
+        # Optional fields ("" = not provided)
+        name = "[Encrypted]" if name is None else (name or None)
+        email = "[Encrypted]" if email is None else (email or None)
+        
+        result_forms.append({
+            "id": str(form.id),
+            "name": name,
+            "email": email,
+            "subject": form.subject,
+            "message": message,
+            "is_read": form.is_read,
+            "created_at": form.created_at.isoformat() if form.created_at else None
+        })
+    
+    # Legacy CBC rows → AES-GCM envelopes
+    if reencrypt_on_read(forms, values):
+        db.commit()
     
     return {
         "forms": result_forms,
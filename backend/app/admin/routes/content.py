@@ -11,6 +11,8 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.admin.models import ContentItem, AdminUser
 from app.admin.auth import get_current_admin, require_role
+from app.utils.retrieval import KNOWLEDGE_CONTENT_TYPES, notify_knowledge_changed
+from app.utils.emergency_responses import EMERGENCY_CONTENT_TYPE, notify_emergency_content_changed
 
 #router = APIRouter(prefix="/admin/content", tags=["Content Management"])
 router = APIRouter(tags=["Content Management"])
@@ -97,6 +99,11 @@ async def create_content(
     db.commit()
     db.refresh(new_content)
     
+    if new_content.type in KNOWLEDGE_CONTENT_TYPES:
+        notify_knowledge_changed()
+    elif new_content.type == EMERGENCY_CONTENT_TYPE:
+        notify_emergency_content_changed()
+    
     return new_content
 
 
@@ -125,6 +132,9 @@ async def update_content(
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     
+    # Loại cũ: đổi loại cũng phải rebuild index / bảng payload của loại cũ
+    old_type = content.type
+    
     # Update fields
     update_data = content_update.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -135,6 +145,12 @@ async def update_content(
     db.commit()
     db.refresh(content)
     
+    types = {old_type, content.type}
+    if types & set(KNOWLEDGE_CONTENT_TYPES):
+        notify_knowledge_changed()
+    if EMERGENCY_CONTENT_TYPE in types:
+        notify_emergency_content_changed()
+    
     return content
 
 
@@ -149,7 +165,14 @@ async def delete_content(
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     
+    is_knowledge = content.type in KNOWLEDGE_CONTENT_TYPES
+    is_emergency = content.type == EMERGENCY_CONTENT_TYPE
     db.delete(content)
     db.commit()
     
+    if is_knowledge:
+        notify_knowledge_changed()
+    elif is_emergency:
+        notify_emergency_content_changed()
+    
     return {"message": "Content deleted successfully"}
\ No newline at end of file
@@ -15,7 +15,14 @@ from app.admin.auth import get_current_admin
 from app.admin.models import AdminUser
 from app.models.message import Message
 from app.models.session import Session as ChatSession
-from app.utils.encryption import decrypt_message
+from app.utils.sealed_fields import read_fields, read_fields_many_async, reencrypt_on_read
+from app.utils.pagination import (
+    decode_cursor,
+    after_cursor,
+    next_cursor,
+    approximate_table_rows,
+    estimate_query_rows
+)
 
 router = APIRouter()
 
@@ -34,6 +41,7 @@ class FlagRequest(BaseModel):
 async def get_messages(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
     crisis_only: bool = Query(False),
     flagged_only: bool = Query(False),
     search: Optional[str] = Query(None),
@@ -43,6 +51,9 @@ async def get_messages(
     """
     Get paginated messages with filters
     
+    Prefer `cursor` (keyset on created_at, id) over `page`: deep offsets
+    scan every skipped row. `total` is an estimate, not an exact count.
+    
     Final URL: /api/v1/admin/messages
     """
     
@@ -59,25 +70,34 @@ async def get_messages(
     if filters:
         query = query.filter(and_(*filters))
     
-    # Order by newest first
-    query = query.order_by(desc(Message.created_at))
+    # Approximate total: reltuples for the whole table, planner estimate with filters
+    total = estimate_query_rows(db, query) if filters else approximate_table_rows(db, "messages")
+    
+    # Order by newest first (id breaks ties so cursors are stable)
+    query = query.order_by(desc(Message.created_at), desc(Message.id))
     
     # Pagination
-    total = query.count()
-    messages = query.offset((page - 1) * limit).limit(limit).all()
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(after_cursor(Message.created_at, Message.id, position, descending=True))
+        messages = query.limit(limit).all()
+    else:
+        messages = query.offset((page - 1) * limit).limit(limit).all()
+    
+    # Decrypt messages for display (one batch for the page)
+    values = await read_fields_many_async(messages)
     
-    # Decrypt messages for display
     decrypted_messages = []
-    for msg in messages:
-        try:
-            decrypted_content = decrypt_message(
-                msg.content_encrypted,
-                msg.encryption_iv
-            )
+    for msg, fields in zip(messages, values):
+        decrypted_content = fields['content']
+        if decrypted_content is None:
+            preview = "[Decryption failed]"
+        else:
             # Truncate for list view
             preview = decrypted_content[:200] + "..." if len(decrypted_content) > 200 else decrypted_content
-        except Exception as e:
-            preview = "[Decryption failed]"
         
         decrypted_messages.append({
             "id": str(msg.id),
@@ -93,9 +113,11 @@ async def get_messages(
     return {
         "messages": decrypted_messages,
         "total": total,
+        "total_is_estimate": True,
         "page": page,
         "limit": limit,
-        "total_pages": (total + limit - 1) // limit if total > 0 else 0
+        "total_pages": (total + limit - 1) // limit if total > 0 else 0,
+        "next_cursor": next_cursor(messages, limit)
     }
 
 
@@ -116,13 +138,12 @@ async def get_message_detail(
         raise HTTPException(status_code=404, detail="Message not found")
     
     # Decrypt full content
-    try:
-        decrypted_content = decrypt_message(
-            message.content_encrypted,
-            message.encryption_iv
-        )
-    except Exception as e:
+    fields = read_fields(message)
+    decrypted_content = fields['content']
+    if decrypted_content is None:
         decrypted_content = "[Decryption failed]"
+    elif reencrypt_on_read([message], [fields]):
+        db.commit()
     
     return {
         "id": str(message.id),
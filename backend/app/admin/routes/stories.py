@@ -13,7 +13,7 @@ from app.database import get_db
 from app.admin.auth import get_current_admin
 from app.admin.models import AdminUser
 from app.models.story import Story
-from app.utils.encryption import decrypt_message
+from app.utils.sealed_fields import read_fields, read_fields_many_async, reencrypt_on_read
 
 router = APIRouter()
 
@@ -49,12 +49,11 @@ async def get_pending_stories(
     result_stories = []
     corrupted_count = 0
     
-    for story in stories:
-        try:
-            # Try to decrypt
-            title = decrypt_message(story.title_encrypted, story.encryption_iv)
-            content = decrypt_message(story.content_encrypted, story.encryption_iv)
-            
+    values = await read_fields_many_async(stories)
+    
+    for story, fields in zip(stories, values):
+        title, content = fields['title'], fields['content']
+        if title is not None and content is not None:
             result_stories.append({
                 "id": str(story.id),
                 "title": title,
@@ -65,9 +64,9 @@ async def get_pending_stories(
                 "decryption_failed": False
             })
             
-        except Exception as e:
+        else:
             # If decryption fails, still show metadata with warning
-            print(f"⚠️  Failed to decrypt story {story.id}: {e}")
+            print(f"⚠️  Failed to decrypt story {story.id}")
             corrupted_count += 1
             
             result_stories.append({
@@ -88,6 +87,10 @@ async def get_pending_stories(
                 "decryption_failed": True  # ✅ Flag for frontend
             })
     
+    # Legacy CBC rows → AES-GCM envelopes
+    if reencrypt_on_read(stories, values):
+        db.commit()
+    
     return {
         "stories": result_stories,
         "total": total,
@@ -118,14 +121,13 @@ async def approve_story(
         raise HTTPException(status_code=400, detail="Story already approved")
     
     # ✅ Verify decryption before approving
-    try:
-        decrypt_message(story.title_encrypted, story.encryption_iv)
-        decrypt_message(story.content_encrypted, story.encryption_iv)
-    except Exception as e:
+    fields = read_fields(story)
+    if fields['title'] is None or fields['content'] is None:
         raise HTTPException(
             status_code=400,
-            detail=f"Cannot approve story with corrupted encryption: {str(e)}"
+            detail="Cannot approve story with corrupted encryption"
         )
+    reencrypt_on_read([story], [fields])
     
     # Approve and publish
     story.is_approved = True
@@ -10,7 +10,7 @@ from typing import Optional
 
 from app.database import get_db
 from app.models.contact import ContactForm
-from app.utils.encryption import encrypt_message
+from app.utils.sealed_fields import write_fields
 
 
 router = APIRouter()
@@ -36,27 +36,14 @@ async def submit_contact_form(
 ):
     """Submit contact form"""
     
-    # Encrypt message
-    message_encrypted, message_iv = encrypt_message(form_data.message)
+    contact = ContactForm(subject=form_data.subject)
     
-    # Encrypt optional fields
-    name_encrypted = None
-    email_encrypted = None
-    encryption_iv = None
-    
-    if form_data.name or form_data.email:
-        if form_data.name:
-            name_encrypted, encryption_iv = encrypt_message(form_data.name)
-        if form_data.email:
-            email_encrypted, encryption_iv = encrypt_message(form_data.email)
-    
-    contact = ContactForm(
-        name_encrypted=name_encrypted,
-        email_encrypted=email_encrypted,
-        encryption_iv=encryption_iv,
-        subject=form_data.subject,
-        message_encrypted=message_encrypted,
-        message_iv=message_iv
+    # Encrypt message + optional fields (each field gets its own nonce)
+    write_fields(
+        contact,
+        message=form_data.message,
+        name=form_data.name,
+        email=form_data.email
     )
     
     db.add(contact)
@@ -15,7 +15,7 @@ from sqlalchemy import func
 from app.database import get_db
 from app.models import Feedback as FeedbackModel, Session as SessionModel
 from app.api.endpoints.sessions import get_session_by_token
-from app.utils.encryption import encrypt_message
+from app.utils.encryption import seal
 
 logger = logging.getLogger(__name__)
 
@@ -149,19 +149,12 @@ async def submit_feedback(
             }
         )
     
-    # Encrypt feedback text if provided
-    encrypted_text = None
-    encryption_iv = None
-    
-    if feedback_data.feedback_text:
-        encrypted_text, encryption_iv = encrypt_message(feedback_data.feedback_text)
-    
     # Create feedback
     feedback = FeedbackModel(
         session_id=session.id,
         rating=feedback_data.rating,
-        feedback_text_encrypted=encrypted_text,
-        encryption_iv=encryption_iv,
+        # Encrypt feedback text if provided (None if empty)
+        feedback_text_sealed=seal(feedback_data.feedback_text),
         category=feedback_data.category
     )
     
@@ -4,15 +4,19 @@
 # ============================================
 
 import time
+import json
 import logging
+import anyio
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db, AsyncSessionLocal
 from app.models import Session as SessionModel, Message as MessageModel
 from app.schemas.message import (
     MessageCreate,
@@ -22,10 +26,32 @@ from app.schemas.message import (
     MessageDeleteResponse
 )
 # ✅ CORRECT IMPORT
-from app.utils.encryption import encrypt_message, decrypt_message
-from app.utils.crisis_detection import detect_crisis_in_message, get_emergency_info
-from app.api.endpoints.sessions import get_session_by_token
-from app.utils.ai_engine import GroqAI
+from app.utils.encryption import seal
+from app.utils.sealed_fields import read_fields, read_fields_many_async, reencrypt_on_read
+from app.utils.crisis_detection import CrisisDetector
+from app.utils.emergency_responses import get_emergency_payload, get_emergency_payload_json
+from app.api.endpoints.sessions import (
+    get_session_by_token_async,
+    record_new_messages,
+    recount_session_messages
+)
+from app.utils.session_cache import invalidate_session_async
+from app.utils.activity_buffer import touch_session
+from app.utils.pagination import decode_cursor, after_cursor, next_cursor
+from app.utils.background import enqueue
+from app.utils.monitoring import track_stage
+from app.utils.metrics import CHAT_STAGE_SECONDS
+from app.utils.health_metrics import record_chat_turn
+from app.utils.ai_engine import GroqAI, moderate_message
+from app.utils.moderation import ModerationResult
+from app.utils.executor import run_in_worker
+from app.utils.conversation_context import (
+    load_context,
+    append_context,
+    cache_context,
+    reset_context,
+    invalidate_context
+)
 
 logger = logging.getLogger(__name__)
 
@@ -38,19 +64,16 @@ router = APIRouter()
 
 def decrypt_message_content(message: MessageModel) -> str:
     """Decrypt message content"""
-    try:
-        return decrypt_message(
-            message.content_encrypted,
-            message.encryption_iv
-        )
-    except Exception as e:
-        logger.error(f"Decryption failed for message {message.id}: {e}")
+    content = read_fields(message)['content']
+    if content is None:
+        logger.error(f"Decryption failed for message {message.id}")
         return "[Decryption failed]"
+    return content
 
 
-def create_message_response(message: MessageModel) -> MessageResponse:
-    """Create MessageResponse with decrypted content"""
-    decrypted_content = decrypt_message_content(message)
+def create_message_response(message: MessageModel, content: Optional[str] = None) -> MessageResponse:
+    """Create MessageResponse with decrypted content (pass content if already decrypted)"""
+    decrypted_content = content if content is not None else decrypt_message_content(message)
     
     return MessageResponse(
         id=message.id,
@@ -96,8 +119,9 @@ def create_message_response(message: MessageModel) -> MessageResponse:
 async def generate_ai_response_advanced(
     user_message: str,
     conversation_history: list = None,
-    is_crisis: bool = False
-) -> str:
+    is_crisis: bool = False,
+    moderation: ModerationResult = None
+) -> dict:
     """
     Generate AI response using Groq API
     
@@ -105,29 +129,127 @@ async def generate_ai_response_advanced(
         user_message: User's message
         conversation_history: Previous messages for context
         is_crisis: Whether crisis was detected
+        moderation: Result of the single moderation pass
     
     Returns:
-        AI response text
+        GroqAI result dict ('response' holds the text, fallback included)
     """
+    # Router dùng chung: pool kết nối của app + trạng thái circuit breaker
     ai = GroqAI()
     
     try:
         result = await ai.generate_response(
             user_message=user_message,
             conversation_history=conversation_history,
-            is_crisis=is_crisis
+            is_crisis=is_crisis,
+            moderation=moderation
         )
         
         if result["success"]:
             logger.info(f"AI response generated: {result['tokens_used']} tokens")
-            return result["response"]
         else:
             logger.warning(f"AI fallback used: {result.get('error')}")
-            return result["response"]
+        return result
     
     finally:
         await ai.close()
 
+async def _prepare_turn(db: AsyncSession, message_data: MessageCreate, endpoint: str):
+    """
+    Shared first half of a chat turn (blocking and streaming endpoints)
+    
+    1. Validate session
+    2. Detect crisis keywords (one moderation pass)
+    3. Load conversation window (previous turns only)
+    4. Encrypt and store user message
+    
+    endpoint: label of the chat_stage_seconds metric ("send", "stream")
+    
+    Returns:
+        Tuple of (session, moderation, crisis_result, user_message, context_window)
+    """
+    with track_stage(endpoint, "session_lookup"):
+        session = await get_session_by_token_async(db, message_data.session_token)
+    
+    # Update session activity (buffered, flushed in bulk)
+    touch_session(session)
+    
+    # Detect crisis in user message (normalize + scan once, reused below).
+    # Regex scans run on the worker pool; only the matcher lookup (which may
+    # reload keywords) touches the DB, through run_sync.
+    with track_stage(endpoint, "crisis_detection"):
+        moderation = await run_in_worker(moderate_message, message_data.content, kind="thread")
+        detector = await db.run_sync(CrisisDetector)
+        crisis_result = await run_in_worker(
+            detector.detect_crisis, message_data.content, moderation,
+            kind="thread", task="detect_crisis"
+        )
+    is_crisis = crisis_result['is_crisis']
+    record_chat_turn(is_crisis)
+    
+    # Update session crisis mode if crisis detected
+    if is_crisis and not session.is_crisis_mode:
+        session.is_crisis_mode = True
+        logger.warning(
+            f"🚨 CRISIS MODE ACTIVATED for session {session.id}: "
+            f"Categories={crisis_result['categories']}"
+        )
+    
+    # Rolling context window: 1 cached blob + 1 decrypt instead of N messages
+    with track_stage(endpoint, "context_load"):
+        context_window = await load_context(db, session.id)
+    
+    # Encrypt and store user message
+    with track_stage(endpoint, "encryption"):
+        content_sealed = seal(message_data.content)
+    user_message = MessageModel(
+        session_id=session.id,
+        content_sealed=content_sealed,
+        role="user",
+        is_crisis_detected=is_crisis
+    )
+    
+    db.add(user_message)
+    with track_stage(endpoint, "db_flush"):
+        await db.flush()  # Get ID without committing
+    
+    return session, moderation, crisis_result, user_message, context_window
+
+
+def _enqueue_turn_events(session_id: UUID, moderation: ModerationResult, crisis_result: dict, message_count: int):
+    """Compliance log events of a stored turn (metadata only, off the response path)"""
+    if crisis_result['is_crisis']:
+        enqueue(
+            "compliance.crisis_detected",
+            session_id=str(session_id),
+            crisis_type=",".join(sorted(crisis_result['categories']))
+        )
+    if moderation.violation_group:
+        enqueue("compliance.violation", session_id=str(session_id), violation_type=moderation.violation_group)
+    enqueue("compliance.message_sent", session_id=str(session_id), message_count=message_count)
+
+
+def _turn_entries(user_content: str, ai_content: str = None) -> list:
+    """Context window entries for one chat turn"""
+    entries = [{"role": "user", "content": user_content}]
+    if ai_content:
+        entries.append({"role": "assistant", "content": ai_content})
+    return entries
+
+
+def _sse_event(event: str, data: dict, crisis_json: Optional[str] = None) -> str:
+    """
+    Format one Server-Sent Event
+    
+    crisis_json: pre-serialized emergency payload, spliced in as the
+    "crisis_info" field instead of being serialized again
+    """
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    if crisis_json is not None:
+        payload = f'{payload[:-1]}, "crisis_info": {crisis_json}}}'
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
 # ============================================
 # MESSAGE ENDPOINTS
 # ============================================
@@ -141,7 +263,7 @@ async def generate_ai_response_advanced(
 )
 async def send_message(
     message_data: MessageCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Send a message and receive AI response
@@ -159,82 +281,60 @@ async def send_message(
     """
     start_time = time.time()
     
-    # 1. Validate session
-    session = get_session_by_token(db, message_data.session_token)
-    
-    # Update session activity
-    session.touch()
-    
-    # 2. Detect crisis in user message
-    crisis_result = detect_crisis_in_message(db, message_data.content)
+    # 1-3. Validate session, detect crisis, load history, store user message
+    session, moderation, crisis_result, user_message, context_window = await _prepare_turn(
+        db, message_data, "send"
+    )
     is_crisis = crisis_result['is_crisis']
-    
-    # Update session crisis mode if crisis detected
-    if is_crisis and not session.is_crisis_mode:
-        session.is_crisis_mode = True
-        logger.warning(
-            f"🚨 CRISIS MODE ACTIVATED for session {session.id}: "
-            f"Categories={crisis_result['categories']}"
+
+    # 4. Generate AI response with full context
+    with track_stage("send", "llm"):
+        ai_result = await generate_ai_response_advanced(
+            user_message=message_data.content,
+            conversation_history=context_window.history,
+            is_crisis=is_crisis,
+            moderation=moderation
         )
-    
-    # 3. Encrypt and store user message
-    encrypted_content, iv = encrypt_message(message_data.content)
-    
-    user_message = MessageModel(
-        session_id=session.id,
-        content_encrypted=encrypted_content,
-        encryption_iv=iv,
-        role="user",
-        is_crisis_detected=is_crisis
-    )
-    
-    db.add(user_message)
-    db.flush()  # Get ID without committing
-    
-    # 4. Generate AI response
-    # ai_response_text = generate_ai_response(message_data.content, is_crisis)
-    
-    # Get conversation history for context
-    conversation_history = []
-    previous_messages = db.query(MessageModel).filter(
-        MessageModel.session_id == session.id
-    ).order_by(MessageModel.created_at.desc()).limit(5).all()
-
-    for msg in reversed(previous_messages):
-        decrypted = decrypt_message_content(msg)
-        conversation_history.append({
-            "role": msg.role,
-            "content": decrypted
-        })
-
-    # Generate AI response with full context
-    ai_response_text = await generate_ai_response_advanced(
-        user_message=message_data.content,
-        conversation_history=conversation_history,
-        is_crisis=is_crisis
-    )
+    ai_response_text = ai_result["response"]
+    model_used = ai_result.get("model", "fallback")
 
     # 5. Encrypt and store AI message
-    ai_encrypted_content, ai_iv = encrypt_message(ai_response_text)
-    
     processing_time_ms = int((time.time() - start_time) * 1000)
     
+    with track_stage("send", "encryption"):
+        content_sealed = seal(ai_response_text)
     ai_message = MessageModel(
         session_id=session.id,
-        content_encrypted=ai_encrypted_content,
-        encryption_iv=ai_iv,
+        content_sealed=content_sealed,
         role="assistant",
-        model_used="simple-response",  # TODO: Replace with actual model name
+        model_used=model_used,
         processing_time_ms=processing_time_ms,
         is_crisis_detected=is_crisis
     )
     
     db.add(ai_message)
-    db.commit()
-    
-    # Refresh to get timestamps
-    db.refresh(user_message)
-    db.refresh(ai_message)
+    with track_stage("send", "db_commit"):
+        context = await append_context(
+            db, context_window, _turn_entries(message_data.content, ai_response_text)
+        )
+        # created_at of both messages came back with the INSERTs (RETURNING)
+        message_count = await record_new_messages(db, session.id, 2, is_crisis)
+        await db.commit()
+    await cache_context(context)
+    if is_crisis:
+        # Crisis mode may have just been switched on: drop cached session rows
+        await invalidate_session_async(message_data.session_token)
+    
+    # Audit + analytics after the response
+    _enqueue_turn_events(session.id, moderation, crisis_result, message_count)
+    enqueue(
+        "analytics.ai_processing",
+        session_id=str(session.id),
+        model=model_used,
+        tokens_used=ai_result.get("tokens_used", 0),
+        processing_time_ms=processing_time_ms,
+        queue_wait_ms=ai_result.get("queue_wait_ms", 0)
+    )
     
     # 6. Prepare response
     response_data = {
@@ -243,16 +343,174 @@ async def send_message(
         "crisis_info": None
     }
     
-    # Add emergency info if crisis detected
+    # Add emergency info if crisis detected (precomputed, no DB access)
     if is_crisis:
-        response_data["crisis_info"] = get_emergency_info(
-            db,
-            crisis_result['categories']
+        response_data["crisis_info"] = get_emergency_payload(
+            crisis_result['categories'],
+            crisis_result['severity']
         )
     
     return AIMessageResponse(**response_data)
 
 
+@router.post(
+    "/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Send Message (Streaming)",
+    description="Send a message and stream the AI response as Server-Sent Events"
+)
+async def send_message_stream(
+    message_data: MessageCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Send a message and stream the AI response token by token (SSE)
+    
+    - **content**: Message content (will be encrypted)
+    - **session_token**: Session token for authentication
+    
+    Events:
+    - `meta`: stored user message + crisis info (sent immediately)
+    - `delta`: `{"content": "..."}` for each chunk relayed from Groq
+    - `done`: the stored assistant message, once the full reply is
+      assembled, encrypted and saved
+    """
+    start_time = time.time()
+    
+    session, moderation, crisis_result, user_message, context_window = await _prepare_turn(
+        db, message_data, "stream"
+    )
+    is_crisis = crisis_result['is_crisis']
+    session_id = session.id
+    conversation_history = list(context_window.history)
+    
+    # Payload JSON dựng sẵn: sự kiện SSE không phải serialize lại
+    crisis_json = "null"
+    if is_crisis:
+        crisis_json = get_emergency_payload_json(crisis_result['categories'], crisis_result['severity'])
+    
+    # Lưu tin nhắn user trước khi stream: dependency get_async_db đóng session
+    # trước khi body của StreamingResponse chạy
+    with track_stage("stream", "db_commit"):
+        await record_new_messages(db, session_id, 1, is_crisis)
+        await db.commit()
+    if is_crisis:
+        await invalidate_session_async(message_data.session_token)
+    user_message_data = create_message_response(user_message).model_dump(mode="json")
+    
+    async def event_stream():
+        ai = GroqAI()
+        parts = []
+        saved = False
+        
+        async def save_reply(model_used: str, tokens_used: int = 0, queue_wait_ms: int = 0) -> MessageModel:
+            """Encrypt and store the assembled assistant reply"""
+            nonlocal saved
+            reply = "".join(parts)
+            processing_time_ms = int((time.time() - start_time) * 1000)
+            with track_stage("stream", "encryption"):
+                content_sealed = seal(reply)
+            ai_message = MessageModel(
+                session_id=session_id,
+                content_sealed=content_sealed,
+                role="assistant",
+                model_used=model_used,
+                processing_time_ms=processing_time_ms,
+                is_crisis_detected=is_crisis
+            )
+            with track_stage("stream", "db_commit"):
+                async with AsyncSessionLocal() as stream_db:
+                    stream_db.add(ai_message)
+                    context = await append_context(
+                        stream_db, context_window, _turn_entries(message_data.content, reply)
+                    )
+                    message_count = await record_new_messages(stream_db, session_id, 1, is_crisis)
+                    await stream_db.commit()
+            # Đã lưu: finally không được lưu lần nữa dù bị hủy ngay sau đây
+            saved = True
+            await cache_context(context)
+            
+            _enqueue_turn_events(session_id, moderation, crisis_result, message_count)
+            enqueue(
+                "analytics.ai_processing",
+                session_id=str(session_id),
+                model=model_used,
+                tokens_used=tokens_used,
+                processing_time_ms=processing_time_ms,
+                queue_wait_ms=queue_wait_ms
+            )
+            return ai_message
+        
+        async def save_user_turn():
+            """No reply received: keep the user message in the window"""
+            async with AsyncSessionLocal() as stream_db:
+                context = await append_context(
+                    stream_db, context_window, _turn_entries(message_data.content)
+                )
+                await stream_db.commit()
+            await cache_context(context)
+        
+        events = ai.stream_response(
+            user_message=message_data.content,
+            conversation_history=conversation_history,
+            is_crisis=is_crisis,
+            moderation=moderation
+        )
+        try:
+            yield _sse_event("meta", {"user_message": user_message_data}, crisis_json)
+            
+            llm_started = time.perf_counter()
+            async for event in events:
+                if event["type"] == "delta":
+                    parts.append(event["content"])
+                    yield _sse_event("delta", {"content": event["content"]})
+                    continue
+                
+                # Whole upstream reply (includes waiting on a slow client)
+                CHAT_STAGE_SECONDS.labels("stream", "llm").observe(time.perf_counter() - llm_started)
+                if event["success"]:
+                    logger.info(f"AI response streamed: {event['tokens_used']} tokens")
+                else:
+                    logger.warning(f"AI fallback used: {event.get('error')}")
+                
+                ai_message = await save_reply(
+                    event.get("model") or "simple-response",
+                    event.get("tokens_used", 0),
+                    event.get("queue_wait_ms", 0)
+                )
+                yield _sse_event(
+                    "done",
+                    {"ai_message": create_message_response(ai_message).model_dump(mode="json")},
+                    crisis_json
+                )
+        
+        finally:
+            # Client ngắt kết nối: Starlette hủy cancel scope của generator, mọi
+            # await sau đó bị hủy lại ngay -> chạy phần dọn dẹp trong scope được che
+            with anyio.CancelScope(shield=True):
+                # Đóng stream LLM: trả slot + hoàn token của llm_admission
+                await events.aclose()
+                # Vẫn lưu phần đã nhận được
+                if not saved:
+                    try:
+                        if parts:
+                            await save_reply("simple-response")
+                        else:
+                            await save_user_turn()
+                    except Exception as e:
+                        logger.error(f"Failed to save partial streamed reply: {e}")
+                await ai.close()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get(
     "/",
     response_model=MessageListResponse,
@@ -263,44 +521,67 @@ async def get_messages(
     session_token: str,
     limit: int = 100,
     offset: int = 0,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get message history for a session
     
     - **session_token**: Session token
     - **limit**: Maximum number of messages (default: 100)
-    - **offset**: Number of messages to skip (default: 0)
+    - **offset**: Number of messages to skip (default: 0, ignored with cursor)
+    - **cursor**: `next_cursor` of the previous page (keyset, preferred)
     
     Returns messages in chronological order (oldest first)
     """
-    # Validate session
-    session = get_session_by_token(db, session_token)
-    
-    # Get messages
-    messages_query = db.query(MessageModel).filter(
-        MessageModel.session_id == session.id
-    ).order_by(MessageModel.created_at.asc())
-    
-    # Count total
-    total_count = messages_query.count()
-    
-    # Apply pagination
-    messages = messages_query.offset(offset).limit(limit).all()
-    
-    # Check if any crisis was detected
-    has_crisis_history = any(msg.is_crisis_detected for msg in messages)
-    
-    # Decrypt and build response
-    decrypted_messages = [
-        create_message_response(msg) for msg in messages
-    ]
+    # Validate session (fresh row: total and crisis flag come from its stats)
+    with track_stage("history", "session_lookup"):
+        session = await get_session_by_token_async(db, session_token, cached=False)
+    
+    # Get messages: keyset on (created_at, id) over idx_session_messages
+    query = (
+        select(MessageModel)
+        .where(MessageModel.session_id == session.id)
+        .order_by(MessageModel.created_at.asc(), MessageModel.id.asc())
+        .limit(limit)
+    )
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"error": "Invalid Cursor", "message": "Cursor không hợp lệ"}
+            )
+        query = query.where(after_cursor(MessageModel.created_at, MessageModel.id, position))
+    elif offset:
+        query = query.offset(offset)
+    
+    with track_stage("history", "history_fetch"):
+        result = await db.execute(query)
+        messages = result.scalars().all()
+    
+    # Decrypt the whole page in one batch and build response
+    with track_stage("history", "history_decrypt"):
+        values = await read_fields_many_async(messages)
+    decrypted_messages = []
+    for msg, fields in zip(messages, values):
+        content = fields['content']
+        if content is None:
+            logger.error(f"Decryption failed for message {msg.id}")
+            content = "[Decryption failed]"
+        decrypted_messages.append(create_message_response(msg, content))
+    
+    # Legacy CBC rows → AES-GCM envelopes (plaintext already in hand)
+    if reencrypt_on_read(messages, values):
+        await db.commit()
     
     return MessageListResponse(
         messages=decrypted_messages,
-        total_count=total_count,
+        total_count=session.message_count,
         session_id=session.id,
-        has_crisis_history=has_crisis_history
+        has_crisis_history=session.has_crisis,
+        next_cursor=next_cursor(messages, limit)
     )
 
 
@@ -313,7 +594,7 @@ async def get_messages(
 async def get_message(
     message_id: UUID,
     session_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific message by ID
@@ -322,13 +603,16 @@ async def get_message(
     - **session_token**: Session token for authentication
     """
     # Validate session
-    session = get_session_by_token(db, session_token)
+    session = await get_session_by_token_async(db, session_token)
     
     # Get message
-    message = db.query(MessageModel).filter(
-        MessageModel.id == message_id,
-        MessageModel.session_id == session.id
-    ).first()
+    result = await db.execute(
+        select(MessageModel).where(
+            MessageModel.id == message_id,
+            MessageModel.session_id == session.id
+        )
+    )
+    message = result.scalars().first()
     
     if not message:
         raise HTTPException(
@@ -352,7 +636,7 @@ async def get_message(
 async def delete_message(
     message_id: UUID,
     session_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a specific message
@@ -361,13 +645,16 @@ async def delete_message(
     - **session_token**: Session token for authentication
     """
     # Validate session
-    session = get_session_by_token(db, session_token)
+    session = await get_session_by_token_async(db, session_token)
     
     # Get message
-    message = db.query(MessageModel).filter(
-        MessageModel.id == message_id,
-        MessageModel.session_id == session.id
-    ).first()
+    result = await db.execute(
+        select(MessageModel).where(
+            MessageModel.id == message_id,
+            MessageModel.session_id == session.id
+        )
+    )
+    message = result.scalars().first()
     
     if not message:
         raise HTTPException(
@@ -379,9 +666,12 @@ async def delete_message(
             }
         )
     
-    # Delete message
-    db.delete(message)
-    db.commit()
+    # Delete message (context window is rebuilt from the remaining messages)
+    await db.delete(message)
+    await recount_session_messages(db, session.id)
+    await reset_context(db, session.id)
+    await db.commit()
+    await invalidate_context(session.id)
     
     return MessageDeleteResponse(
         message="Message deleted successfully",
@@ -398,7 +688,7 @@ async def delete_message(
 )
 async def delete_all_messages(
     session_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete all messages for a session
@@ -406,14 +696,18 @@ async def delete_all_messages(
     - **session_token**: Session token for authentication
     """
     # Validate session
-    session = get_session_by_token(db, session_token)
+    session = await get_session_by_token_async(db, session_token)
     
     # Delete all messages
-    deleted_count = db.query(MessageModel).filter(
-        MessageModel.session_id == session.id
-    ).delete()
+    result = await db.execute(
+        delete(MessageModel).where(MessageModel.session_id == session.id)
+    )
+    deleted_count = result.rowcount
+    await recount_session_messages(db, session.id)
+    await reset_context(db, session.id)
     
-    db.commit()
+    await db.commit()
+    await invalidate_context(session.id)
     
     logger.info(f"Deleted {deleted_count} messages for session {session.id}")
     
@@ -9,13 +9,24 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, update, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.session import Session as SessionModel
 from app.models.message import Message
 from app.utils.session_manager import generate_session_token, hash_user_agent
+from app.utils.session_cache import (
+    get_cached_session,
+    get_cached_session_async,
+    cache_session,
+    cache_session_async,
+    invalidate_session_async
+)
+from app.utils.activity_buffer import last_activity_of
+from app.utils.background import enqueue
 
 logger = logging.getLogger(__name__)
 
@@ -82,30 +93,21 @@ class SessionStatusResponse(BaseModel):
     last_activity: datetime
     expires_at: datetime
     message_count: int
+    has_crisis: bool = False
+    last_message_at: Optional[datetime] = None
 
 
 # ============================================
 # HELPER FUNCTIONS
 # ============================================
 
-def get_session_by_token(db: Session, session_token: str) -> SessionModel:
+def _validate_session(session: Optional[SessionModel], session_token: str) -> SessionModel:
     """
-    Get session by token and validate
+    Validate a looked-up session
     
-    Args:
-        db: Database session
-        session_token: Session token
-        
-    Returns:
-        SessionModel instance
-        
     Raises:
         HTTPException: If session not found or invalid
     """
-    session = db.query(SessionModel).filter(
-        SessionModel.session_token == session_token
-    ).first()
-    
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -141,6 +143,117 @@ def get_session_by_token(db: Session, session_token: str) -> SessionModel:
     return session
 
 
+def get_session_by_token(db: Session, session_token: str) -> SessionModel:
+    """
+    Get session by token and validate
+    
+    Args:
+        db: Database session
+        session_token: Session token
+        
+    Returns:
+        SessionModel instance
+        
+    Raises:
+        HTTPException: If session not found or invalid
+    """
+    # Worker LRU → Redis → Postgres
+    cached = get_cached_session(session_token)
+    if cached is not None:
+        return _validate_session(db.merge(cached, load=False), session_token)
+    
+    session = db.query(SessionModel).filter(
+        SessionModel.session_token == session_token
+    ).first()
+    if session:
+        cache_session(session)
+    
+    return _validate_session(session, session_token)
+
+
+async def get_session_by_token_async(
+    db: AsyncSession,
+    session_token: str,
+    cached: bool = True
+) -> SessionModel:
+    """
+    Async version of get_session_by_token (for AsyncSession endpoints)
+    
+    Args:
+        db: Async database session
+        session_token: Session token
+        cached: Allow a cached row; pass False when reading the message
+            stats columns, which change with every message
+    
+    Raises:
+        HTTPException: If session not found or invalid
+    """
+    if cached:
+        cached_session = await get_cached_session_async(session_token)
+        if cached_session is not None:
+            return _validate_session(await db.merge(cached_session, load=False), session_token)
+    
+    result = await db.execute(
+        select(SessionModel).where(SessionModel.session_token == session_token)
+    )
+    session = result.scalars().first()
+    if session:
+        await cache_session_async(session)
+    
+    return _validate_session(session, session_token)
+
+
+async def record_new_messages(
+    db: AsyncSession,
+    session_id: UUID,
+    count: int,
+    has_crisis: bool = False
+) -> int:
+    """
+    Update the message stats of a session after inserting messages
+    
+    Atomic increment in the caller's transaction; call right before
+    commit so the row lock is held only briefly.
+    
+    Returns:
+        New message_count (UPDATE ... RETURNING, no extra read)
+    """
+    result = await db.execute(
+        update(SessionModel)
+        .where(SessionModel.id == session_id)
+        .values(
+            message_count=SessionModel.message_count + count,
+            has_crisis=or_(SessionModel.has_crisis, has_crisis),
+            last_message_at=func.now()
+        )
+        .returning(SessionModel.message_count)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def recount_session_messages(db: AsyncSession, session_id: UUID):
+    """Recompute the message stats of a session after deleting messages"""
+    await db.flush()
+    messages = (
+        select(Message.is_crisis_detected, Message.created_at)
+        .where(Message.session_id == session_id)
+        .subquery()
+    )
+    await db.execute(
+        update(SessionModel)
+        .where(SessionModel.id == session_id)
+        .values(
+            message_count=select(func.count()).select_from(messages).scalar_subquery(),
+            has_crisis=select(
+                func.coalesce(func.bool_or(messages.c.is_crisis_detected), False)
+            ).scalar_subquery(),
+            last_message_at=select(func.max(messages.c.created_at)).scalar_subquery()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
 # ============================================
 # SESSION ENDPOINTS
 # ============================================
@@ -154,7 +267,7 @@ def get_session_by_token(db: Session, session_token: str) -> SessionModel:
 )
 async def create_session(
     session_data: SessionCreateRequest = SessionCreateRequest(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new anonymous session
@@ -181,10 +294,11 @@ async def create_session(
     )
     
     db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    await db.commit()  # server defaults via RETURNING (eager_defaults)
+    await cache_session_async(new_session)
     
     logger.info(f"✅ New session created: {new_session.id} - Token: {session_token[:12]}...")
+    enqueue("compliance.session_created", session_id=str(new_session.id))
     
     # Return nested structure that frontend expects
     return SessionResponse(
@@ -205,7 +319,7 @@ async def create_session(
 )
 async def get_session(
     session_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get session details by token
@@ -214,12 +328,8 @@ async def get_session(
     
     Returns session details if valid, otherwise 404/401/410 error.
     """
-    session = get_session_by_token(db, session_token)
-    
-    # Count messages
-    message_count = db.query(Message).filter(
-        Message.session_id == session.id
-    ).count()
+    # One row: status + maintained message stats (no COUNT over messages)
+    session = await get_session_by_token_async(db, session_token, cached=False)
     
     logger.info(f"✅ Session validated: {session.id}")
     
@@ -229,9 +339,11 @@ async def get_session(
         is_active=session.is_active,
         is_crisis_mode=session.is_crisis_mode,
         created_at=session.created_at,
-        last_activity=session.last_activity,
+        last_activity=last_activity_of(session),
         expires_at=session.expires_at,
-        message_count=message_count
+        message_count=session.message_count,
+        has_crisis=session.has_crisis,
+        last_message_at=session.last_message_at
     )
 
 
@@ -243,7 +355,7 @@ async def get_session(
 )
 async def check_session_status(
     session_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Check session status via query parameter
@@ -252,12 +364,8 @@ async def check_session_status(
     
     Returns detailed session status including validity, expiration, and activity.
     """
-    session = get_session_by_token(db, session_token)
-    
-    # Count messages
-    message_count = db.query(Message).filter(
-        Message.session_id == session.id
-    ).count()
+    # One row: status + maintained message stats (no COUNT over messages)
+    session = await get_session_by_token_async(db, session_token, cached=False)
     
     return SessionStatusResponse(
         is_valid=True,
@@ -265,9 +373,11 @@ async def check_session_status(
         is_active=session.is_active,
         is_crisis_mode=session.is_crisis_mode,
         created_at=session.created_at,
-        last_activity=session.last_activity,
+        last_activity=last_activity_of(session),
         expires_at=session.expires_at,
-        message_count=message_count
+        message_count=session.message_count,
+        has_crisis=session.has_crisis,
+        last_message_at=session.last_message_at
     )
 
 
@@ -279,7 +389,7 @@ async def check_session_status(
 )
 async def refresh_session(
     session_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Refresh session to extend expiration
@@ -288,14 +398,14 @@ async def refresh_session(
     
     Extends the session expiration by 30 days from now.
     """
-    session = get_session_by_token(db, session_token)
+    session = await get_session_by_token_async(db, session_token)
     
     # Update expiration and activity
     session.expires_at = datetime.utcnow() + timedelta(days=30)
     session.touch()
     
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await invalidate_session_async(session_token)
     
     logger.info(f"✅ Session refreshed: {session.id}")
     
@@ -318,7 +428,7 @@ async def refresh_session(
 )
 async def delete_session(
     session_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete session (soft delete)
@@ -328,13 +438,14 @@ async def delete_session(
     This will mark the session as deleted and make it inaccessible.
     All associated messages will also be inaccessible.
     """
-    session = get_session_by_token(db, session_token)
+    session = await get_session_by_token_async(db, session_token)
     
     # Soft delete
     session.deleted_at = datetime.utcnow()
     session.is_active = False
     
-    db.commit()
+    await db.commit()
+    await invalidate_session_async(session_token)
     
     logger.info(f"✅ Session deleted: {session.id}")
     
@@ -345,4 +456,10 @@ async def delete_session(
 # EXPORT
 # ============================================
 
-__all__ = ['router', 'get_session_by_token']
\ No newline at end of file
+__all__ = [
+    'router',
+    'get_session_by_token',
+    'get_session_by_token_async',
+    'record_new_messages',
+    'recount_session_messages'
+]
\ No newline at end of file
@@ -10,40 +10,20 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 import logging
-import os
-import base64
 
 from app.database import get_db
 from app.models.story import Story
-from app.utils.encryption import encrypt_message, decrypt_message, ENCRYPTION_KEY
-
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import padding
+from app.utils.encryption import seal, unseal, ENCRYPTION_KEY
+from app.utils.sealed_fields import (
+    read_fields,
+    read_fields_many_async,
+    write_fields,
+    reencrypt_on_read
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# ============================================
-# HELPER FUNCTIONS
-# ============================================
-
-def encrypt_with_shared_iv(plaintext: str, iv_bytes: bytes) -> str:
-    """Encrypt text with specific IV"""
-    cipher = Cipher(
-        algorithms.AES(ENCRYPTION_KEY),
-        modes.CBC(iv_bytes),
-        backend=default_backend()
-    )
-    encryptor = cipher.encryptor()
-    
-    padder = padding.PKCS7(128).padder()
-    padded_data = padder.update(plaintext.encode('utf-8')) + padder.finalize()
-    
-    ciphertext = encryptor.update(padded_data) + encryptor.finalize()
-    
-    return base64.b64encode(ciphertext).decode('utf-8')
-
 # ============================================
 # SCHEMAS
 # ============================================
@@ -64,8 +44,7 @@ async def test_encryption():
     test_message = "Tôi cảm thấy áp lực khi học tập và thi cử"
     
     try:
-        encrypted, iv = encrypt_message(test_message)
-        decrypted = decrypt_message(encrypted, iv)
+        decrypted = unseal(seal(test_message))
         
         return {
             "test_message": test_message,
@@ -102,26 +81,18 @@ async def submit_story(
     logger.info(f"Story title preview: {story_data['title'][:20]}...")
     
     try:
-        # Generate 1 shared IV for both title and content
-        shared_iv_bytes = os.urandom(16)
-        shared_iv_b64 = base64.b64encode(shared_iv_bytes).decode('utf-8')
-        
-        # Encrypt both with same IV
-        title_encrypted = encrypt_with_shared_iv(story_data.title, shared_iv_bytes)
-        content_encrypted = encrypt_with_shared_iv(story_data.content, shared_iv_bytes)
-        
-        logger.info(f"✅ Story encrypted with shared IV")
-        logger.info(f"📦 Lengths: title={len(title_encrypted)}, content={len(content_encrypted)}")
-        
         story = Story(
-            title_encrypted=title_encrypted,
-            content_encrypted=content_encrypted,
-            encryption_iv=shared_iv_b64,  # Same IV for both
             category=story_data['category'],
             is_approved=False,
             is_published=False
         )
         
+        # Each field is its own AES-GCM envelope (own nonce, no shared IV)
+        write_fields(story, title=story_data['title'], content=story_data['content'])
+        
+        logger.info(f"✅ Story encrypted")
+        logger.info(f"📦 Lengths: title={len(story.title_sealed)}, content={len(story.content_sealed)}")
+        
         db.add(story)
         db.commit()
         db.refresh(story)
@@ -161,25 +132,30 @@ async def get_published_stories(
     total = query.count()
     stories = query.offset(offset).limit(limit).all()
     
+    # Giải mã cả trang trong một lượt (title + content của mỗi story)
+    values = await read_fields_many_async(stories)
+    
     result_stories = []
-    for story in stories:
-        try:
-            title = decrypt_message(story.title_encrypted, story.encryption_iv)
-            content = decrypt_message(story.content_encrypted, story.encryption_iv)
-            
-            excerpt = content[:200] + "..." if len(content) > 200 else content
-            
-            result_stories.append({
-                "id": str(story.id),
-                "title": title,
-                "excerpt": excerpt,
-                "category": story.category,
-                "likes_count": story.likes_count,
-                "created_at": story.created_at.isoformat()
-            })
-        except Exception as e:
-            logger.warning(f"⚠️ Failed to decrypt story {story.id}: {e}")
+    for story, fields in zip(stories, values):
+        title, content = fields['title'], fields['content']
+        if title is None or content is None:
+            logger.warning(f"⚠️ Failed to decrypt story {story.id}")
             continue
+        
+        excerpt = content[:200] + "..." if len(content) > 200 else content
+        
+        result_stories.append({
+            "id": str(story.id),
+            "title": title,
+            "excerpt": excerpt,
+            "category": story.category,
+            "likes_count": story.likes_count,
+            "created_at": story.created_at.isoformat()
+        })
+    
+    # Legacy CBC rows → AES-GCM envelopes
+    if reencrypt_on_read(stories, values):
+        db.commit()
     
     return {
         "stories": result_stories,
@@ -202,20 +178,23 @@ async def get_story_detail(story_id: str, db: Session = Depends(get_db)):
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
     
-    try:
-        title = decrypt_message(story.title_encrypted, story.encryption_iv)
-        content = decrypt_message(story.content_encrypted, story.encryption_iv)
-        
-        return {
-            "id": str(story.id),
-            "title": title,
-            "content": content,
-            "category": story.category,
-            "likes_count": story.likes_count,
-            "created_at": story.created_at.isoformat()
-        }
-    except Exception as e:
+    fields = read_fields(story)
+    if fields['title'] is None or fields['content'] is None:
         raise HTTPException(status_code=500, detail="Failed to load story")
+    
+    response = {
+        "id": str(story.id),
+        "title": fields['title'],
+        "content": fields['content'],
+        "category": story.category,
+        "likes_count": story.likes_count,
+        "created_at": story.created_at.isoformat()
+    }
+    
+    if reencrypt_on_read([story], [fields]):
+        db.commit()
+    
+    return response
 
 
 @router.post("/stories/{story_id}/like")
@@ -5,9 +5,11 @@
 
 import os
 import json
+import asyncio
 import logging
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 from redis.exceptions import RedisError, ConnectionError
 
 logger = logging.getLogger(__name__)
@@ -30,6 +32,8 @@ class RedisCache:
     def __init__(self):
         self.client: Optional[Redis] = None
         self.enabled = True
+        self._async_client: Optional[AsyncRedis] = None
+        self._async_loop = None
         self._connect()
     
     def _connect(self):
@@ -188,6 +192,161 @@ class RedisCache:
         except RedisError:
             return False
     
+    def publish(self, channel: str, message: str) -> bool:
+        """
+        Publish a message on a pub/sub channel
+        
+        Args:
+            channel: Channel name
+            message: Payload to publish
+            
+        Returns:
+            True if published, False otherwise
+        """
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            self.client.publish(channel, message)
+            logger.debug(f"Cache PUBLISH: {channel}")
+            return True
+        except RedisError as e:
+            logger.error(f"Redis PUBLISH error for {channel}: {e}")
+            return False
+    
+    def subscribe(self, channel: str, handler: Callable[[str], None]):
+        """
+        Subscribe to a pub/sub channel on a background daemon thread
+        
+        Args:
+            channel: Channel name
+            handler: Called with the message payload for every message
+            
+        Returns:
+            Worker thread (call .stop() on shutdown) or None if disabled
+        """
+        if not self.enabled or not self.client:
+            return None
+        
+        def _on_message(message):
+            try:
+                handler(message.get("data"))
+            except Exception as e:
+                logger.error(f"Pub/sub handler error for {channel}: {e}")
+        
+        def _on_error(error, pubsub, thread):
+            logger.warning(f"⚠️  Redis pub/sub error on {channel}: {error}")
+        
+        try:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{channel: _on_message})
+            thread = pubsub.run_in_thread(
+                sleep_time=1.0,
+                daemon=True,
+                exception_handler=_on_error
+            )
+            logger.info(f"📡 Subscribed to Redis channel: {channel}")
+            return thread
+        except RedisError as e:
+            logger.error(f"Redis SUBSCRIBE error for {channel}: {e}")
+            return None
+    
+    # ============================================
+    # ASYNC API (request handlers: never block the event loop)
+    # ============================================
+    # Cùng server, client redis.asyncio riêng: một Redis chậm chỉ làm chậm
+    # request đang chờ nó, không đóng băng cả worker như client đồng bộ.
+    
+    @property
+    def aclient(self) -> Optional[AsyncRedis]:
+        """Async client bound to the running event loop (None if disabled)"""
+        if not self.enabled or not self.client:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._discard_async_client()
+            self._async_client = AsyncRedis.from_url(
+                REDIS_URL,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5,
+                retry_on_timeout=True
+            )
+            self._async_loop = loop
+        return self._async_client
+    
+    def _discard_async_client(self):
+        """
+        Close the client of a previous event loop (its pool would leak)
+
+        The connections belong to that loop, so they are closed on it; a
+        loop that is already closed cannot run anything, its sockets are
+        closed when the dropped client is garbage collected.
+        """
+        old, old_loop = self._async_client, self._async_loop
+        self._async_client = self._async_loop = None
+        if old is not None and old_loop is not None and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(old.aclose(), old_loop)
+    
+    async def aget(self, key: str) -> Optional[str]:
+        """Async get(): value or None if not found/error"""
+        client = self.aclient
+        if client is None:
+            return None
+        
+        try:
+            return await client.get(key)
+        except RedisError as e:
+            logger.error(f"Redis GET error for key {key}: {e}")
+            return None
+    
+    async def aset(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+        """Async set() with TTL (default: REDIS_TTL)"""
+        client = self.aclient
+        if client is None:
+            return False
+        
+        try:
+            await client.setex(key, ttl or REDIS_TTL, value)
+            return True
+        except RedisError as e:
+            logger.error(f"Redis SET error for key {key}: {e}")
+            return False
+    
+    async def adelete(self, *keys: str) -> bool:
+        """Async delete() of one or more keys"""
+        client = self.aclient
+        if client is None or not keys:
+            return False
+        
+        try:
+            await client.delete(*keys)
+            return True
+        except RedisError as e:
+            logger.error(f"Redis DELETE error for keys {keys}: {e}")
+            return False
+    
+    async def apublish(self, channel: str, message: str) -> bool:
+        """Async publish()"""
+        client = self.aclient
+        if client is None:
+            return False
+        
+        try:
+            await client.publish(channel, message)
+            return True
+        except RedisError as e:
+            logger.error(f"Redis PUBLISH error for {channel}: {e}")
+            return False
+    
+    async def aclose(self):
+        """Close the async connection pool (shutdown)"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+    
     def health_check(self) -> dict:
         """
         Check Redis health
@@ -270,6 +429,29 @@ def get_json(key: str) -> Optional[Any]:
         return None
 
 
+async def acache_json(key: str, data: Any, ttl: Optional[int] = None) -> bool:
+    """cache_json() without blocking the event loop"""
+    try:
+        json_str = json.dumps(data)
+    except (TypeError, ValueError) as e:
+        logger.error(f"JSON serialization error for key {key}: {e}")
+        return False
+    return await cache.aset(key, json_str, ttl)
+
+
+async def aget_json(key: str) -> Optional[Any]:
+    """get_json() without blocking the event loop"""
+    value = await cache.aget(key)
+    if not value:
+        return None
+    
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError) as e:
+        logger.error(f"JSON deserialization error for key {key}: {e}")
+        return None
+
+
 def generate_session_cache_key(session_token: str) -> str:
     """Generate cache key for session"""
     return f"session:{session_token}"
@@ -295,6 +477,8 @@ __all__ = [
     'cache',
     'cache_json',
     'get_json',
+    'acache_json',
+    'aget_json',
     'generate_session_cache_key',
     'generate_messages_cache_key',
     'invalidate_session_cache'
@@ -4,14 +4,18 @@
 # ============================================
 
 import os
-from typing import Generator
+import asyncio
+from typing import AsyncGenerator, Generator
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import NullPool, QueuePool
 from contextlib import contextmanager
 import logging
 
 from app.models import Base
+from app.utils.metrics import DB_POOL_CONNECTIONS, PROMETHEUS_MULTIPROC_DIR
 from dotenv import load_dotenv
 
 # Setup logging
@@ -45,6 +49,42 @@ DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
 DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
 DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # 1 hour
 
+# Async pool (asyncpg) for FastAPI endpoints - separate from the sync pool,
+# so keep POOL_SIZE + ASYNC_POOL_SIZE within the database connection limit
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+
+# Pool gauges refresh period when metrics are multi-process (seconds)
+DB_POOL_METRICS_INTERVAL = float(os.getenv("DB_POOL_METRICS_INTERVAL", "5"))
+
+
+def _build_async_url(database_url: str):
+    """
+    Convert the sync DATABASE_URL into an asyncpg URL
+    
+    asyncpg does not understand libpq's ?sslmode=..., so it is moved
+    into connect_args['ssl'] (asyncpg accepts the same mode names).
+    
+    Returns:
+        Tuple of (async_url, connect_args)
+    """
+    url = make_url(database_url)
+    query = dict(url.query)
+    connect_args = {
+        # Same 30s statement timeout as the sync engine's connect hook
+        "server_settings": {"statement_timeout": "30000"}
+    }
+    
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    
+    async_url = url.set(drivername="postgresql+asyncpg", query=query)
+    return async_url, connect_args
+
+
+ASYNC_DATABASE_URL, ASYNC_CONNECT_ARGS = _build_async_url(DATABASE_URL)
+
 # ============================================
 # ENGINE CONFIGURATION
 # ============================================
@@ -62,6 +102,19 @@ engine = create_engine(
     future=True,  # SQLAlchemy 2.0 style
 )
 
+# Async engine for request handlers (does not block the event loop).
+# Scripts and Alembic keep using the sync engine above.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_ASYNC_POOL_SIZE,
+    max_overflow=DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    echo=os.getenv("DEBUG", "false").lower() == "true",
+    connect_args=ASYNC_CONNECT_ARGS,
+)
+
 # ============================================
 # SESSION CONFIGURATION
 # ============================================
@@ -74,6 +127,14 @@ SessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# Async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # ============================================
 # DATABASE EVENT LISTENERS
 # ============================================
@@ -95,6 +156,70 @@ def receive_checkout(dbapi_conn, connection_record, connection_proxy):
     logger.debug("Database connection checked out from pool")
 
 
+# ============================================
+# POOL METRICS (Prometheus)
+# ============================================
+
+def _pool_readers(pool) -> dict:
+    """Gauge state -> function reading it from the pool"""
+    return {
+        "size": pool.size,
+        "checked_out": pool.checkedout,
+        "checked_in": pool.checkedin,
+        # QueuePool.overflow() is negative until the pool has filled up
+        "overflow": lambda: max(0, pool.overflow())
+    }
+
+
+_metered_pools = {
+    name: pool for name, pool in (("sync", engine.pool), ("async", async_engine.pool))
+    if hasattr(pool, "checkedout")  # NullPool: nothing to report
+}
+_pool_metrics_task = None
+
+
+def refresh_pool_metrics():
+    """Write the current pool state into the db_pool_connections gauges"""
+    for name, pool in _metered_pools.items():
+        for state, read in _pool_readers(pool).items():
+            DB_POOL_CONNECTIONS.labels(name, state).set(read())
+
+
+async def _pool_metrics_loop():
+    while True:
+        refresh_pool_metrics()
+        await asyncio.sleep(DB_POOL_METRICS_INTERVAL)
+
+
+def start_pool_metrics():
+    """
+    Keep the pool gauges current (lifespan startup)
+    
+    Single process: gauges are read from the pools at scrape time.
+    Multi-process metrics only see values written to the shared files,
+    so each worker writes its pool state every DB_POOL_METRICS_INTERVAL.
+    """
+    global _pool_metrics_task
+    if not PROMETHEUS_MULTIPROC_DIR:
+        for name, pool in _metered_pools.items():
+            for state, read in _pool_readers(pool).items():
+                DB_POOL_CONNECTIONS.labels(name, state).set_function(read)
+    elif _pool_metrics_task is None:
+        _pool_metrics_task = asyncio.get_running_loop().create_task(_pool_metrics_loop())
+
+
+async def stop_pool_metrics():
+    """Stop the refresh task (shutdown)"""
+    global _pool_metrics_task
+    if _pool_metrics_task is not None:
+        _pool_metrics_task.cancel()
+        try:
+            await _pool_metrics_task
+        except asyncio.CancelledError:
+            pass
+        _pool_metrics_task = None
+
+
 # ============================================
 # SESSION DEPENDENCY (for FastAPI)
 # ============================================
@@ -119,6 +244,28 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async dependency for FastAPI endpoints (asyncpg)
+    
+    Usage:
+        @app.get("/api/sessions")
+        async def get_sessions(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(SessionModel))
+            return result.scalars().all()
+    
+    Sync helpers that take a Session can be called with
+    `await db.run_sync(func, *args)`.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await db.rollback()
+            raise
+
+
 # ============================================
 # CONTEXT MANAGER (for scripts)
 # ============================================
@@ -248,10 +395,16 @@ def cleanup_old_metrics(days: int = 90):
 
 __all__ = [
     'engine',
+    'async_engine',
     'SessionLocal',
+    'AsyncSessionLocal',
     'get_db',
+    'get_async_db',
     'get_db_context',
     'check_database_health',
+    'refresh_pool_metrics',
+    'start_pool_metrics',
+    'stop_pool_metrics',
     'init_database',
     'drop_database',
     'cleanup_expired_sessions',
@@ -23,7 +23,39 @@ import time
 backend_dir = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(backend_dir))
 
-from app.database import check_database_health, cleanup_expired_sessions, init_database
+from app.database import (
+    check_database_health,
+    cleanup_expired_sessions,
+    init_database,
+    get_db_context,
+    async_engine,
+    start_pool_metrics,
+    stop_pool_metrics
+)
+from app.utils.crisis_detection import (
+    rebuild_keyword_matcher,
+    start_keyword_listener,
+    stop_keyword_listener
+)
+from app.utils.ai_engine import open_groq_client, close_groq_client, get_llm_router, close_llm_router
+from app.utils.executor import start_executors, shutdown_executors
+from app.cache import cache
+from app.utils.session_cache import start_session_cache_listener, stop_session_cache_listener
+from app.utils.activity_buffer import start_activity_flusher, stop_activity_flusher
+from app.utils.background import start_background_queue, stop_background_queue
+from app.utils.health_metrics import start_health_recorder, stop_health_recorder
+from app.utils.monitoring import observe_api_request
+from app.utils.metrics import metrics_registry, mark_worker_dead
+from app.utils.retrieval import (
+    build_knowledge_index,
+    start_knowledge_listener,
+    stop_knowledge_listener
+)
+from app.utils.emergency_responses import (
+    build_emergency_payloads,
+    start_emergency_listener,
+    stop_emergency_listener
+)
 from app import __version__
 
 # Setup logging
@@ -67,12 +99,76 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️  Cleanup failed: {e}")
     
+    # Compile crisis keywords before the first message and listen for changes
+    try:
+        with get_db_context() as db:
+            rebuild_keyword_matcher(db)
+    except Exception as e:
+        logger.warning(f"⚠️  Crisis keyword warm-up failed: {e}")
+    start_keyword_listener()
+    
+    # BM25 index over KNOWLEDGE_BASE + published knowledge content
+    try:
+        with get_db_context() as db:
+            build_knowledge_index(db)
+    except Exception as e:
+        logger.warning(f"⚠️  Knowledge index build failed: {e}")
+        build_knowledge_index()
+    start_knowledge_listener()
+    
+    # Emergency payloads (defaults + published emergency content), served without DB access
+    try:
+        with get_db_context() as db:
+            build_emergency_payloads(db)
+    except Exception as e:
+        logger.warning(f"⚠️  Emergency content load failed, using defaults: {e}")
+    start_emergency_listener()
+    
+    # Session lookup cache: drop local copies invalidated by other workers
+    start_session_cache_listener()
+    
+    # Bulk last_activity writes instead of one UPDATE per chat turn
+    start_activity_flusher()
+    
+    # DB pool gauges (multi-process metrics: written periodically by each worker)
+    start_pool_metrics()
+    
+    # Per-minute health rollups into system_health_metrics (1m -> 1h -> 1d)
+    start_health_recorder()
+    
+    # Worker pool for CPU-bound work (crypto, regex scans, password hashing)
+    start_executors()
+    
+    # Post-response work (compliance logs, analytics) off the request path
+    await start_background_queue()
+    
+    # Shared keep-alive connection pool to api.groq.com
+    await open_groq_client()
+    
+    # LLM backends (failover order, circuit breakers shared by all requests)
+    get_llm_router()
+    
     logger.info("✅ Application started successfully")
     
     yield
     
     # SHUTDOWN
     logger.info("🛑 Shutting down Cùng Bạn Lắng Nghe API...")
+    stop_keyword_listener()
+    stop_knowledge_listener()
+    stop_emergency_listener()
+    stop_session_cache_listener()
+    await stop_background_queue()
+    await close_llm_router()
+    await close_groq_client()
+    await stop_activity_flusher()
+    await stop_pool_metrics()
+    await stop_health_recorder()
+    await async_engine.dispose()
+    await cache.aclose()
+    shutdown_executors()
+    # Multi-process metrics: this worker's live gauges leave the aggregate
+    mark_worker_dead()
     logger.info("✅ Shutdown complete")
 
 # ============================================
@@ -115,15 +211,27 @@ app.add_middleware(
     allowed_hosts=["*"]
 )
 
+def _route_template(request: Request) -> str:
+    """Matched route path ("/api/v1/messages/{message_id}"), not the raw URL"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    """Add request ID and processing time to response headers"""
+    """Add request ID and processing time to response headers, record latency"""
     request_id = request.headers.get("X-Request-ID", f"req-{int(time.time())}")
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    except Exception:
+        observe_api_request(_route_template(request), request.method, 500, time.perf_counter() - start_time)
+        raise
     
-    process_time = time.time() - start_time
+    # Streaming responses: time until the headers, not the whole stream
+    process_time = time.perf_counter() - start_time
+    observe_api_request(_route_template(request), request.method, response.status_code, process_time)
     response.headers["X-Request-ID"] = request_id
     response.headers["X-Process-Time"] = f"{process_time:.4f}s"
     
@@ -241,7 +349,8 @@ async def readiness_probe():
 # METRICS ENDPOINT (Prometheus)
 # ============================================
 
-metrics_app = make_asgi_app()
+# Multi-process (PROMETHEUS_MULTIPROC_DIR): any worker serves the aggregate of all workers
+metrics_app = make_asgi_app(registry=metrics_registry())
 app.mount("/metrics", metrics_app)
 
 # ============================================
@@ -3,7 +3,7 @@
 # File: backend/app/models/contact.py
 # ============================================
 
-from sqlalchemy import Column, String, Text, DateTime, Boolean
+from sqlalchemy import Column, String, Text, DateTime, Boolean, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -17,15 +17,26 @@ class ContactForm(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
-    # Optional fields (encrypted if provided)
+    # Encrypted fields: AES-GCM envelopes (bytea); name/email are optional
+    name_sealed = Column(LargeBinary)
+    email_sealed = Column(LargeBinary)
+    message_sealed = Column(LargeBinary)
+    
+    # Legacy AES-CBC columns (NULL once re-encrypted)
     name_encrypted = Column(Text)
     email_encrypted = Column(Text)
     encryption_iv = Column(String(32))
+    message_encrypted = Column(Text)
+    message_iv = Column(String(32))
+    
+    __sealed_fields__ = {
+        'name': ('name_sealed', 'name_encrypted', 'encryption_iv'),
+        'email': ('email_sealed', 'email_encrypted', 'encryption_iv'),
+        'message': ('message_sealed', 'message_encrypted', 'message_iv'),
+    }
     
     # Required fields
     subject = Column(String(100), nullable=False)  # feedback, bug, feature, partnership, other
-    message_encrypted = Column(Text, nullable=False)
-    message_iv = Column(String(32), nullable=False)
     
     # Status
     is_read = Column(Boolean, default=False)
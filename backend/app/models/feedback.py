@@ -3,7 +3,7 @@
 # File: backend/app/models/feedback.py
 # ============================================
 
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, CheckConstraint
+from sqlalchemy import Column, String, Integer, DateTime, Text, LargeBinary, ForeignKey, CheckConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -19,9 +19,16 @@ class Feedback(Base):
     session_id = Column(UUID(as_uuid=True), ForeignKey('sessions.id', ondelete='CASCADE'), unique=True)
     
     rating = Column(Integer, CheckConstraint('rating BETWEEN 1 AND 5'))
+    feedback_text_sealed = Column(LargeBinary, nullable=True)  # AES-GCM envelope
+    
+    # Legacy AES-CBC columns (NULL once re-encrypted)
     feedback_text_encrypted = Column(Text, nullable=True)
     encryption_iv = Column(String(32), nullable=True)
     
+    __sealed_fields__ = {
+        'feedback_text': ('feedback_text_sealed', 'feedback_text_encrypted', 'encryption_iv'),
+    }
+    
     category = Column(String(50))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -5,7 +5,7 @@
 
 from datetime import datetime, timedelta
 from sqlalchemy import (
-    Column, String, Integer, Boolean, DateTime, Text,
+    Column, String, Integer, Boolean, DateTime, Text, LargeBinary,
     ForeignKey, CheckConstraint, Index, DECIMAL, ARRAY
 )
 from sqlalchemy.dialects.postgresql import UUID
@@ -20,6 +20,7 @@ class Message(Base):
     __table_args__ = (
         CheckConstraint("role IN ('user', 'assistant')", name='check_role'),
         Index('idx_session_messages', 'session_id', 'created_at'),
+        Index('idx_messages_created_id', 'created_at', 'id'),
         {'extend_existing': True}
     )
     
@@ -29,9 +30,12 @@ class Message(Base):
     # Foreign key
     session_id = Column(UUID(as_uuid=True), ForeignKey('sessions.id', ondelete='CASCADE'), nullable=False)
     
-    # Encrypted content
-    content_encrypted = Column(Text, nullable=False)
-    encryption_iv = Column(String(32), nullable=False)
+    # Encrypted content: AES-GCM envelope (bytea)
+    content_sealed = Column(LargeBinary, nullable=True)
+    
+    # Legacy AES-CBC columns (NULL once re-encrypted into content_sealed)
+    content_encrypted = Column(Text, nullable=True)
+    encryption_iv = Column(String(32), nullable=True)
     
     # Message metadata
     role = Column(String(10), nullable=False)
@@ -64,5 +68,13 @@ class Message(Base):
     # Relationship
     session = relationship("Session", back_populates="messages")
     
+    # field → (envelope column, legacy ciphertext column, legacy IV column)
+    __sealed_fields__ = {
+        'content': ('content_sealed', 'content_encrypted', 'encryption_iv'),
+    }
+    
+    # created_at (server default) comes back via INSERT ... RETURNING: no refresh needed
+    __mapper_args__ = {"eager_defaults": True}
+    
     def __repr__(self):
         return f"<Message(id={self.id}, role={self.role}, session={self.session_id})>"
\ No newline at end of file
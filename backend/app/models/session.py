@@ -4,7 +4,7 @@
 # ============================================
 
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -39,6 +39,11 @@ class Session(Base):
     is_active = Column(Boolean, default=True)
     is_crisis_mode = Column(Boolean, default=False)
     
+    # Message stats (denormalized, updated in the same transaction as messages)
+    message_count = Column(Integer, nullable=False, default=0, server_default='0')
+    has_crisis = Column(Boolean, nullable=False, default=False, server_default='false')
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Soft delete
     deleted_at = Column(DateTime(timezone=True), nullable=True)
     
@@ -61,6 +66,9 @@ class Session(Base):
         cascade="all, delete-orphan"
     )
     
+    # Server defaults come back via INSERT ... RETURNING: no refresh needed
+    __mapper_args__ = {"eager_defaults": True}
+    
     def __repr__(self):
         return f"<Session(id={self.id}, token={self.session_token[:8]}..., active={self.is_active})>"
     
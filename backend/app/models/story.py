@@ -3,7 +3,7 @@
 # File: backend/app/models/story.py
 # ============================================
 
-from sqlalchemy import Column, String, Text, Boolean, DateTime, Integer
+from sqlalchemy import Column, String, Text, Boolean, DateTime, Integer, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -17,10 +17,19 @@ class Story(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
-    # Content (encrypted)
-    title_encrypted = Column(Text, nullable=False)
-    content_encrypted = Column(Text, nullable=False)
-    encryption_iv = Column(String(32), nullable=False)
+    # Content (encrypted): AES-GCM envelopes (bytea)
+    title_sealed = Column(LargeBinary, nullable=True)
+    content_sealed = Column(LargeBinary, nullable=True)
+    
+    # Legacy AES-CBC columns (NULL once re-encrypted)
+    title_encrypted = Column(Text, nullable=True)
+    content_encrypted = Column(Text, nullable=True)
+    encryption_iv = Column(String(32), nullable=True)
+    
+    __sealed_fields__ = {
+        'title': ('title_sealed', 'title_encrypted', 'encryption_iv'),
+        'content': ('content_sealed', 'content_encrypted', 'encryption_iv'),
+    }
     
     # Metadata
     category = Column(String(50), nullable=False)  # stress, lonely, love, exam, family
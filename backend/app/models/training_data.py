@@ -5,7 +5,7 @@
 
 from sqlalchemy import (
     Column, String, BigInteger, Boolean, DateTime, Text, 
-    ARRAY, Index
+    ARRAY, Index, LargeBinary
 )
 from sqlalchemy.sql import func
 
@@ -24,8 +24,16 @@ class TrainingData(Base):
     source = Column(String(50), nullable=False)
     source_id = Column(String(100))
     
-    content_encrypted = Column(Text, nullable=False)
-    encryption_iv = Column(String(32), nullable=False)
+    # Encrypted content: AES-GCM envelope (bytea)
+    content_sealed = Column(LargeBinary, nullable=True)
+    
+    # Legacy AES-CBC columns (NULL once re-encrypted into content_sealed)
+    content_encrypted = Column(Text, nullable=True)
+    encryption_iv = Column(String(32), nullable=True)
+    
+    __sealed_fields__ = {
+        'content': ('content_sealed', 'content_encrypted', 'encryption_iv'),
+    }
     
     sentiment = Column(String(20))
     emotion_tags = Column(ARRAY(Text))
@@ -100,6 +100,7 @@ class MessageListResponse(BaseModel):
     total_count: int
     session_id: UUID
     has_crisis_history: bool = False
+    next_cursor: Optional[str] = None
     
     model_config = {
         "json_schema_extra": {
@@ -107,7 +108,8 @@ class MessageListResponse(BaseModel):
                 "messages": [],
                 "total_count": 10,
                 "session_id": "123e4567-e89b-12d3-a456-426614174000",
-                "has_crisis_history": False
+                "has_crisis_history": False,
+                "next_cursor": None
             }
         }
     }
@@ -0,0 +1,191 @@
+# ============================================
+# SESSION ACTIVITY WRITE-BEHIND
+# File: backend/app/utils/activity_buffer.py
+# ============================================
+
+import os
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.database import async_engine
+from app.models.session import Session as SessionModel
+from app.utils.metrics import ACTIVITY_BUFFER_PENDING, ACTIVITY_FLUSHED_ROWS, ACTIVITY_FLUSH_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Chu kỳ ghi last_activity xuống DB (giây); 0 = ghi trực tiếp như trước
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "5"))
+# Số dòng tối đa trong một câu UPDATE ... FROM (VALUES ...)
+ACTIVITY_FLUSH_BATCH = int(os.getenv("ACTIVITY_FLUSH_BATCH", "1000"))
+
+
+class ActivityBuffer:
+    """
+    Latest last_activity per session, waiting to be written
+
+    Many turns of the same session between two flushes collapse into a
+    single row of the next bulk UPDATE.
+    """
+
+    def __init__(self):
+        self._pending: Dict[UUID, datetime] = {}
+        self._lock = threading.Lock()
+
+    def record(self, session_id: UUID, at: datetime):
+        with self._lock:
+            previous = self._pending.get(session_id)
+            if previous is None or at > previous:
+                self._pending[session_id] = at
+            ACTIVITY_BUFFER_PENDING.set(len(self._pending))
+
+    def get(self, session_id: UUID) -> Optional[datetime]:
+        """Buffered (not yet flushed) activity of a session"""
+        return self._pending.get(session_id)
+
+    def drain(self) -> Dict[UUID, datetime]:
+        """Take every pending entry"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            ACTIVITY_BUFFER_PENDING.set(0)
+        return pending
+
+    def restore(self, entries: Dict[UUID, datetime]):
+        """Put back entries of a failed flush (newer values win)"""
+        for session_id, at in entries.items():
+            self.record(session_id, at)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+ACTIVITY = ActivityBuffer()
+_flusher: Optional[asyncio.Task] = None
+
+
+# ============================================
+# PUBLIC API
+# ============================================
+
+def touch_session(session: SessionModel):
+    """
+    Record activity of a session without dirtying the row
+
+    The in-memory instance gets the new value (no UPDATE is flushed for
+    it); the database is updated by the next flush_activity().
+    """
+    if ACTIVITY_FLUSH_INTERVAL <= 0:
+        session.touch()
+        return
+    at = datetime.now(timezone.utc)
+    set_committed_value(session, 'last_activity', at)
+    ACTIVITY.record(session.id, at)
+
+
+def last_activity_of(session: SessionModel) -> datetime:
+    """last_activity including this worker's unflushed activity"""
+    buffered = ACTIVITY.get(session.id)
+    if buffered is not None and (session.last_activity is None or buffered > session.last_activity):
+        return buffered
+    return session.last_activity
+
+
+def _bulk_update(rows: int):
+    values = ", ".join(
+        f"(CAST(:id{i} AS uuid), CAST(:at{i} AS timestamptz))" for i in range(rows)
+    )
+    # Không ghi lùi: worker khác có thể đã ghi giá trị mới hơn
+    return text(
+        "UPDATE sessions SET last_activity = v.at "
+        f"FROM (VALUES {values}) AS v(id, at) "
+        "WHERE sessions.id = v.id "
+        "AND (sessions.last_activity IS NULL OR sessions.last_activity < v.at)"
+    )
+
+
+async def flush_activity() -> int:
+    """
+    Write all buffered activity in bulk UPDATEs
+
+    Rows are sorted by id so concurrent flushes from several workers
+    lock them in the same order.
+
+    Returns:
+        Number of sessions written
+    """
+    pending = ACTIVITY.drain()
+    if not pending:
+        return 0
+
+    entries = sorted(pending.items())
+    try:
+        async with async_engine.begin() as conn:
+            for start in range(0, len(entries), ACTIVITY_FLUSH_BATCH):
+                chunk = entries[start:start + ACTIVITY_FLUSH_BATCH]
+                params = {}
+                for i, (session_id, at) in enumerate(chunk):
+                    params[f"id{i}"] = session_id
+                    params[f"at{i}"] = at
+                await conn.execute(_bulk_update(len(chunk)), params)
+    except Exception as e:
+        ACTIVITY.restore(pending)
+        ACTIVITY_FLUSH_ERRORS.inc()
+        logger.error(f"Activity flush failed ({len(entries)} sessions kept for retry): {e}")
+        return 0
+
+    ACTIVITY_FLUSHED_ROWS.inc(len(entries))
+    logger.debug(f"Activity flushed: {len(entries)} sessions")
+    return len(entries)
+
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(ACTIVITY_FLUSH_INTERVAL)
+        await flush_activity()
+
+
+def start_activity_flusher():
+    """Start the periodic flush task (lifespan startup)"""
+    global _flusher
+    if ACTIVITY_FLUSH_INTERVAL > 0 and _flusher is None:
+        _flusher = asyncio.get_running_loop().create_task(_flush_loop())
+        logger.info(f"✅ Activity write-behind every {ACTIVITY_FLUSH_INTERVAL:g}s")
+    return _flusher
+
+
+async def stop_activity_flusher():
+    """Stop the flush task and write what is left (before disposing the engine)"""
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        try:
+            await _flusher
+        except asyncio.CancelledError:
+            pass
+        _flusher = None
+    await flush_activity()
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'ACTIVITY_FLUSH_INTERVAL',
+    'ActivityBuffer',
+    'touch_session',
+    'last_activity_of',
+    'flush_activity',
+    'start_activity_flusher',
+    'stop_activity_flusher'
+]
@@ -6,8 +6,8 @@
 import os
 import httpx
 import logging
-import re 
-from typing import Dict, Optional, List
+import importlib.util
+from typing import AsyncIterator, Dict, Optional, List
 
 # --- Import từ knowledge_base ---
 try:
@@ -20,6 +20,19 @@ except ImportError:
         "KNS_PHAN_LOAI": "",
     }
 
+from .moderation import ModerationEngine, ModerationResult
+from .prompt_builder import PromptBuilder, message_tokens
+from .retrieval import retrieve_context
+from .llm_router import (
+    LLMRouter,
+    LLMUnavailableError,
+    HTTPChatBackend,
+    OpenAIBackend,
+    StubBackend
+)
+from .response_cache import is_cacheable_turn, response_cache_key, cached_completion, record_bypass
+from .llm_admission import llm_admission
+
 logger = logging.getLogger(__name__)
 
 # ============================================
@@ -28,8 +41,25 @@ logger = logging.getLogger(__name__)
 
 # Groq API Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_API_BASE = "https://api.groq.com/openai/v1"
-GROQ_MODEL = "llama-3.3-70b-versatile"
+GROQ_API_BASE = os.getenv("GROQ_API_BASE", "https://api.groq.com/openai/v1")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+
+# Groq HTTP connection pool (một client dùng chung suốt vòng đời app)
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+GROQ_HTTP2 = os.getenv("GROQ_HTTP2", "true").lower() == "true"
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "10"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+
+# LLM router: backend theo thứ tự ưu tiên (groq, openai, stub)
+LLM_BACKENDS = [b.strip().lower() for b in os.getenv("LLM_BACKENDS", "groq").split(",") if b.strip()]
+# Backend "openai": bất kỳ endpoint tương thích OpenAI (OpenAI, vLLM, fake_llm_server.py...)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+# Backend "stub": trả lời cố định, không gọi mạng (test / load test)
+LLM_STUB_DELAY = float(os.getenv("LLM_STUB_DELAY", "0.05"))
 
 # Dữ liệu cố định (Thông tin hành chính)
 ESSENTIAL_CONTEXT = """
@@ -146,11 +176,25 @@ TU_KHOA_KHUNG_HOANG = [
 ]
 
 
+# Biên dịch một lần khi import: cả hai danh sách trong MỘT bộ quét
+MODERATION_ENGINE = ModerationEngine(TU_KHOA_VI_PHAM, TU_KHOA_KHUNG_HOANG)
+
+
 # ============================================
 # 2. IMPROVED CRISIS DETECTION FUNCTION
 # ============================================
 
-def check_for_crisis(user_message: str) -> bool:
+def moderate_message(user_message: str) -> ModerationResult:
+    """
+    Chuẩn hóa MỘT lần và quét tất cả từ khóa vi phạm + khủng hoảng.
+    
+    Kết quả được truyền tiếp cho check_for_crisis, check_content_violation,
+    GroqAI.generate_response và CrisisDetector để không phải quét lại.
+    """
+    return MODERATION_ENGINE.scan(user_message or "")
+
+
+def check_for_crisis(user_message: str, moderation: Optional[ModerationResult] = None) -> bool:
     """
     IMPROVED: Kiểm tra tin nhắn có chứa từ khóa khủng hoảng.
     Sử dụng regex linh hoạt hơn (cho phép dấu cách bất thường).
@@ -160,29 +204,22 @@ def check_for_crisis(user_message: str) -> bool:
     """
     if not user_message:
         return False
-        
-    # Chuẩn hóa: loại bỏ dấu câu, chuyển thành chữ thường, chuẩn hóa khoảng trắng
-    message_normalized = re.sub(r'[^\w\sáàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]', ' ', user_message.lower())
-    message_normalized = re.sub(r'\s+', ' ', message_normalized).strip()
     
-    for crisis_item in TU_KHOA_KHUNG_HOANG:
-        try:
-            # Tìm kiếm trong chuỗi đã chuẩn hóa
-            if re.search(crisis_item["regex"], message_normalized, re.I | re.U):
-                logger.critical(
-                    f"🚨 CRISIS ALERT DETECTED - "
-                    f"Group: {crisis_item['nhom']}, Keyword: '{crisis_item['tu_khoa']}', "
-                    f"Message: '{user_message[:50]}...'"
-                )
-                return True
-        except re.error as e:
-            logger.error(f"Crisis Regex error for {crisis_item['tu_khoa']}: {e}")
-            continue
-            
+    moderation = moderation or moderate_message(user_message)
+    crisis_hits = moderation.crisis_hits
+    if crisis_hits:
+        crisis_item = crisis_hits[0]
+        logger.critical(
+            f"🚨 CRISIS ALERT DETECTED - "
+            f"Group: {crisis_item['nhom']}, Keyword: '{crisis_item['tu_khoa']}', "
+            f"Message: '{user_message[:50]}...'"
+        )
+        return True
+    
     return False
 
 
-def check_content_violation(user_message: str) -> Optional[str]:
+def check_content_violation(user_message: str, moderation: Optional[ModerationResult] = None) -> Optional[str]:
     """
     Kiểm tra tin nhắn có chứa từ khóa vi phạm.
     
@@ -191,42 +228,22 @@ def check_content_violation(user_message: str) -> Optional[str]:
     """
     if not user_message:
         return None
-        
-    message_normalized = re.sub(r'[^\w\sáàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]', ' ', user_message.lower())
-    message_normalized = re.sub(r'\s+', ' ', message_normalized).strip()
     
-    for violation_item in TU_KHOA_VI_PHAM:
-        try:
-            if re.search(violation_item["regex"], message_normalized, re.I | re.U): 
-                logger.warning(
-                    f"🚫 VIOLATION DETECTED - "
-                    f"Group: {violation_item['nhom']}, Keyword: {violation_item['tu_khoa']}"
-                )
-                return violation_item["nhom"]
-        except re.error as e:
-            logger.error(f"Regex error for keyword {violation_item['tu_khoa']}: {e}")
-            continue
-            
-    return None
+    moderation = moderation or moderate_message(user_message)
+    violation_group = moderation.violation_group
+    if violation_group:
+        keywords = [hit['tu_khoa'] for hit in moderation.violations]
+        logger.warning(
+            f"🚫 VIOLATION DETECTED - "
+            f"Group: {violation_group}, Keywords: {keywords}"
+        )
+    
+    return violation_group
 
 
 def rule_based_retrieve_context(user_message: str) -> str:
-    """Truy xuất ngữ cảnh dựa trên từ khóa từ KNOWLEDGE_BASE."""
-    message_lower = user_message.lower()
-    
-    if any(keyword in message_lower for keyword in ["tham vấn", "tư vấn", "lắng nghe thấu hiểu", "nguyên tắc tư vấn"]):
-        return KNOWLEDGE_BASE["NEN_TANG_TU_VAN"]
-    
-    if any(keyword in message_lower for keyword in ["stress", "căng thẳng", "mâu thuẫn", "bạo lực", "nguồn gốc căng thẳng"]):
-        return KNOWLEDGE_BASE["VAN_DE_TAM_LY_PHO_BIEN"]
-    
-    if any(keyword in message_lower for keyword in ["tiểu học", "thcs", "thpt", "sinh viên", "định hướng nghề nghiệp"]):
-        return KNOWLEDGE_BASE["KNS_LUA_TUOI"]
-        
-    if any(keyword in message_lower for keyword in ["kỹ năng sống", "kns", "phân loại", "tự nhận thức", "kiểm soát cảm xúc"]):
-        return KNOWLEDGE_BASE["KNS_PHAN_LOAI"]
-        
-    return ""
+    """Truy xuất các đoạn KNOWLEDGE_BASE liên quan nhất (BM25, top-k)."""
+    return retrieve_context(user_message)
 
 
 # ============================================
@@ -272,112 +289,218 @@ Phản hồi nên ngắn gọn (dưới 5 câu), tập trung vào việc kêu g
 Giọng điệu: Nghiêm túc nhưng đầy sự quan tâm, không gây hoảng loạn.
 """
 
+# Render sẵn system prompt (base / crisis); biến thể có context được cache LRU
+PROMPT_BUILDER = PromptBuilder(SYSTEM_PROMPT, CRISIS_PROMPT)
+
 
 # ============================================
-# 4. GROQ CLIENT CLASS
+# 4. SHARED GROQ HTTP CLIENT
 # ============================================
 
-class GroqAI:
-    """Groq AI client for mental health chat"""
+_groq_client: Optional[httpx.AsyncClient] = None
+
+
+def build_groq_client() -> httpx.AsyncClient:
+    """
+    Build a pooled AsyncClient for api.groq.com
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or GROQ_API_KEY
-        if not self.api_key:
-            logger.error("GROQ_API_KEY not set!")
-            raise ValueError("GROQ_API_KEY environment variable required")
-        
-        self.client = httpx.AsyncClient(
-            base_url=GROQ_API_BASE,
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            },
-            timeout=30.0
+    Keep-alive connections are reused across chat turns, so only the first
+    request of a connection pays the TCP + TLS handshake. HTTP/2 is used
+    when the `h2` package is installed (httpx[http2]).
+    """
+    http2 = GROQ_HTTP2 and importlib.util.find_spec("h2") is not None
+    if GROQ_HTTP2 and not http2:
+        logger.warning("⚠️  GROQ_HTTP2 enabled but 'h2' is not installed - using HTTP/1.1")
+    
+    return httpx.AsyncClient(
+        base_url=GROQ_API_BASE,
+        headers={"Content-Type": "application/json"},
+        timeout=GROQ_TIMEOUT,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=GROQ_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+async def open_groq_client() -> httpx.AsyncClient:
+    """Open the app-lifetime Groq client (called from FastAPI lifespan)"""
+    global _groq_client
+    if _groq_client is None or _groq_client.is_closed:
+        _groq_client = build_groq_client()
+        logger.info(
+            f"✅ Groq HTTP pool opened (max_connections={GROQ_MAX_CONNECTIONS}, "
+            f"keepalive={GROQ_MAX_KEEPALIVE_CONNECTIONS})"
         )
+    return _groq_client
+
+
+async def close_groq_client():
+    """Close the app-lifetime Groq client (called from FastAPI lifespan)"""
+    global _groq_client
+    if _groq_client is not None:
+        await _groq_client.aclose()
+        _groq_client = None
+        logger.info("✅ Groq HTTP pool closed")
+
+
+def get_groq_client() -> Optional[httpx.AsyncClient]:
+    """Return the shared Groq client, or None outside the app lifespan"""
+    if _groq_client is None or _groq_client.is_closed:
+        return None
+    return _groq_client
+
+
+# ============================================
+# 5. LLM ROUTER (process-wide)
+# ============================================
+
+_llm_router: Optional[LLMRouter] = None
+
+
+def build_groq_backend(api_key: str, client: Optional[httpx.AsyncClient] = None) -> HTTPChatBackend:
+    """Groq over the shared keep-alive pool (or a fixed client)"""
+    return HTTPChatBackend(
+        name="groq",
+        model=GROQ_MODEL,
+        api_key=api_key,
+        shared_client=(lambda: client) if client is not None else get_groq_client,
+        build_client=build_groq_client,
+        timeout=GROQ_TIMEOUT
+    )
+
+
+def build_llm_router() -> LLMRouter:
+    """Router over the LLM_BACKENDS that are configured (missing keys are skipped)"""
+    backends = []
+    for name in LLM_BACKENDS:
+        if name == "groq":
+            if not GROQ_API_KEY:
+                logger.error("GROQ_API_KEY not set - groq backend disabled")
+                continue
+            backends.append(build_groq_backend(GROQ_API_KEY))
+        elif name == "openai":
+            if not OPENAI_API_KEY:
+                logger.error("OPENAI_API_KEY not set - openai backend disabled")
+                continue
+            try:
+                backends.append(OpenAIBackend("openai", OPENAI_MODEL, OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_TIMEOUT))
+            except RuntimeError as e:
+                logger.error(f"openai backend disabled: {e}")
+        elif name == "stub":
+            backends.append(StubBackend(delay=LLM_STUB_DELAY))
+        else:
+            logger.warning(f"⚠️  Unknown LLM backend {name!r} in LLM_BACKENDS - ignored")
+    
+    if not backends:
+        logger.error("No LLM backend configured - every reply will be the fallback message")
+    else:
+        logger.info(f"✅ LLM router: {', '.join(f'{b.name}({b.model})' for b in backends)}")
+    return LLMRouter(backends)
+
+
+def get_llm_router() -> LLMRouter:
+    """Process-wide router (breaker and latency state are shared by all turns)"""
+    global _llm_router
+    if _llm_router is None:
+        _llm_router = build_llm_router()
+    return _llm_router
+
+
+async def close_llm_router():
+    """Close backend clients (called from FastAPI lifespan)"""
+    global _llm_router
+    if _llm_router is not None:
+        await _llm_router.aclose()
+        _llm_router = None
+
+
+# ============================================
+# 6. GROQ CLIENT CLASS
+# ============================================
+
+class GroqAI:
+    """
+    Mental health chat client
+    
+    Kept under its historical name: requests go through the LLM router
+    (Groq first by default, then the other LLM_BACKENDS).
+    """
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        router: Optional[LLMRouter] = None
+    ):
+        """
+        Args:
+            api_key: Groq API key; with api_key or client, a private
+                Groq-only router is used instead of the shared one
+            client: HTTP client for that private Groq backend
+            router: Router to use (default: the process-wide router)
+        """
+        self._owns_router = router is None and (api_key is not None or client is not None)
+        if self._owns_router:
+            if not (api_key or GROQ_API_KEY):
+                logger.error("GROQ_API_KEY not set!")
+                raise ValueError("GROQ_API_KEY environment variable required")
+            router = LLMRouter([build_groq_backend(api_key or GROQ_API_KEY, client)])
+        self.router = router or get_llm_router()
     
     async def generate_response(
         self,
         user_message: str,
         conversation_history: Optional[List[Dict]] = None,
-        is_crisis: bool = False
+        is_crisis: bool = False,
+        moderation: Optional[ModerationResult] = None
     ) -> Dict:
-        """Generate AI response using Groq API"""
+        """Generate AI response (first healthy backend; crisis turns: fastest one)"""
         
         # Lớp 1: KIỂM TRA VI PHẠM (Content Moderation)
-        violation_type = check_content_violation(user_message)
+        violation_type = check_content_violation(user_message, moderation)
         if violation_type:
             return {
                 "success": False,
-                "response": (
-                    f"⚠️ **Cảnh báo Vi phạm Nội dung:** Mình là Banana, trợ lý tâm lý học đường. "
-                    f"Tin nhắn của bạn chứa ngôn ngữ không phù hợp ({violation_type}). "
-                    f"Để đảm bảo môi trường an toàn và lành mạnh, mình xin phép không tiếp tục xử lý nội dung này. "
-                    f"Nếu bạn cần chia sẻ về vấn đề tâm lý học đường, mình luôn sẵn lòng lắng nghe."
-                ),
+                "response": self._get_violation_response(violation_type),
                 "error": f"Content violation detected: {violation_type}",
                 "is_crisis": False
             }
             
         try:
-            # 1. TRUY XUẤT DỮ LIỆU RAG DỰA TRÊN QUY TẮC
-            retrieved_context = rule_based_retrieve_context(user_message)
+            messages = self._build_messages(user_message, conversation_history, is_crisis)
             
-            # 2. CHÈN DỮ LIỆU VÀO SYSTEM PROMPT
-            final_system_prompt = SYSTEM_PROMPT
+            options = self._build_options(is_crisis)
             
-            if is_crisis:
-                final_system_prompt = CRISIS_PROMPT
-            elif retrieved_context:
-                final_system_prompt += (
-                    "\n\n[CONTEXT TỪ DỮ LIỆU CƠ SỞ]\n"
-                    "BẠN PHẢI SỬ DỤNG THÔNG TIN SAU ĐÂY ĐỂ TRẢ LỜI: \n"
-                    f"{retrieved_context}\n"
-                    "[KẾT THÚC CONTEXT]"
+            # 4. Call the first backend that answers (failover / hedging in the router).
+            # Lượt đầu không có lịch sử và không khủng hoảng: dùng chung câu trả lời đã cache
+            if is_cacheable_turn(user_message, conversation_history, is_crisis, moderation):
+                result = await cached_completion(
+                    response_cache_key(messages[0]["content"], user_message),
+                    lambda: self._complete(messages, options, is_crisis)
                 )
-
-            # 3. Chuẩn bị messages
-            messages = [
-                {"role": "system", "content": final_system_prompt}
-            ]
-            
-            if conversation_history:
-                history_limit = 1 if is_crisis else 10
-                messages.extend(conversation_history[-history_limit:]) 
-            
-            messages.append({"role": "user", "content": user_message})
-            
-            # 4. Call Groq API
-            response = await self.client.post(
-                "/chat/completions",
-                json={
-                    "model": GROQ_MODEL,
-                    "messages": messages,
-                    "temperature": 0.7 if not is_crisis else 0.1,
-                    "max_tokens": 500,
-                    "top_p": 0.9,
-                    "stream": False
-                }
-            )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            ai_message = data["choices"][0]["message"]["content"]
+            else:
+                record_bypass()
+                result = await self._complete(messages, options, is_crisis)
             
             return {
                 "success": True,
-                "response": ai_message,
-                "model": GROQ_MODEL,
-                "tokens_used": data.get("usage", {}).get("total_tokens", 0),
-                "is_crisis": is_crisis
+                "response": result["text"],
+                "model": result["model"],
+                "tokens_used": 0 if result.get("cached") else result["tokens_used"],
+                "is_crisis": is_crisis,
+                "cached": result.get("cached", False),
+                "queue_wait_ms": result.get("queue_wait_ms", 0)
             }
             
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Groq API error: {e.response.status_code} - {e.response.text}")
+        except LLMUnavailableError as e:
+            logger.error(f"All LLM backends failed: {e}")
             return {
                 "success": False,
                 "response": self._get_fallback_response(is_crisis),
-                "error": f"API error: {e.response.status_code}",
+                "error": f"LLM unavailable: {e}",
                 "is_crisis": is_crisis
             }
         
@@ -390,6 +513,134 @@ class GroqAI:
                 "is_crisis": is_crisis
             }
     
+    async def stream_response(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict]] = None,
+        is_crisis: bool = False,
+        moderation: Optional[ModerationResult] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream AI response tokens as they arrive (router fails over before the first token)
+        
+        Yields:
+            {"type": "delta", "content": str} for each token chunk, then one
+            {"type": "done", ...} with the same keys as generate_response()
+            ("response" holds the full assembled reply)
+        """
+        violation_type = check_content_violation(user_message, moderation)
+        if violation_type:
+            text = self._get_violation_response(violation_type)
+            yield {"type": "delta", "content": text}
+            yield {
+                "type": "done",
+                "success": False,
+                "response": text,
+                "error": f"Content violation detected: {violation_type}",
+                "is_crisis": False
+            }
+            return
+        
+        parts: List[str] = []
+        tokens_used = 0
+        model = None
+        try:
+            messages = self._build_messages(user_message, conversation_history, is_crisis)
+            options = self._build_options(is_crisis)
+            
+            # Giữ slot suốt thời gian stream (giới hạn số lượt gọi đồng thời)
+            async with llm_admission(is_crisis, self._estimate_tokens(messages, options)) as ticket:
+                async for event in self.router.stream(messages, options, fastest=is_crisis):
+                    if event["type"] == "delta":
+                        parts.append(event["content"])
+                        yield {"type": "delta", "content": event["content"]}
+                    else:
+                        tokens_used = event["tokens_used"]
+                        model = event["model"]
+                ticket.settle(tokens_used)
+            
+            yield {
+                "type": "done",
+                "success": True,
+                "response": "".join(parts),
+                "model": model,
+                "tokens_used": tokens_used,
+                "is_crisis": is_crisis,
+                "queue_wait_ms": ticket.wait_ms
+            }
+        
+        except Exception as e:
+            if isinstance(e, LLMUnavailableError):
+                logger.error(f"All LLM backends failed: {e}")
+                error = f"LLM unavailable: {e}"
+            else:
+                logger.error(f"Unexpected streaming error: {e}")
+                error = str(e)
+            
+            # Chưa stream được gì thì gửi câu trả lời dự phòng
+            if not parts:
+                fallback = self._get_fallback_response(is_crisis)
+                parts.append(fallback)
+                yield {"type": "delta", "content": fallback}
+            
+            yield {
+                "type": "done",
+                "success": False,
+                "response": "".join(parts),
+                "error": error,
+                "is_crisis": is_crisis
+            }
+    
+    def _build_messages(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict]],
+        is_crisis: bool
+    ) -> List[Dict]:
+        """Build the chat messages (system prompt + RAG context + history)"""
+        # 1. TRUY XUẤT DỮ LIỆU RAG DỰA TRÊN QUY TẮC
+        retrieved_context = None if is_crisis else rule_based_retrieve_context(user_message)
+        
+        # 2. System prompt dựng sẵn + history cắt theo ngân sách token
+        return PROMPT_BUILDER.build(
+            user_message,
+            conversation_history,
+            context=retrieved_context,
+            is_crisis=is_crisis,
+            history_limit=1 if is_crisis else 10
+        )
+    
+    async def _complete(self, messages: List[Dict], options: Dict, is_crisis: bool) -> Dict:
+        """One admitted router call (crisis turns jump the admission queue)"""
+        async with llm_admission(is_crisis, self._estimate_tokens(messages, options)) as ticket:
+            result = await self.router.complete(
+                messages, options, fastest=is_crisis, on_hedge=ticket.charge_hedge
+            )
+            ticket.settle(result["tokens_used"])
+        return {**result, "queue_wait_ms": ticket.wait_ms}
+    
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict], options: Dict) -> int:
+        """Prompt estimate + max completion (charged to the TPM bucket, refunded after)"""
+        return sum(message_tokens(message) for message in messages) + options["max_tokens"]
+    
+    def _build_options(self, is_crisis: bool) -> Dict:
+        """Sampling options of the /chat/completions request (model set per backend)"""
+        return {
+            "temperature": 0.7 if not is_crisis else 0.1,
+            "max_tokens": 500,
+            "top_p": 0.9
+        }
+    
+    def _get_violation_response(self, violation_type: str) -> str:
+        """Response shown instead of calling the model on a content violation"""
+        return (
+            f"⚠️ **Cảnh báo Vi phạm Nội dung:** Mình là Banana, trợ lý tâm lý học đường. "
+            f"Tin nhắn của bạn chứa ngôn ngữ không phù hợp ({violation_type}). "
+            f"Để đảm bảo môi trường an toàn và lành mạnh, mình xin phép không tiếp tục xử lý nội dung này. "
+            f"Nếu bạn cần chia sẻ về vấn đề tâm lý học đường, mình luôn sẵn lòng lắng nghe."
+        )
+    
     def _get_fallback_response(self, is_crisis: bool) -> str:
         """Fallback response when AI fails"""
         if is_crisis:
@@ -408,8 +659,9 @@ class GroqAI:
             )
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """Close a private router (the shared router and app client are left open)"""
+        if self._owns_router:
+            await self.router.aclose()
 
 
 # Helper function for easy use
@@ -423,15 +675,19 @@ async def generate_ai_response(
     Returns:
         Dict với các key: success, response, is_crisis, error (optional)
     """
+    # Một lần quét cho cả Lớp 1 (vi phạm) và Lớp 2 (khủng hoảng)
+    moderation = moderate_message(user_message)
+    
     # Lớp 2: Kiểm tra Khủng hoảng (Được thực hiện trước cả API call)
-    crisis_status = check_for_crisis(user_message)
+    crisis_status = check_for_crisis(user_message, moderation)
     
     ai = GroqAI()
     try:
         result = await ai.generate_response(
             user_message=user_message,
             conversation_history=conversation_history,
-            is_crisis=crisis_status 
+            is_crisis=crisis_status,
+            moderation=moderation
         )
         
         if result["success"]:
@@ -0,0 +1,226 @@
+# ============================================
+# BACKGROUND TASK QUEUE (post-response work)
+# File: backend/app/utils/background.py
+# ============================================
+
+import os
+import abc
+import time
+import asyncio
+import logging
+import importlib
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.executor import run_in_worker
+from app.utils.metrics import BACKGROUND_QUEUE_DEPTH, BACKGROUND_TASKS, BACKGROUND_TASK_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+BACKGROUND_QUEUE_SIZE = int(os.getenv("BACKGROUND_QUEUE_SIZE", "1000"))
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "2"))
+# Thời gian tối đa chờ xử lý hết hàng đợi khi tắt ứng dụng (giây)
+BACKGROUND_DRAIN_TIMEOUT = float(os.getenv("BACKGROUND_DRAIN_TIMEOUT", "10"))
+
+
+# ============================================
+# TASK REGISTRY
+# ============================================
+# Task được gửi theo TÊN + tham số JSON được, không phải closure: một backend
+# khác (ví dụ Redis Streams) chỉ cần serialize (name, kwargs) và worker bên
+# kia tra cùng registry.
+
+_TASKS: Dict[str, Dict] = {}
+
+# Module đăng ký task khi được import (nạp lúc start queue, không phụ thuộc
+# vào việc endpoint nào đã import chúng)
+TASK_MODULES = ("app.utils.monitoring",)
+
+
+def register_task(name: str, func: Callable, blocking: bool = False):
+    """
+    Register a callable under a task name
+
+    Args:
+        name: Task name used by enqueue()
+        func: Coroutine function or plain function
+        blocking: Plain function that blocks (DB, crypto): run on the worker pool
+    """
+    _TASKS[name] = {'func': func, 'blocking': blocking}
+
+
+def background_task(name: str, blocking: bool = False):
+    """Decorator form of register_task()"""
+    def decorator(func: Callable) -> Callable:
+        register_task(name, func, blocking)
+        return func
+    return decorator
+
+
+def load_task_modules():
+    """Import TASK_MODULES so their tasks are registered"""
+    for module in TASK_MODULES:
+        importlib.import_module(module)
+
+
+async def run_task(name: str, kwargs: Dict[str, Any]):
+    """Execute one registered task (used by every backend)"""
+    spec = _TASKS[name]
+    func = spec['func']
+    if asyncio.iscoroutinefunction(func):
+        await func(**kwargs)
+    elif spec['blocking']:
+        await run_in_worker(func, kind="thread", task=name, **kwargs)
+    else:
+        func(**kwargs)
+
+
+# ============================================
+# QUEUE BACKENDS
+# ============================================
+
+class TaskQueue(abc.ABC):
+    """
+    Interface of a background queue backend
+
+    enqueue() never blocks or raises on the request path: when the queue
+    is full, or the task name is unknown, the task is dropped (and
+    counted), since only non-critical work goes here.
+    """
+
+    @abc.abstractmethod
+    def enqueue(self, name: str, **kwargs: Any) -> bool:
+        ...
+
+    @abc.abstractmethod
+    async def start(self):
+        ...
+
+    @abc.abstractmethod
+    async def stop(self, timeout: float = BACKGROUND_DRAIN_TIMEOUT):
+        ...
+
+
+class InProcessTaskQueue(TaskQueue):
+    """Bounded asyncio.Queue consumed by a few worker coroutines"""
+
+    def __init__(self, maxsize: int = BACKGROUND_QUEUE_SIZE, workers: int = BACKGROUND_WORKERS):
+        self.maxsize = maxsize
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    def enqueue(self, name: str, **kwargs: Any) -> bool:
+        if name not in _TASKS:
+            BACKGROUND_TASKS.labels(name, "dropped").inc()
+            logger.error(f"❌ Unknown background task {name} - dropped")
+            return False
+
+        if self._queue is None:
+            # Chưa start (script, test): chạy ngay trên loop hiện tại nếu có
+            try:
+                asyncio.get_running_loop().create_task(self._execute(name, kwargs))
+                return True
+            except RuntimeError:
+                BACKGROUND_TASKS.labels(name, "dropped").inc()
+                return False
+
+        try:
+            self._queue.put_nowait((name, kwargs))
+        except asyncio.QueueFull:
+            BACKGROUND_TASKS.labels(name, "dropped").inc()
+            logger.warning(f"⚠️  Background queue full - dropped task {name}")
+            return False
+        BACKGROUND_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    async def _execute(self, name: str, kwargs: Dict[str, Any]):
+        started = time.perf_counter()
+        try:
+            await run_task(name, kwargs)
+            BACKGROUND_TASKS.labels(name, "ok").inc()
+        except Exception as e:
+            BACKGROUND_TASKS.labels(name, "error").inc()
+            logger.error(f"Background task {name} failed: {e}")
+        finally:
+            BACKGROUND_TASK_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+    async def _worker(self):
+        while True:
+            name, kwargs = await self._queue.get()
+            BACKGROUND_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                await self._execute(name, kwargs)
+            finally:
+                self._queue.task_done()
+
+    async def start(self):
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"✅ Background queue started: {self.workers} workers, size={self.maxsize}")
+
+    async def stop(self, timeout: float = BACKGROUND_DRAIN_TIMEOUT):
+        """Drain queued tasks (up to timeout), then stop the workers"""
+        if self._queue is None:
+            return
+        pending = self._queue.qsize()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️  Background queue drain timed out: {self._queue.qsize()} tasks dropped")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        BACKGROUND_QUEUE_DEPTH.set(0)
+        logger.info(f"✅ Background queue stopped ({pending} tasks drained)")
+
+
+# Một hàng đợi cho mỗi worker process
+task_queue: TaskQueue = InProcessTaskQueue()
+
+
+def enqueue(name: str, **kwargs: Any) -> bool:
+    """
+    Schedule non-critical work after the response (analytics, audit logs)
+
+    Returns:
+        False if the task was dropped (queue full, unknown task)
+    """
+    return task_queue.enqueue(name, **kwargs)
+
+
+async def start_background_queue():
+    """Register the tasks and start the queue workers (lifespan startup)"""
+    load_task_modules()
+    await task_queue.start()
+
+
+async def stop_background_queue():
+    """Drain and stop the queue (lifespan shutdown, before the DB engine is disposed)"""
+    await task_queue.stop()
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'register_task',
+    'background_task',
+    'load_task_modules',
+    'run_task',
+    'TaskQueue',
+    'InProcessTaskQueue',
+    'task_queue',
+    'enqueue',
+    'start_background_queue',
+    'stop_background_queue'
+]
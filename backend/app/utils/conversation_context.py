@@ -0,0 +1,247 @@
+# ============================================
+# CONVERSATION CONTEXT WINDOW
+# File: backend/app/utils/conversation_context.py
+# ============================================
+
+import os
+import json
+import base64
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import cache, acache_json, aget_json
+from app.models import ConversationContext, Message as MessageModel
+from app.utils.encryption import decrypt_message, seal, unseal
+from app.utils.sealed_fields import read_fields_many
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Số tin nhắn (user + assistant) giữ lại trong cửa sổ ngữ cảnh
+CONTEXT_WINDOW_MESSAGES = int(os.getenv("CONTEXT_WINDOW_MESSAGES", "10"))
+CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", "1800"))  # 30 minutes
+CONTEXT_RETENTION_DAYS = 30
+# encryption_iv của blob dạng envelope AES-GCM (base64 trong context_data_encrypted);
+# các giá trị khác là IV của blob AES-CBC cũ (khóa 0)
+SEALED_IV = "sealed"
+
+
+def _cache_key(session_id: UUID) -> str:
+    """Redis key for a session's (still encrypted) context blob"""
+    return f"context:{session_id}"
+
+
+# ============================================
+# CONTEXT WINDOW
+# ============================================
+
+class ContextWindow:
+    """
+    Decrypted rolling window of the last turns of one session
+
+    Attributes:
+        history: [{'role', 'content'}] oldest first
+        message_count: Total messages appended so far (version of the blob)
+    """
+
+    def __init__(self, session_id: UUID, history: List[Dict], message_count: int = 0):
+        self.session_id = session_id
+        self.history = history
+        self.message_count = message_count
+
+
+def _encrypt_blob(history: List[Dict]) -> tuple:
+    """Seal a window with the active key → (context_data_encrypted, encryption_iv)"""
+    envelope = seal(json.dumps(history, ensure_ascii=False))
+    return base64.b64encode(envelope).decode('ascii'), SEALED_IV
+
+
+def _decrypt_blob(data: str, iv: str) -> Optional[List[Dict]]:
+    """
+    Decrypt one stored context blob (envelope, or legacy AES-CBC)
+
+    Returns:
+        The window, or None if it cannot be decrypted (e.g. sealed with a
+        retired key): callers rebuild it from the messages
+    """
+    if not data:
+        return []
+    try:
+        if iv == SEALED_IV:
+            return json.loads(unseal(base64.b64decode(data)))
+        return json.loads(decrypt_message(data, iv))
+    except Exception as e:
+        logger.error(f"Context decryption failed: {e}")
+        return None
+
+
+async def _cache_blob(context: ConversationContext):
+    """Cache the encrypted blob; plaintext never leaves the process"""
+    await acache_json(_cache_key(context.session_id), {
+        "data": context.context_data_encrypted,
+        "iv": context.encryption_iv,
+        "count": context.message_count
+    }, CONTEXT_CACHE_TTL)
+
+
+async def _rebuild_from_messages(db: AsyncSession, session_id: UUID) -> List[Dict]:
+    """Fallback for sessions created before context windows existed"""
+    result = await db.execute(
+        select(MessageModel)
+        .where(MessageModel.session_id == session_id)
+        .order_by(MessageModel.created_at.desc())
+        .limit(CONTEXT_WINDOW_MESSAGES)
+    )
+    messages = list(reversed(result.scalars().all()))
+    history = []
+    for msg, fields in zip(messages, read_fields_many(messages)):
+        if fields['content'] is None:
+            logger.error(f"Decryption failed for message {msg.id}")
+            continue
+        history.append({"role": msg.role, "content": fields['content']})
+    return history
+
+
+async def load_context(db: AsyncSession, session_id: UUID) -> ContextWindow:
+    """
+    Load the conversation window of a session
+
+    Redis (encrypted blob) → conversation_context row → last N messages.
+    Usually one cache hit (or one row fetch) and a single decrypt. A blob
+    that no longer decrypts is rebuilt from the messages, so contexts
+    never pin an encryption key: the next turn re-seals them.
+
+    Args:
+        db: Async database session
+        session_id: Session UUID
+
+    Returns:
+        ContextWindow (history excludes the message being processed)
+    """
+    cached = await aget_json(_cache_key(session_id))
+    if cached:
+        history = _decrypt_blob(cached["data"], cached["iv"])
+        if history is not None:
+            return ContextWindow(session_id, history, cached["count"])
+
+    result = await db.execute(
+        select(ConversationContext).where(ConversationContext.session_id == session_id)
+    )
+    context = result.scalars().first()
+    if context:
+        history = _decrypt_blob(context.context_data_encrypted, context.encryption_iv)
+        if history is not None:
+            await _cache_blob(context)
+            return ContextWindow(session_id, history, context.message_count or 0)
+
+    history = await _rebuild_from_messages(db, session_id)
+    return ContextWindow(session_id, history, (context.message_count or 0) if context else 0)
+
+
+async def append_context(
+    db: AsyncSession,
+    window: ContextWindow,
+    entries: List[Dict]
+) -> ConversationContext:
+    """
+    Append new messages to the window, trim and store it encrypted
+
+    Runs in the caller's transaction (the same one that stores the
+    messages). The row is created if missing (INSERT ... ON CONFLICT DO
+    NOTHING, so concurrent first turns do not collide on session_id) and
+    locked; if another turn updated it since `window` was loaded, the
+    fresh blob is used as the base instead. Call cache_context() after
+    commit.
+
+    Args:
+        db: Async database session
+        window: Window returned by load_context()
+        entries: [{'role', 'content'}] to append, oldest first
+
+    Returns:
+        The (pending) ConversationContext row
+    """
+    expires_at = datetime.utcnow() + timedelta(days=CONTEXT_RETENTION_DAYS)
+    await db.execute(
+        pg_insert(ConversationContext)
+        .values(
+            session_id=window.session_id,
+            context_data_encrypted="",
+            encryption_iv="",
+            message_count=0,
+            expires_at=expires_at
+        )
+        .on_conflict_do_nothing(index_elements=[ConversationContext.session_id])
+    )
+    result = await db.execute(
+        select(ConversationContext)
+        .where(ConversationContext.session_id == window.session_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    context = result.scalars().one()
+
+    history = window.history
+    # Dòng rỗng: vừa được tạo bởi INSERT ở trên, nền là window đã load
+    if context.context_data_encrypted and (context.message_count or 0) != window.message_count:
+        history = _decrypt_blob(context.context_data_encrypted, context.encryption_iv)
+        if history is None:
+            history = window.history
+
+    history = (history + entries)[-CONTEXT_WINDOW_MESSAGES:]
+    data, iv = _encrypt_blob(history)
+
+    context.context_data_encrypted = data
+    context.encryption_iv = iv
+    context.message_count = (context.message_count or 0) + len(entries)
+    context.expires_at = expires_at
+
+    window.history = history
+    window.message_count = context.message_count
+    return context
+
+
+async def cache_context(context: ConversationContext):
+    """Publish a committed context row to Redis"""
+    await _cache_blob(context)
+
+
+async def reset_context(db: AsyncSession, session_id: UUID):
+    """
+    Drop the stored window (e.g. after messages are deleted)
+
+    The next turn rebuilds it from the remaining messages.
+    Call invalidate_context() after commit.
+    """
+    await db.execute(
+        delete(ConversationContext).where(ConversationContext.session_id == session_id)
+    )
+
+
+async def invalidate_context(session_id: UUID):
+    """Remove the cached blob of a session"""
+    await cache.adelete(_cache_key(session_id))
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'CONTEXT_WINDOW_MESSAGES',
+    'ContextWindow',
+    'load_context',
+    'append_context',
+    'cache_context',
+    'reset_context',
+    'invalidate_context'
+]
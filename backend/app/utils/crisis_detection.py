@@ -3,15 +3,239 @@
 # File: backend/app/utils/crisis_detection.py
 # ============================================
 
+import os
+import time
 import logging
 import re
+import threading
 from typing import Dict, List, Tuple, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.models import BlockedKeyword
+from app.cache import cache
+from app.utils.moderation import normalize_text, ModerationResult
+from app.utils.emergency_responses import CRISIS_CATEGORIES, get_emergency_payload
 
 logger = logging.getLogger(__name__)
 
+# Hot reload: Redis pub/sub đẩy thông báo ngay khi admin đổi từ khóa,
+# còn version check (count + max(updated_at)) chỉ chạy tối đa mỗi N giây
+KEYWORDS_CHANNEL = os.getenv("CRISIS_KEYWORDS_CHANNEL", "crisis:keywords:changed")
+KEYWORDS_VERSION_CHECK_INTERVAL = int(os.getenv("CRISIS_KEYWORDS_CHECK_INTERVAL", "60"))
+
+
+# ============================================
+# COMPILED KEYWORD MATCHER (PROCESS-WIDE)
+# ============================================
+
+class KeywordMatcher:
+    """
+    Compiled matcher for all active crisis keywords.
+    
+    Every keyword is folded into ONE lookahead alternation
+    (?=(longest|...|shortest)), so a single regex pass reports every
+    position where some keyword starts. Keywords that are a prefix of a
+    longer match at the same position are resolved through `_prefixes`,
+    giving the same hits as running re.search once per keyword.
+    
+    Instances are immutable: a keyword change builds a new matcher and
+    swaps the module-level reference.
+    """
+    
+    def __init__(self, keywords: List[Dict], version: Optional[str]):
+        self.version = version
+        self._entries: Dict[str, List[Dict]] = {}
+        
+        for kw in keywords:
+            if kw['category'] not in CRISIS_CATEGORIES:
+                continue
+            # Chuẩn hóa keyword giống hệt tin nhắn (chữ thường, 1 khoảng trắng)
+            term = normalize_text(kw['keyword'])
+            if not term:
+                continue
+            self._entries.setdefault(term, []).append({
+                'keyword': kw['keyword'].lower(),
+                'category': kw['category'],
+                'severity': kw['severity'] or 'high'
+            })
+        
+        terms = sorted(self._entries, key=len, reverse=True)
+        self._prefixes: Dict[str, List[str]] = {
+            term: [other for other in terms if other != term and term.startswith(other)]
+            for term in terms
+        }
+        self._pattern = None
+        if terms:
+            alternation = '|'.join(re.escape(term) for term in terms)
+            self._pattern = re.compile(f'(?=({alternation}))', re.I | re.U)
+    
+    @classmethod
+    def from_rows(cls, rows: List[BlockedKeyword], version: Optional[str]) -> 'KeywordMatcher':
+        """Build a matcher from BlockedKeyword rows"""
+        return cls(
+            [
+                {'keyword': row.keyword, 'category': row.category, 'severity': row.severity}
+                for row in rows
+            ],
+            version
+        )
+    
+    @property
+    def keyword_count(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+    
+    def category_counts(self) -> Dict[str, int]:
+        counts = {category: 0 for category in CRISIS_CATEGORIES}
+        for entries in self._entries.values():
+            for entry in entries:
+                counts[entry['category']] += 1
+        return counts
+    
+    def scan(self, normalized_message: str) -> List[Dict]:
+        """
+        Find every keyword contained in an already-normalized message
+        
+        Returns:
+            List of unique hits: {'keyword', 'category', 'severity'}
+        """
+        if self._pattern is None or not normalized_message:
+            return []
+        
+        hits = {}
+        for match in self._pattern.finditer(normalized_message):
+            term = match.group(1).lower()
+            for matched_term in (term, *self._prefixes.get(term, ())):
+                for entry in self._entries.get(matched_term, ()):
+                    hits[(entry['keyword'], entry['category'])] = entry
+        return list(hits.values())
+
+
+_matcher: Optional[KeywordMatcher] = None
+_matcher_lock = threading.Lock()
+_matcher_stale = threading.Event()
+_last_version_check = 0.0
+_listener = None
+
+
+def get_keywords_version(db: Session) -> str:
+    """
+    Cheap version stamp of the blocked_keywords table
+    
+    Built from row count + max(updated_at), so inserts, deletes and
+    edits (including is_active toggles) all produce a new stamp.
+    """
+    count, last_updated = db.query(
+        func.count(BlockedKeyword.id),
+        func.max(BlockedKeyword.updated_at)
+    ).one()
+    return f"{count}:{last_updated.isoformat() if last_updated else '-'}"
+
+
+def rebuild_keyword_matcher(db: Session, version: Optional[str] = None) -> KeywordMatcher:
+    """
+    Reload active keywords, compile a new matcher and swap it in atomically
+    
+    Args:
+        db: Database session
+        version: Version stamp already read by the caller (optional)
+        
+    Returns:
+        The matcher now serving the process
+    """
+    global _matcher, _last_version_check
+    
+    with _matcher_lock:
+        version = version or get_keywords_version(db)
+        # Một thread khác có thể đã build xong trong lúc chờ lock
+        if _matcher is not None and _matcher.version == version:
+            return _matcher
+        
+        keywords = db.query(BlockedKeyword).filter(
+            BlockedKeyword.is_active == True
+        ).all()
+        
+        matcher = KeywordMatcher.from_rows(keywords, version)
+        _matcher = matcher
+        _last_version_check = time.monotonic()
+    
+    counts = matcher.category_counts()
+    logger.info(f"✅ Compiled {matcher.keyword_count} crisis keywords (version {version})")
+    logger.info(f"   - Suicide: {counts['suicide']}")
+    logger.info(f"   - Self-harm: {counts['self_harm']}")
+    logger.info(f"   - Violence: {counts['violence']}")
+    logger.info(f"   - Abuse: {counts['abuse']}")
+    return matcher
+
+
+def get_keyword_matcher(db: Session) -> KeywordMatcher:
+    """
+    Return the process-wide matcher without touching the database
+    
+    The version stamp is only re-read when a change notification arrived
+    or CRISIS_KEYWORDS_CHECK_INTERVAL seconds have passed; the matcher is
+    recompiled only if that stamp actually changed.
+    """
+    global _last_version_check
+    
+    current = _matcher
+    now = time.monotonic()
+    if (
+        current is not None
+        and not _matcher_stale.is_set()
+        and now - _last_version_check < KEYWORDS_VERSION_CHECK_INTERVAL
+    ):
+        return current
+    
+    try:
+        _matcher_stale.clear()
+        _last_version_check = now
+        version = get_keywords_version(db)
+        if current is not None and current.version == version:
+            return current
+        return rebuild_keyword_matcher(db, version)
+    except Exception as e:
+        logger.error(f"❌ Failed to load crisis keywords: {e}")
+        # Giữ matcher cũ nếu có, tránh mất khả năng phát hiện khi DB lỗi tạm thời
+        return current if current is not None else KeywordMatcher([], None)
+
+
+def mark_keywords_stale(payload: Optional[str] = None):
+    """Force a version check on the next detection (pub/sub handler)"""
+    _matcher_stale.set()
+    logger.info(f"🔄 Crisis keywords changed, matcher will be revalidated ({payload or 'local'})")
+
+
+def notify_keywords_changed() -> bool:
+    """
+    Tell every worker that blocked_keywords changed
+    
+    Call after committing inserts/updates/deletes of BlockedKeyword rows.
+    Without Redis, other workers pick the change up on their next
+    periodic version check.
+    
+    Returns:
+        True if the notification was published to Redis
+    """
+    mark_keywords_stale()
+    return cache.publish(KEYWORDS_CHANNEL, str(os.getpid()))
+
+
+def start_keyword_listener():
+    """Subscribe this worker to keyword change notifications"""
+    global _listener
+    if _listener is None:
+        _listener = cache.subscribe(KEYWORDS_CHANNEL, mark_keywords_stale)
+    return _listener
+
+
+def stop_keyword_listener():
+    """Stop the pub/sub listener thread (shutdown)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 # ============================================
 # CRISIS DETECTION ENGINE
@@ -20,81 +244,26 @@ logger = logging.getLogger(__name__)
 class CrisisDetector:
     """
     Enhanced Multi-tier crisis detection system
-    Tier 1: Database keyword matching (dynamic)
+    Tier 1: Database keyword matching (dynamic, compiled once per process)
     Tier 2: Pattern detection (regex-based)
     Tier 3: Context analysis (future ML enhancement)
     """
     
     def __init__(self, db: Session):
         self.db = db
-        self._keywords_cache = None
-        self._load_keywords()
-    
-    def _load_keywords(self):
-        """Load crisis keywords from database with improved organization"""
-        try:
-            keywords = self.db.query(BlockedKeyword).filter(
-                BlockedKeyword.is_active == True
-            ).all()
-            
-            # Group by category với structure tốt hơn
-            self._keywords_cache = {
-                'suicide': [],
-                'self_harm': [],
-                'violence': [],
-                'abuse': []
-            }
-            
-            for kw in keywords:
-                category = kw.category
-                if category in self._keywords_cache:
-                    # Tạo regex pattern linh hoạt từ keyword
-                    keyword_normalized = re.escape(kw.keyword.lower())
-                    # Cho phép khoảng trắng linh hoạt giữa các từ
-                    flexible_pattern = keyword_normalized.replace(r'\ ', r'\s+')
-                    
-                    self._keywords_cache[category].append({
-                        'keyword': kw.keyword.lower(),
-                        'severity': kw.severity,
-                        'is_exact_match': kw.is_exact_match,
-                        'is_case_sensitive': kw.is_case_sensitive,
-                        'regex_pattern': flexible_pattern
-                    })
-            
-            total = sum(len(v) for v in self._keywords_cache.values())
-            logger.info(f"✅ Loaded {total} crisis keywords from database")
-            logger.info(f"   - Suicide: {len(self._keywords_cache['suicide'])}")
-            logger.info(f"   - Self-harm: {len(self._keywords_cache['self_harm'])}")
-            logger.info(f"   - Violence: {len(self._keywords_cache['violence'])}")
-            logger.info(f"   - Abuse: {len(self._keywords_cache['abuse'])}")
-        
-        except Exception as e:
-            logger.error(f"❌ Failed to load crisis keywords: {e}")
-            self._keywords_cache = {'suicide': [], 'self_harm': [], 'violence': [], 'abuse': []}
+        self.matcher = get_keyword_matcher(db)
     
     def _normalize_message(self, message: str) -> str:
-        """
-        Chuẩn hóa tin nhắn để tăng độ chính xác phát hiện
-        - Loại bỏ dấu câu
-        - Chuẩn hóa khoảng trắng
-        - Giữ nguyên tiếng Việt có dấu
-        """
-        # Loại bỏ dấu câu nhưng giữ nguyên chữ cái tiếng Việt
-        normalized = re.sub(
-            r'[^\w\sáàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]',
-            ' ',
-            message.lower()
-        )
-        # Chuẩn hóa nhiều khoảng trắng thành 1
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        return normalized
+        """Chuẩn hóa tin nhắn (xem normalize_text)"""
+        return normalize_text(message)
     
-    def detect_crisis(self, message: str) -> Dict:
+    def detect_crisis(self, message: str, moderation: Optional[ModerationResult] = None) -> Dict:
         """
         ENHANCED: Detect if message contains crisis indicators
         
         Args:
             message: User message text
+            moderation: Result of the moderation pass (reuses its normalized text)
             
         Returns:
             Dict with detection results:
@@ -107,42 +276,34 @@ class CrisisDetector:
                 'detection_method': str  # 'database' or 'pattern'
             }
         """
-        if not message or not self._keywords_cache:
+        if not message or not self.matcher.keyword_count:
             return self._no_crisis_result()
         
-        # Chuẩn hóa tin nhắn
-        message_normalized = self._normalize_message(message)
+        # Chuẩn hóa tin nhắn (dùng lại kết quả của moderation nếu có)
+        if moderation is not None:
+            message_normalized = moderation.normalized
+        else:
+            message_normalized = self._normalize_message(message)
         
         detected_categories = []
         matched_keywords = []
         max_severity = 'low'
         detection_method = 'none'
         
-        # Check each category với improved matching
-        for category, keywords in self._keywords_cache.items():
-            for kw_data in keywords:
-                keyword = kw_data['keyword']
-                pattern = kw_data['regex_pattern']
-                
-                try:
-                    # Sử dụng regex pattern đã được tối ưu
-                    if re.search(pattern, message_normalized, re.I | re.U):
-                        matched_keywords.append(keyword)
-                        detected_categories.append(category)
-                        detection_method = 'database'
-                        
-                        # Update severity
-                        if self._compare_severity(kw_data['severity'], max_severity) > 0:
-                            max_severity = kw_data['severity']
-                        
-                        logger.warning(
-                            f"🚨 CRISIS KEYWORD MATCHED: '{keyword}' "
-                            f"(Category: {category}, Severity: {kw_data['severity']})"
-                        )
-                
-                except re.error as e:
-                    logger.error(f"Regex error for keyword '{keyword}': {e}")
-                    continue
+        # Một lần quét duy nhất cho toàn bộ từ khóa
+        for hit in self.matcher.scan(message_normalized):
+            matched_keywords.append(hit['keyword'])
+            detected_categories.append(hit['category'])
+            detection_method = 'database'
+            
+            # Update severity
+            if self._compare_severity(hit['severity'], max_severity) > 0:
+                max_severity = hit['severity']
+            
+            logger.warning(
+                f"🚨 CRISIS KEYWORD MATCHED: '{hit['keyword']}' "
+                f"(Category: {hit['category']}, Severity: {hit['severity']})"
+            )
         
         # Remove duplicates
         detected_categories = list(set(detected_categories))
@@ -213,98 +374,49 @@ class CrisisDetector:
         
         Returns:
             Dict with emergency contact info and tailored instructions
+            (precomputed, see emergency_responses)
         """
-        # Tùy chỉnh message dựa trên category
-        if 'abuse' in categories:
-            priority_message = (
-                "Mình hiểu bạn đang trải qua điều rất khó khăn và đau đớn. "
-                "Điều quan trọng nhất bây giờ là **AN TOÀN** của bạn. "
-                "Bạn không đơn độc và không phải lỗi của bạn."
-            )
-        elif 'suicide' in categories:
-            priority_message = (
-                "Mình biết bạn đang trong giai đoạn rất đau khổ. "
-                "Nhưng cuộc sống của bạn rất quan trọng. "
-                "Có những người sẵn sàng lắng nghe và giúp đỡ bạn ngay bây giờ."
-            )
-        else:
-            priority_message = (
-                "Mình nhận thấy bạn đang gặp tình huống nghiêm trọng. "
-                "An toàn của bạn là ưu tiên hàng đầu. "
-                "Hãy để chúng mình kết nối bạn với sự hỗ trợ chuyên nghiệp."
-            )
-        
-        return {
-            'priority_message': priority_message,
-            'hotlines': [
-                {
-                    'name': 'Tổng đài Bảo vệ trẻ em',
-                    'number': '111',
-                    'available': '24/7',
-                    'free': True,
-                    'priority': 1,
-                    'description': 'Hỗ trợ khẩn cấp cho trẻ em và thanh thiếu niên'
-                },
-                {
-                    'name': 'Cấp cứu Y tế',
-                    'number': '115',
-                    'available': '24/7',
-                    'free': True,
-                    'priority': 1,
-                    'description': 'Trường hợp cần can thiệp y tế ngay lập tức'
-                },
-                {
-                    'name': 'Đường dây nóng Ngày Mai',
-                    'number': '1900 636 976',
-                    'available': '24/7',
-                    'free': False,
-                    'priority': 2,
-                    'description': 'Tư vấn tâm lý từ chuyên gia'
-                }
-            ],
-            'immediate_actions': [
-                '🔴 Gọi ngay 111 (miễn phí 24/7) hoặc 115 nếu cần cấp cứu',
-                '🟡 Nói chuyện với người lớn đáng tin cậy (cha mẹ, thầy cô, người thân)',
-                '🟢 Không ở một mình - tìm đến nơi an toàn',
-                '🔵 Loại bỏ các vật dụng nguy hiểm xung quanh (nếu có thể)'
-            ],
-            'reassurance': 'Bạn đã rất dũng cảm khi chia sẻ. Hãy tin rằng mọi thứ có thể tốt hơn với sự hỗ trợ đúng đắn.'
-        }
+        return get_emergency_payload(categories, severity)
 
 
 # ============================================
 # CONVENIENCE FUNCTIONS
 # ============================================
 
-def detect_crisis_in_message(db: Session, message: str) -> Dict:
+def detect_crisis_in_message(
+    db: Session,
+    message: str,
+    moderation: Optional[ModerationResult] = None
+) -> Dict:
     """
     Convenience function to detect crisis in a message
     
     Args:
         db: Database session
         message: Message text to analyze
+        moderation: Result of the moderation pass (optional)
         
     Returns:
         Crisis detection result dict
     """
     detector = CrisisDetector(db)
-    return detector.detect_crisis(message)
+    return detector.detect_crisis(message, moderation)
 
 
-def get_emergency_info(db: Session, categories: List[str] = None, severity: str = 'high') -> Dict:
+def get_emergency_info(categories: List[str] = None, severity: str = 'high') -> Dict:
     """
     Get emergency response information
     
+    Served from the precomputed payload table: no detector, no database.
+    
     Args:
-        db: Database session
         categories: Crisis categories (optional)
         severity: Crisis severity level
         
     Returns:
-        Emergency information dict
+        Emergency information dict (shared, do not mutate)
     """
-    detector = CrisisDetector(db)
-    return detector.get_emergency_response(categories or [], severity)
+    return get_emergency_payload(categories or [], severity)
 
 
 # ============================================
@@ -387,6 +499,14 @@ def test_crisis_detection(db: Session):
 
 __all__ = [
     'CrisisDetector',
+    'KeywordMatcher',
+    'normalize_text',
+    'get_keywords_version',
+    'get_keyword_matcher',
+    'rebuild_keyword_matcher',
+    'notify_keywords_changed',
+    'start_keyword_listener',
+    'stop_keyword_listener',
     'detect_crisis_in_message',
     'get_emergency_info',
     'test_crisis_detection'
@@ -0,0 +1,297 @@
+# ============================================
+# PRECOMPUTED EMERGENCY RESPONSES
+# File: backend/app/utils/emergency_responses.py
+# ============================================
+
+import os
+import json
+import logging
+import threading
+from itertools import combinations
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# ContentItem.type của các bản ghi ghi đè nội dung khẩn cấp
+EMERGENCY_CONTENT_TYPE = os.getenv("EMERGENCY_CONTENT_TYPE", "emergency")
+EMERGENCY_CHANNEL = os.getenv("EMERGENCY_CHANNEL", "emergency:changed")
+
+CRISIS_CATEGORIES = ('suicide', 'self_harm', 'violence', 'abuse')
+SEVERITIES = ('none', 'low', 'medium', 'high', 'critical')
+
+
+# ============================================
+# DEFAULT CONTENT
+# ============================================
+# Ưu tiên lời nhắn: abuse > suicide > mặc định (giống get_emergency_response cũ)
+
+PRIORITY_MESSAGES = {
+    'abuse': (
+        "Mình hiểu bạn đang trải qua điều rất khó khăn và đau đớn. "
+        "Điều quan trọng nhất bây giờ là **AN TOÀN** của bạn. "
+        "Bạn không đơn độc và không phải lỗi của bạn."
+    ),
+    'suicide': (
+        "Mình biết bạn đang trong giai đoạn rất đau khổ. "
+        "Nhưng cuộc sống của bạn rất quan trọng. "
+        "Có những người sẵn sàng lắng nghe và giúp đỡ bạn ngay bây giờ."
+    ),
+    'default': (
+        "Mình nhận thấy bạn đang gặp tình huống nghiêm trọng. "
+        "An toàn của bạn là ưu tiên hàng đầu. "
+        "Hãy để chúng mình kết nối bạn với sự hỗ trợ chuyên nghiệp."
+    )
+}
+
+HOTLINES = [
+    {
+        'name': 'Tổng đài Bảo vệ trẻ em',
+        'number': '111',
+        'available': '24/7',
+        'free': True,
+        'priority': 1,
+        'description': 'Hỗ trợ khẩn cấp cho trẻ em và thanh thiếu niên'
+    },
+    {
+        'name': 'Cấp cứu Y tế',
+        'number': '115',
+        'available': '24/7',
+        'free': True,
+        'priority': 1,
+        'description': 'Trường hợp cần can thiệp y tế ngay lập tức'
+    },
+    {
+        'name': 'Đường dây nóng Ngày Mai',
+        'number': '1900 636 976',
+        'available': '24/7',
+        'free': False,
+        'priority': 2,
+        'description': 'Tư vấn tâm lý từ chuyên gia'
+    }
+]
+
+IMMEDIATE_ACTIONS = [
+    '🔴 Gọi ngay 111 (miễn phí 24/7) hoặc 115 nếu cần cấp cứu',
+    '🟡 Nói chuyện với người lớn đáng tin cậy (cha mẹ, thầy cô, người thân)',
+    '🟢 Không ở một mình - tìm đến nơi an toàn',
+    '🔵 Loại bỏ các vật dụng nguy hiểm xung quanh (nếu có thể)'
+]
+
+REASSURANCE = 'Bạn đã rất dũng cảm khi chia sẻ. Hãy tin rằng mọi thứ có thể tốt hơn với sự hỗ trợ đúng đắn.'
+
+
+def _message_key(categories: Iterable[str]) -> str:
+    """Which priority message a category combination gets"""
+    categories = set(categories)
+    if 'abuse' in categories:
+        return 'abuse'
+    if 'suicide' in categories:
+        return 'suicide'
+    return 'default'
+
+
+# ============================================
+# PAYLOAD TABLE
+# ============================================
+
+class EmergencyPayloads:
+    """
+    Emergency payload for every (category combination, severity)
+
+    Built once from the default content plus ContentItem overrides; a
+    lookup is a dict access and never touches the database. Each entry is
+    kept both as a dict and as its JSON text, so SSE events can splice it
+    in without serializing again. Payloads are shared: do not mutate them.
+    """
+
+    def __init__(self, content: Dict):
+        self.version = content.get('version')
+        variants = {}
+        for key, message in content['priority_messages'].items():
+            payload = {
+                'priority_message': message,
+                'hotlines': content['hotlines'],
+                'immediate_actions': content['immediate_actions'],
+                'reassurance': content['reassurance']
+            }
+            variants[key] = (payload, json.dumps(payload, ensure_ascii=False))
+
+        self._table: Dict[Tuple[FrozenSet[str], str], Tuple[Dict, str]] = {}
+        for size in range(len(CRISIS_CATEGORIES) + 1):
+            for combo in combinations(CRISIS_CATEGORIES, size):
+                entry = variants[_message_key(combo)]
+                for severity in SEVERITIES:
+                    self._table[(frozenset(combo), severity)] = entry
+        self._fallback = variants['default']
+
+    def _entry(self, categories: Optional[Iterable[str]], severity: str) -> Tuple[Dict, str]:
+        known = frozenset(c for c in (categories or ()) if c in CRISIS_CATEGORIES)
+        entry = self._table.get((known, severity))
+        if entry is None:
+            # Severity lạ: nội dung chỉ phụ thuộc category
+            entry = self._table.get((known, 'high'), self._fallback)
+        return entry
+
+    def get(self, categories: Optional[Iterable[str]] = None, severity: str = 'high') -> Dict:
+        return self._entry(categories, severity)[0]
+
+    def get_json(self, categories: Optional[Iterable[str]] = None, severity: str = 'high') -> str:
+        return self._entry(categories, severity)[1]
+
+
+def _default_content() -> Dict:
+    return {
+        'version': 'default',
+        'priority_messages': dict(PRIORITY_MESSAGES),
+        'hotlines': HOTLINES,
+        'immediate_actions': IMMEDIATE_ACTIONS,
+        'reassurance': REASSURANCE
+    }
+
+
+def _load_content(db: Session) -> Dict:
+    """
+    Default content with published ContentItem overrides applied
+
+    ContentItem(type=EMERGENCY_CONTENT_TYPE) by category:
+    - 'abuse' / 'suicide' / 'default': priority message (content)
+    - 'reassurance': reassurance text (content)
+    - 'hotline': one hotline per row (name=title, description=content,
+      number/available/free/priority in meta_data); replaces the list
+    - 'action': one immediate action per row; replaces the list
+    """
+    from app.admin.models import ContentItem
+
+    items = db.query(ContentItem).filter(
+        ContentItem.type == EMERGENCY_CONTENT_TYPE,
+        ContentItem.is_published == True
+    ).order_by(ContentItem.order_index).all()
+
+    content = _default_content()
+    hotlines, actions = [], []
+    for item in items:
+        if item.category in PRIORITY_MESSAGES:
+            content['priority_messages'][item.category] = item.content
+        elif item.category == 'reassurance':
+            content['reassurance'] = item.content
+        elif item.category == 'hotline':
+            meta = item.meta_data or {}
+            hotlines.append({
+                'name': item.title,
+                'number': meta.get('number', ''),
+                'available': meta.get('available', '24/7'),
+                'free': bool(meta.get('free', False)),
+                'priority': int(meta.get('priority', 2)),
+                'description': item.content
+            })
+        elif item.category == 'action':
+            actions.append(item.content)
+
+    if hotlines:
+        content['hotlines'] = hotlines
+    if actions:
+        content['immediate_actions'] = actions
+    content['version'] = f"{len(items)}:{max((i.updated_at for i in items if i.updated_at), default='-')}"
+    return content
+
+
+# ============================================
+# PROCESS-WIDE TABLE
+# ============================================
+
+_payloads = EmergencyPayloads(_default_content())
+_payloads_lock = threading.Lock()
+_listener = None
+
+
+def build_emergency_payloads(db: Optional[Session] = None) -> EmergencyPayloads:
+    """
+    (Re)build the payload table and swap it in
+
+    Args:
+        db: Database session; without it only the default content is used
+    """
+    global _payloads
+    content = _load_content(db) if db is not None else _default_content()
+    payloads = EmergencyPayloads(content)
+    with _payloads_lock:
+        _payloads = payloads
+    logger.info(f"🆘 Emergency payloads built (version {payloads.version})")
+    return payloads
+
+
+def get_emergency_payload(categories: Optional[Iterable[str]] = None, severity: str = 'high') -> Dict:
+    """Emergency info for a crisis result (shared dict, do not mutate)"""
+    return _payloads.get(categories, severity)
+
+
+def get_emergency_payload_json(categories: Optional[Iterable[str]] = None, severity: str = 'high') -> str:
+    """Same payload, already serialized as JSON"""
+    return _payloads.get_json(categories, severity)
+
+
+def _rebuild_from_db(_message=None):
+    """Rebuild with a fresh DB session (pub/sub thread or admin request)"""
+    from app.database import get_db_context
+
+    try:
+        with get_db_context() as db:
+            build_emergency_payloads(db)
+    except Exception as e:
+        # Giữ bảng hiện tại: nội dung khẩn cấp phải luôn trả về được
+        logger.error(f"Emergency payload rebuild failed: {e}")
+
+
+def notify_emergency_content_changed() -> bool:
+    """
+    Rebuild the payloads on every worker after emergency content changed
+
+    Call after committing ContentItem changes of EMERGENCY_CONTENT_TYPE.
+
+    Returns:
+        True if the notification was published to Redis
+    """
+    if _listener is not None and cache.publish(EMERGENCY_CHANNEL, str(os.getpid())):
+        return True
+    _rebuild_from_db()
+    return False
+
+
+def start_emergency_listener():
+    """Subscribe this worker to emergency content change notifications"""
+    global _listener
+    if _listener is None:
+        _listener = cache.subscribe(EMERGENCY_CHANNEL, _rebuild_from_db)
+    return _listener
+
+
+def stop_emergency_listener():
+    """Stop the pub/sub listener thread (shutdown)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'EMERGENCY_CONTENT_TYPE',
+    'EmergencyPayloads',
+    'build_emergency_payloads',
+    'get_emergency_payload',
+    'get_emergency_payload_json',
+    'notify_emergency_content_changed',
+    'start_emergency_listener',
+    'stop_emergency_listener'
+]
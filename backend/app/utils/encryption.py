@@ -5,10 +5,14 @@
 
 import os
 import base64
+import binascii
 import logging
+from typing import Dict, Iterable, List, Optional, Tuple
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.exceptions import InvalidTag
 
 logger = logging.getLogger(__name__)
 
@@ -121,6 +125,299 @@ def decrypt_message(ciphertext: str, iv: str) -> str:
         raise ValueError(f"Decryption failed: {str(e)}")
 
 
+# ============================================
+# BATCH ENCRYPTION (list pages, re-encryption jobs)
+# ============================================
+
+_AES = algorithms.AES(ENCRYPTION_KEY)
+_BACKEND = default_backend()
+_BLOCK = 16
+
+
+def _unpad(data: bytes) -> bytes:
+    """Strip PKCS7 padding (ValueError if invalid)"""
+    if not data:
+        raise ValueError("empty plaintext block")
+    pad = data[-1]
+    if pad < 1 or pad > _BLOCK or data[-pad:] != bytes([pad]) * pad:
+        raise ValueError("invalid padding")
+    return data[:-pad]
+
+
+def encrypt_many(plaintexts: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    Encrypt many values (AES-256-CBC, one random IV each)
+    
+    Same output format as encrypt_message, without rebuilding the key
+    object and padder for every value.
+    
+    Args:
+        plaintexts: Values to encrypt
+        
+    Returns:
+        List of (encrypted_text, iv) tuples, base64-encoded
+    """
+    results = []
+    for plaintext in plaintexts:
+        if not plaintext:
+            results.append(("", ""))
+            continue
+        
+        data = plaintext.encode('utf-8')
+        pad = _BLOCK - len(data) % _BLOCK
+        iv = os.urandom(_BLOCK)
+        encryptor = Cipher(_AES, modes.CBC(iv), backend=_BACKEND).encryptor()
+        ciphertext = encryptor.update(data + bytes([pad]) * pad) + encryptor.finalize()
+        results.append((
+            base64.b64encode(ciphertext).decode('utf-8'),
+            base64.b64encode(iv).decode('utf-8')
+        ))
+    return results
+
+
+def decrypt_many(pairs: Iterable[Tuple[Optional[str], Optional[str]]]) -> List[Optional[str]]:
+    """
+    Decrypt many (ciphertext, iv) pairs in one AES pass
+    
+    CBC decryption is P_i = AES_dec(C_i) XOR C_(i-1) with C_0 = IV, so all
+    blocks of all values go through a single ECB decryptor (one key
+    schedule, one OpenSSL call) and are then chained with one big-int XOR
+    per value.
+    
+    Args:
+        pairs: (ciphertext, iv) tuples, base64-encoded
+        
+    Returns:
+        Plaintexts in input order; "" for empty input (like
+        decrypt_message) and None for values that fail to decrypt
+    """
+    results: List[Optional[str]] = []
+    pending = []  # (result index, iv bytes, ciphertext bytes)
+    
+    for ciphertext, iv in pairs:
+        results.append("")
+        if not ciphertext or not iv:
+            continue
+        try:
+            ciphertext_bytes = base64.b64decode(ciphertext)
+            iv_bytes = base64.b64decode(iv)
+        except (binascii.Error, ValueError):
+            results[-1] = None
+            continue
+        if len(iv_bytes) != _BLOCK or not ciphertext_bytes or len(ciphertext_bytes) % _BLOCK:
+            results[-1] = None
+            continue
+        pending.append((len(results) - 1, iv_bytes, ciphertext_bytes))
+    
+    if not pending:
+        return results
+    
+    decryptor = Cipher(_AES, modes.ECB(), backend=_BACKEND).decryptor()
+    decrypted = decryptor.update(b"".join(ct for _, _, ct in pending)) + decryptor.finalize()
+    
+    offset = 0
+    for index, iv_bytes, ciphertext_bytes in pending:
+        size = len(ciphertext_bytes)
+        block = decrypted[offset:offset + size]
+        offset += size
+        
+        chain = iv_bytes + ciphertext_bytes[:-_BLOCK]
+        plain = (
+            int.from_bytes(block, 'big') ^ int.from_bytes(chain, 'big')
+        ).to_bytes(size, 'big')
+        try:
+            results[index] = _unpad(plain).decode('utf-8')
+        except (ValueError, UnicodeDecodeError):
+            results[index] = None
+    
+    return results
+
+
+# ============================================
+# KEYRING
+# ============================================
+# ENCRYPTION_KEYS="1:<secret>,2:<secret>"; ENCRYPTION_ACTIVE_KEY=2
+# Key id 0 luôn là ENCRYPTION_KEY (khóa cũ, dùng cho AES-CBC và envelope v1).
+# Khóa mới chỉ dùng để ghi khi ENCRYPTION_ACTIVE_KEY trỏ tới nó: thêm khóa vào
+# ENCRYPTION_KEYS không đổi khóa ghi, nên rolling deploy an toàn (mọi worker
+# đều có khóa mới trước khi có dòng nào được ghi bằng nó).
+
+def _derive_key(raw: str) -> bytes:
+    """Same 32-byte normalization as ENCRYPTION_KEY"""
+    key = raw.encode()
+    return key[:32] if len(key) >= 32 else key.ljust(32, b'0')
+
+
+def _load_keyring() -> Dict[int, bytes]:
+    keys = {0: ENCRYPTION_KEY}
+    for entry in os.getenv("ENCRYPTION_KEYS", "").split(","):
+        if not entry.strip():
+            continue
+        key_id, _, secret = entry.strip().partition(":")
+        if not key_id.isdigit() or not 0 < int(key_id) < 256 or not secret:
+            raise ValueError(f"Invalid ENCRYPTION_KEYS entry for key id '{key_id}'")
+        keys[int(key_id)] = _derive_key(secret)
+    return keys
+
+
+KEYRING = _load_keyring()
+ACTIVE_KEY_ID = int(os.getenv("ENCRYPTION_ACTIVE_KEY") or 0)
+
+if ACTIVE_KEY_ID not in KEYRING:
+    raise ValueError(f"ENCRYPTION_ACTIVE_KEY={ACTIVE_KEY_ID} is not in the keyring")
+
+# Một AESGCM object cho mỗi khóa (key schedule chỉ tính một lần)
+_GCM_BY_KEY: Dict[int, AESGCM] = {key_id: AESGCM(key) for key_id, key in KEYRING.items()}
+
+logger.info(f"🔐 Keyring loaded: key ids={sorted(KEYRING)}, active={ACTIVE_KEY_ID}")
+
+
+# ============================================
+# SEALED ENVELOPE (AES-256-GCM, bytea)
+# ============================================
+# v1: version (1 byte) | nonce (12 bytes) | ciphertext | tag (16 bytes)   → key id 0
+# v2: version (1 byte) | key id (1 byte) | nonce | ciphertext | tag
+#     (version + key id are authenticated as associated data)
+# Một giá trị nhị phân tự mô tả: không padding, không base64, không cột IV riêng.
+
+ENVELOPE_V1 = 1
+ENVELOPE_V2 = 2
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+
+def envelope_header(key_id: Optional[int] = None) -> bytes:
+    """Version + key id prefix of envelopes written with a key"""
+    return bytes([ENVELOPE_V2, ACTIVE_KEY_ID if key_id is None else key_id])
+
+
+def envelope_key_id(envelope: bytes) -> int:
+    """
+    Key id an envelope was sealed with
+
+    Raises:
+        ValueError: Unknown envelope version
+    """
+    version = envelope[0]
+    if version == ENVELOPE_V1:
+        return 0
+    if version == ENVELOPE_V2 and len(envelope) > 1:
+        return envelope[1]
+    raise ValueError(f"Unknown envelope version: {version}")
+
+
+def needs_rotation(envelope: Optional[bytes]) -> bool:
+    """True if an envelope was not sealed with the active key"""
+    if not envelope:
+        return False
+    try:
+        return bytes(envelope[:2]) != envelope_header()
+    except IndexError:
+        return True
+
+
+def seal(plaintext: Optional[str], key_id: Optional[int] = None) -> Optional[bytes]:
+    """
+    Encrypt a value into a versioned AES-GCM envelope
+    
+    Args:
+        plaintext: Value to encrypt
+        key_id: Keyring id (default: ACTIVE_KEY_ID)
+        
+    Returns:
+        Envelope bytes, or None for empty values
+    """
+    if not plaintext:
+        return None
+    header = envelope_header(key_id)
+    nonce = os.urandom(NONCE_SIZE)
+    return header + nonce + _GCM_BY_KEY[header[1]].encrypt(nonce, plaintext.encode('utf-8'), header)
+
+
+def unseal(envelope: Optional[bytes]) -> str:
+    """
+    Decrypt and authenticate an envelope produced by seal()
+    
+    Raises:
+        ValueError: Unknown version or key, truncated or tampered envelope
+    """
+    if not envelope:
+        return ""
+    envelope = bytes(envelope)
+    key_id = envelope_key_id(envelope)
+    gcm = _GCM_BY_KEY.get(key_id)
+    if gcm is None:
+        raise ValueError(f"Unknown encryption key id: {key_id}")
+    
+    # v1 không có key id và không có associated data
+    offset, aad = (1, None) if envelope[0] == ENVELOPE_V1 else (2, envelope[:2])
+    if len(envelope) < offset + NONCE_SIZE + TAG_SIZE:
+        raise ValueError("Envelope too short")
+    
+    nonce = envelope[offset:offset + NONCE_SIZE]
+    try:
+        return gcm.decrypt(nonce, envelope[offset + NONCE_SIZE:], aad).decode('utf-8')
+    except (InvalidTag, UnicodeDecodeError) as e:
+        raise ValueError(f"Envelope authentication failed: {e!r}")
+
+
+def seal_many(plaintexts: Iterable[Optional[str]]) -> List[Optional[bytes]]:
+    """seal() for a list of values"""
+    return [seal(plaintext) for plaintext in plaintexts]
+
+
+def unseal_many(envelopes: Iterable[Optional[bytes]]) -> List[Optional[str]]:
+    """unseal() for a list of values; None for values that fail"""
+    results: List[Optional[str]] = []
+    for envelope in envelopes:
+        try:
+            results.append(unseal(envelope))
+        except ValueError:
+            results.append(None)
+    return results
+
+
+def read_encrypted(
+    sealed: Optional[bytes],
+    ciphertext: Optional[str] = None,
+    iv: Optional[str] = None
+) -> str:
+    """
+    Read one encrypted field: envelope if present, else legacy CBC columns
+    
+    Raises:
+        ValueError: If decryption fails
+    """
+    if sealed:
+        return unseal(sealed)
+    return decrypt_message(ciphertext, iv)
+
+
+def read_encrypted_many(
+    fields: Iterable[Tuple[Optional[bytes], Optional[str], Optional[str]]]
+) -> List[Optional[str]]:
+    """
+    Batch read_encrypted() over (sealed, ciphertext, iv) tuples
+    
+    Envelopes and legacy CBC values are decrypted in one batch each.
+    
+    Returns:
+        Plaintexts in input order ("" for empty, None on failure)
+    """
+    fields = list(fields)
+    results: List[Optional[str]] = [""] * len(fields)
+    
+    sealed_idx = [i for i, (sealed, _, _) in enumerate(fields) if sealed]
+    legacy_idx = [i for i, (sealed, _, _) in enumerate(fields) if not sealed]
+    
+    for i, value in zip(sealed_idx, unseal_many(fields[i][0] for i in sealed_idx)):
+        results[i] = value
+    for i, value in zip(legacy_idx, decrypt_many((fields[i][1], fields[i][2]) for i in legacy_idx)):
+        results[i] = value
+    
+    return results
+
+
 # ============================================
 # EXPORT
 # ============================================
@@ -128,6 +425,18 @@ def decrypt_message(ciphertext: str, iv: str) -> str:
 __all__ = [
     'encrypt_message',
     'decrypt_message',
+    'encrypt_many',
+    'decrypt_many',
+    'KEYRING',
+    'ACTIVE_KEY_ID',
+    'envelope_key_id',
+    'needs_rotation',
+    'seal',
+    'unseal',
+    'seal_many',
+    'unseal_many',
+    'read_encrypted',
+    'read_encrypted_many',
     'generate_iv',
     'ENCRYPTION_KEY'  # Export for encrypt_with_shared_iv
 ]
\ No newline at end of file
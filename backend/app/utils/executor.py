@@ -0,0 +1,148 @@
+# ============================================
+# CPU-BOUND WORKER POOL
+# File: backend/app/utils/executor.py
+# ============================================
+
+import os
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.utils.metrics import (
+    EXECUTOR_TASKS_IN_FLIGHT,
+    EXECUTOR_QUEUE_WAIT_SECONDS,
+    EXECUTOR_TASK_SECONDS,
+    EXECUTOR_TASK_ERRORS
+)
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# "thread" (mặc định) hoặc "process" cho tác vụ không phụ thuộc trạng thái tiến trình
+EXECUTOR_KIND = os.getenv("EXECUTOR_KIND", "thread").lower()
+EXECUTOR_MAX_WORKERS = int(os.getenv("EXECUTOR_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+if EXECUTOR_KIND not in ("thread", "process"):
+    logger.warning(f"⚠️  Unknown EXECUTOR_KIND={EXECUTOR_KIND!r} - using thread")
+    EXECUTOR_KIND = "thread"
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+# ============================================
+# POOL LIFECYCLE
+# ============================================
+
+def get_executor(kind: Optional[str] = None) -> Executor:
+    """
+    Return the worker pool of a kind (created on first use)
+
+    The thread pool always exists: callables bound to in-process state
+    (compiled matchers, caches) must run there. The process pool is only
+    created when EXECUTOR_KIND=process.
+    """
+    global _thread_pool, _process_pool
+    kind = kind or EXECUTOR_KIND
+
+    if kind == "process":
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=EXECUTOR_MAX_WORKERS)
+        return _process_pool
+
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=EXECUTOR_MAX_WORKERS,
+            thread_name_prefix="cpu-worker"
+        )
+    return _thread_pool
+
+
+def start_executors():
+    """Create the pools up front (called from FastAPI lifespan)"""
+    get_executor("thread")
+    if EXECUTOR_KIND == "process":
+        get_executor("process")
+    logger.info(f"✅ Worker pool started: kind={EXECUTOR_KIND}, max_workers={EXECUTOR_MAX_WORKERS}")
+
+
+def shutdown_executors(wait: bool = True):
+    """Shut the pools down (called from FastAPI lifespan)"""
+    global _thread_pool, _process_pool
+    for pool in (_thread_pool, _process_pool):
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+    _thread_pool = None
+    _process_pool = None
+
+
+# ============================================
+# RUNNING TASKS
+# ============================================
+
+def _timed_call(func: Callable, args: tuple, kwargs: dict):
+    """Runs inside the worker: returns (result, started_at)"""
+    started_at = time.time()
+    return func(*args, **kwargs), started_at
+
+
+async def run_in_worker(
+    func: Callable,
+    *args: Any,
+    kind: Optional[str] = None,
+    task: Optional[str] = None,
+    **kwargs: Any
+) -> Any:
+    """
+    Run a blocking/CPU-bound callable off the event loop
+
+    Args:
+        func: Callable (module-level function when kind is "process")
+        *args, **kwargs: Arguments for func
+        kind: "thread" or "process" (default: EXECUTOR_KIND)
+        task: Metric label (default: function name)
+
+    Returns:
+        The callable's return value (exceptions are re-raised)
+    """
+    kind = kind or EXECUTOR_KIND
+    task = task or getattr(func, "__name__", "task")
+    loop = asyncio.get_running_loop()
+
+    EXECUTOR_TASKS_IN_FLIGHT.labels(kind).inc()
+    submitted_at = time.time()
+    try:
+        result, started_at = await loop.run_in_executor(
+            get_executor(kind),
+            functools.partial(_timed_call, func, args, kwargs)
+        )
+    except Exception:
+        EXECUTOR_TASK_ERRORS.labels(kind, task).inc()
+        raise
+    finally:
+        EXECUTOR_TASKS_IN_FLIGHT.labels(kind).dec()
+
+    finished_at = time.time()
+    EXECUTOR_QUEUE_WAIT_SECONDS.labels(kind).observe(max(started_at - submitted_at, 0.0))
+    EXECUTOR_TASK_SECONDS.labels(kind, task).observe(max(finished_at - started_at, 0.0))
+    return result
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'EXECUTOR_KIND',
+    'EXECUTOR_MAX_WORKERS',
+    'get_executor',
+    'start_executors',
+    'shutdown_executors',
+    'run_in_worker'
+]
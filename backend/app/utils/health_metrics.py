@@ -0,0 +1,585 @@
+# ============================================
+# SYSTEM HEALTH METRICS RECORDER (per-minute rollups)
+# File: backend/app/utils/health_metrics.py
+# ============================================
+
+import os
+import random
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, select, delete
+from sqlalchemy.orm import Session
+
+from app.models import SystemHealthMetric
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Chu kỳ ghi các phút đã kết thúc xuống system_health_metrics (giây); 0 = tắt
+HEALTH_METRICS_INTERVAL = float(os.getenv("HEALTH_METRICS_INTERVAL", "60"))
+# Số mẫu latency giữ lại mỗi phút để tính percentile (reservoir sampling)
+HEALTH_METRICS_MAX_SAMPLES = int(os.getenv("HEALTH_METRICS_MAX_SAMPLES", "2000"))
+# Dòng 1 phút bị xóa sau số ngày này (bản rollup 1h / 1d vẫn giữ)
+HEALTH_METRICS_RAW_DAYS = int(os.getenv("HEALTH_METRICS_RAW_DAYS", "7"))
+# Chờ thêm sau khi bucket kết thúc trước khi rollup (các worker còn đang flush);
+# mặc định 2 chu kỳ ghi
+HEALTH_METRICS_ROLLUP_GRACE = float(os.getenv("HEALTH_METRICS_ROLLUP_GRACE", str(2 * HEALTH_METRICS_INTERVAL)))
+HEALTH_METRICS_SERVICE = os.getenv("HEALTH_METRICS_SERVICE", "api")
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+
+# Khóa advisory của Postgres: chỉ một worker làm rollup cho mỗi bucket
+ROLLUP_LOCK_ID = 7_301_025
+
+# metric_name -> (unit, how values of one bucket are combined)
+# sum: counts; max: worst value; avg: percentiles (mean of the per-minute
+# percentiles, an approximation - exact ones would need the raw samples)
+METRICS = {
+    'http_requests': ('count', 'sum'),
+    'http_latency_p50': ('ms', 'avg'),
+    'http_latency_p95': ('ms', 'avg'),
+    'http_latency_p99': ('ms', 'avg'),
+    'llm_calls': ('count', 'sum'),
+    'llm_latency_p50': ('ms', 'avg'),
+    'llm_latency_p95': ('ms', 'avg'),
+    'llm_tokens': ('tokens', 'sum'),
+    'chat_turns': ('count', 'sum'),
+    'crisis_turns': ('count', 'sum'),
+    'db_pool_saturation': ('percent', 'max'),
+}
+# Tính khi truy vấn từ chat_turns / crisis_turns (tỷ lệ thì không cộng được)
+DERIVED_METRICS = ('crisis_rate',)
+
+RESOLUTIONS = {
+    '1m': timedelta(minutes=1),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+_FINER = {'1h': '1m', '1d': '1h'}
+
+# DECIMAL(10, 2)
+_MAX_VALUE = 99_999_999.99
+
+
+def _truncate(at: datetime, resolution: str) -> datetime:
+    """Start of the bucket containing `at`"""
+    at = at.replace(second=0, microsecond=0)
+    if resolution in ('1h', '1d'):
+        at = at.replace(minute=0)
+    if resolution == '1d':
+        at = at.replace(hour=0)
+    return at
+
+
+def _utc(at: datetime) -> datetime:
+    """
+    Same instant in UTC (buckets are cut in UTC)
+
+    asyncpg returns timestamptz in UTC, psycopg2 in the server's TimeZone;
+    naive values (SQLite) are taken as UTC.
+    """
+    if at.tzinfo is None:
+        return at.replace(tzinfo=timezone.utc)
+    return at.astimezone(timezone.utc)
+
+
+def _stored_name(name: str, resolution: str) -> str:
+    """Rollups share the table: "http_requests@1h" (raw rows keep the bare name)"""
+    return name if resolution == '1m' else f"{name}@{resolution}"
+
+
+def _combine(kind: str, values: List[float]) -> float:
+    if kind == 'sum':
+        return sum(values)
+    if kind == 'max':
+        return max(values)
+    return sum(values) / len(values)
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+# ============================================
+# IN-PROCESS AGGREGATOR
+# ============================================
+
+class _MinuteStats:
+    """Everything observed by this worker during one minute"""
+
+    def __init__(self):
+        self.requests = 0
+        self.request_ms: List[float] = []
+        self.llm_calls = 0
+        self.llm_ms: List[float] = []
+        self.tokens = 0
+        self.turns = 0
+        self.crisis_turns = 0
+        self.saturation: Optional[float] = None
+
+    @staticmethod
+    def _sample(samples: List[float], seen: int, value: float):
+        # Reservoir: bộ nhớ cố định dù một phút có bao nhiêu request
+        if len(samples) < HEALTH_METRICS_MAX_SAMPLES:
+            samples.append(value)
+        else:
+            slot = random.randrange(seen)
+            if slot < HEALTH_METRICS_MAX_SAMPLES:
+                samples[slot] = value
+
+    def values(self) -> Dict[str, float]:
+        values = {}
+        if self.requests:
+            ordered = sorted(self.request_ms)
+            values['http_requests'] = self.requests
+            values['http_latency_p50'] = _percentile(ordered, 0.50)
+            values['http_latency_p95'] = _percentile(ordered, 0.95)
+            values['http_latency_p99'] = _percentile(ordered, 0.99)
+        if self.llm_calls:
+            ordered = sorted(self.llm_ms)
+            values['llm_calls'] = self.llm_calls
+            values['llm_latency_p50'] = _percentile(ordered, 0.50)
+            values['llm_latency_p95'] = _percentile(ordered, 0.95)
+        if self.tokens:
+            values['llm_tokens'] = self.tokens
+        if self.turns:
+            values['chat_turns'] = self.turns
+            values['crisis_turns'] = self.crisis_turns
+        if self.saturation is not None:
+            values['db_pool_saturation'] = self.saturation
+        return values
+
+
+class HealthAggregator:
+    """
+    Per-minute rollup of request/LLM latency, tokens, crisis turns and
+    DB pool saturation for this worker
+
+    Recording is a dict update under a lock; nothing touches the database
+    until drain() hands finished minutes to the periodic flush.
+    """
+
+    def __init__(self):
+        self._minutes: Dict[datetime, _MinuteStats] = {}
+        self._lock = threading.Lock()
+
+    def _current(self) -> _MinuteStats:
+        minute = _truncate(datetime.now(timezone.utc), '1m')
+        stats = self._minutes.get(minute)
+        if stats is None:
+            stats = self._minutes[minute] = _MinuteStats()
+        return stats
+
+    def observe_request(self, seconds: float, saturation: Optional[float] = None):
+        with self._lock:
+            stats = self._current()
+            stats.requests += 1
+            stats._sample(stats.request_ms, stats.requests, seconds * 1000)
+            if saturation is not None and (stats.saturation is None or saturation > stats.saturation):
+                stats.saturation = saturation
+
+    def observe_llm(self, seconds: float):
+        with self._lock:
+            stats = self._current()
+            stats.llm_calls += 1
+            stats._sample(stats.llm_ms, stats.llm_calls, seconds * 1000)
+
+    def add_tokens(self, tokens: int):
+        with self._lock:
+            self._current().tokens += tokens
+
+    def record_turn(self, is_crisis: bool):
+        with self._lock:
+            stats = self._current()
+            stats.turns += 1
+            if is_crisis:
+                stats.crisis_turns += 1
+
+    def drain(self, before: Optional[datetime] = None) -> List[Dict]:
+        """
+        Take finished minutes as system_health_metrics rows
+
+        Args:
+            before: Only minutes starting before this (default: all,
+                including the current partial minute)
+        """
+        with self._lock:
+            taken = [minute for minute in self._minutes if before is None or minute < before]
+            minutes = [(minute, self._minutes.pop(minute)) for minute in sorted(taken)]
+
+        rows = []
+        for minute, stats in minutes:
+            for name, value in stats.values().items():
+                rows.append({
+                    'metric_name': name,
+                    'metric_value': round(min(value, _MAX_VALUE), 2),
+                    'metric_unit': METRICS[name][0],
+                    'service_name': HEALTH_METRICS_SERVICE,
+                    'environment': ENVIRONMENT,
+                    'recorded_at': minute
+                })
+        return rows
+
+
+HEALTH = HealthAggregator()
+_recorder: Optional[asyncio.Task] = None
+_rolled_up: Dict[str, datetime] = {}
+
+
+# ============================================
+# RECORDING API
+# ============================================
+
+def _pool_saturation() -> Optional[float]:
+    """Checked-out share of the async pool's capacity (percent)"""
+    # Import muộn: module này được import từ llm_router (không cần DATABASE_URL)
+    from app.database import async_engine, DB_ASYNC_POOL_SIZE, DB_ASYNC_MAX_OVERFLOW
+
+    pool = async_engine.pool
+    capacity = DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW
+    if not hasattr(pool, "checkedout") or capacity <= 0:
+        return None
+    return pool.checkedout() * 100 / capacity
+
+
+def observe_request(seconds: float):
+    """One HTTP request finished (also samples DB pool saturation)"""
+    if HEALTH_METRICS_INTERVAL > 0:
+        HEALTH.observe_request(seconds, _pool_saturation())
+
+
+def observe_llm(seconds: float):
+    """One successful upstream LLM call"""
+    if HEALTH_METRICS_INTERVAL > 0:
+        HEALTH.observe_llm(seconds)
+
+
+def add_llm_tokens(tokens: int):
+    """Tokens used by a stored reply"""
+    if HEALTH_METRICS_INTERVAL > 0 and tokens:
+        HEALTH.add_tokens(tokens)
+
+
+def record_chat_turn(is_crisis: bool):
+    """One user message processed (crisis rate = crisis_turns / chat_turns)"""
+    if HEALTH_METRICS_INTERVAL > 0:
+        HEALTH.record_turn(is_crisis)
+
+
+# ============================================
+# PERSISTENCE (one multi-row INSERT per interval)
+# ============================================
+
+async def flush_health_metrics(final: bool = False) -> int:
+    """
+    Write finished minutes of this worker in a single INSERT ... VALUES
+
+    Rows of a failed write are dropped (health metrics are best effort).
+
+    Args:
+        final: Also write the current, unfinished minute (shutdown)
+
+    Returns:
+        Number of rows written
+    """
+    from app.database import async_engine
+
+    before = None if final else _truncate(datetime.now(timezone.utc), '1m')
+    rows = HEALTH.drain(before)
+    if not rows:
+        return 0
+    try:
+        async with async_engine.begin() as conn:
+            await conn.execute(insert(SystemHealthMetric).values(rows))
+    except Exception as e:
+        logger.error(f"Health metrics flush failed ({len(rows)} rows dropped): {e}")
+        return 0
+    logger.debug(f"Health metrics flushed: {len(rows)} rows")
+    return len(rows)
+
+
+def _bucket_values(rows: Iterable, resolution: str) -> Dict[str, Dict[datetime, float]]:
+    """
+    (stored name, value, recorded_at) rows -> {name: {bucket: value}}
+
+    Rows of the same name and bucket (several workers, or the finer rows
+    being downsampled) are combined with the metric's rule; for averages,
+    workers are combined first, then the finer buckets.
+    """
+    points: Dict[str, Dict[datetime, Dict[datetime, List[float]]]] = {}
+    for stored_name, value, recorded_at in rows:
+        name = stored_name.split('@', 1)[0]
+        recorded_at = _utc(recorded_at)
+        bucket = _truncate(recorded_at, resolution)
+        points.setdefault(name, {}).setdefault(bucket, {}).setdefault(recorded_at, []).append(float(value))
+
+    series = {}
+    for name, buckets in points.items():
+        kind = METRICS[name][1]
+        series[name] = {
+            bucket: _combine(kind, [_combine(kind, values) for values in by_time.values()])
+            for bucket, by_time in buckets.items()
+        }
+    return series
+
+
+async def _rollup_until(conn, resolution: str, last: datetime) -> Optional[int]:
+    """
+    Roll up every bucket after the latest stored rollup, up to and
+    including `last`, from the next finer resolution (backfills the
+    buckets missed while no worker was running)
+
+    Returns:
+        Rows written, or None if another worker holds the rollup lock
+    """
+    if not await conn.scalar(select(func.pg_try_advisory_xact_lock(ROLLUP_LOCK_ID))):
+        return None
+
+    finer_names = [_stored_name(name, _FINER[resolution]) for name in METRICS]
+    latest = await conn.scalar(
+        select(func.max(SystemHealthMetric.recorded_at))
+        .where(SystemHealthMetric.metric_name.in_([_stored_name(name, resolution) for name in METRICS]))
+    )
+    if latest is not None:
+        first = _truncate(_utc(latest), resolution) + RESOLUTIONS[resolution]
+    else:
+        earliest = await conn.scalar(
+            select(func.min(SystemHealthMetric.recorded_at))
+            .where(SystemHealthMetric.metric_name.in_(finer_names))
+        )
+        if earliest is None:
+            return 0
+        first = _truncate(_utc(earliest), resolution)
+    if first > last:
+        return 0
+
+    result = await conn.execute(
+        select(SystemHealthMetric.metric_name, SystemHealthMetric.metric_value, SystemHealthMetric.recorded_at)
+        .where(
+            SystemHealthMetric.metric_name.in_(finer_names),
+            SystemHealthMetric.recorded_at >= first,
+            SystemHealthMetric.recorded_at < last + RESOLUTIONS[resolution]
+        )
+    )
+    rows = [
+        {
+            'metric_name': _stored_name(name, resolution),
+            'metric_value': round(min(value, _MAX_VALUE), 2),
+            'metric_unit': METRICS[name][0],
+            'service_name': HEALTH_METRICS_SERVICE,
+            'environment': ENVIRONMENT,
+            'recorded_at': bucket
+        }
+        for name, points in _bucket_values(result.all(), resolution).items()
+        for bucket, value in sorted(points.items())
+    ]
+    if rows:
+        await conn.execute(insert(SystemHealthMetric).values(rows))
+    return len(rows)
+
+
+async def rollup_health_metrics(now: Optional[datetime] = None) -> int:
+    """
+    Write the 1h and 1d rollups of every finished bucket not rolled up
+    yet (idempotent, one worker at a time)
+
+    A bucket is rolled up HEALTH_METRICS_ROLLUP_GRACE after it ends, once
+    every worker has flushed its last minutes. 1m rows older than
+    HEALTH_METRICS_RAW_DAYS are deleted only once their hour is rolled
+    up: older trends are served from the rollups.
+
+    Returns:
+        Number of rollup rows written
+    """
+    from app.database import async_engine
+
+    settled = _utc(now or datetime.now(timezone.utc)) - timedelta(seconds=HEALTH_METRICS_ROLLUP_GRACE)
+    written = 0
+    for resolution in ('1h', '1d'):
+        # Bucket cuối cùng đã kết thúc trước (now - grace)
+        last = _truncate(settled, resolution) - RESOLUTIONS[resolution]
+        if _rolled_up.get(resolution) == last:
+            continue
+        try:
+            async with async_engine.begin() as conn:
+                rows = await _rollup_until(conn, resolution, last)
+                if rows is None:
+                    # 1d chỉ tổng hợp từ các giờ đã rollup đủ
+                    break
+                if resolution == '1h' and HEALTH_METRICS_RAW_DAYS > 0:
+                    await conn.execute(
+                        delete(SystemHealthMetric).where(
+                            SystemHealthMetric.metric_name.in_(list(METRICS)),
+                            SystemHealthMetric.recorded_at < min(
+                                settled - timedelta(days=HEALTH_METRICS_RAW_DAYS),
+                                last + RESOLUTIONS[resolution]
+                            )
+                        )
+                    )
+        except Exception as e:
+            logger.error(f"Health metrics {resolution} rollup up to {last.isoformat()} failed: {e}")
+            break
+        _rolled_up[resolution] = last
+        written += rows
+        if rows:
+            logger.info(f"📈 Health metrics {resolution} rollup up to {last.isoformat()}: {rows} rows")
+    return written
+
+
+async def _record_loop():
+    while True:
+        await asyncio.sleep(HEALTH_METRICS_INTERVAL)
+        await flush_health_metrics()
+        await rollup_health_metrics()
+
+
+def start_health_recorder():
+    """Start the periodic flush + rollup task (lifespan startup)"""
+    global _recorder
+    if HEALTH_METRICS_INTERVAL > 0 and _recorder is None:
+        _recorder = asyncio.get_running_loop().create_task(_record_loop())
+        logger.info(f"✅ Health metrics recorded every {HEALTH_METRICS_INTERVAL:g}s")
+    return _recorder
+
+
+async def stop_health_recorder():
+    """Stop the task and write what is left (before disposing the engine)"""
+    global _recorder
+    if _recorder is not None:
+        _recorder.cancel()
+        try:
+            await _recorder
+        except asyncio.CancelledError:
+            pass
+        _recorder = None
+        await flush_health_metrics(final=True)
+
+
+# ============================================
+# QUERY API (admin dashboard)
+# ============================================
+
+def _auto_resolution(span: timedelta) -> str:
+    if span <= timedelta(hours=6):
+        return '1m'
+    if span <= timedelta(days=14):
+        return '1h'
+    return '1d'
+
+
+def _load_series(db: Session, names: List[str], start: datetime, end: datetime, resolution: str) -> Dict[str, Dict[datetime, float]]:
+    """
+    Series at a resolution: stored rollups, plus the buckets not rolled up
+    yet (the current hour / day) downsampled from the next finer level
+    """
+    rows = db.query(
+        SystemHealthMetric.metric_name,
+        SystemHealthMetric.metric_value,
+        SystemHealthMetric.recorded_at
+    ).filter(
+        SystemHealthMetric.metric_name.in_([_stored_name(name, resolution) for name in names]),
+        SystemHealthMetric.recorded_at >= start,
+        SystemHealthMetric.recorded_at < end
+    ).all()
+    series = _bucket_values(rows, resolution)
+    if resolution == '1m':
+        return series
+
+    latest = max((bucket for points in series.values() for bucket in points), default=None)
+    cut = latest + RESOLUTIONS[resolution] if latest else start
+    if cut < end:
+        tail = _load_series(db, names, max(start, cut), end, _FINER[resolution])
+        for name, points in tail.items():
+            kind = METRICS[name][1]
+            grouped: Dict[datetime, List[float]] = {}
+            for at, value in points.items():
+                grouped.setdefault(_truncate(_utc(at), resolution), []).append(value)
+            target = series.setdefault(name, {})
+            for bucket, values in grouped.items():
+                target[bucket] = _combine(kind, values)
+    return series
+
+
+def query_health_metrics(
+    db: Session,
+    names: Optional[Iterable[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: Optional[str] = None
+) -> Dict:
+    """
+    Health metric series for the admin dashboard
+
+    Args:
+        db: Database session
+        names: Metrics to return (default: all, plus crisis_rate)
+        start, end: Time range (default: the last 24 hours)
+        resolution: '1m', '1h' or '1d' (default: from the range length)
+
+    Returns:
+        {"resolution", "start", "end", "series": {name: [{"t", "value"}]}}
+
+    Raises:
+        ValueError: Unknown metric name or resolution
+    """
+    end = _utc(end or datetime.now(timezone.utc))
+    start = _utc(start or end - timedelta(hours=24))
+    resolution = resolution or _auto_resolution(end - start)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+
+    names = list(names or (*METRICS, *DERIVED_METRICS))
+    unknown = [name for name in names if name not in METRICS and name not in DERIVED_METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+
+    needed = {name for name in names if name in METRICS}
+    if 'crisis_rate' in names:
+        needed |= {'chat_turns', 'crisis_turns'}
+    series = _load_series(db, sorted(needed), _truncate(start, resolution), end, resolution)
+
+    if 'crisis_rate' in names:
+        turns = series.get('chat_turns', {})
+        crisis = series.get('crisis_turns', {})
+        series['crisis_rate'] = {
+            bucket: crisis.get(bucket, 0) * 100 / total
+            for bucket, total in turns.items() if total
+        }
+
+    return {
+        "resolution": resolution,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": {
+            name: [
+                {"t": bucket.isoformat(), "value": round(value, 2)}
+                for bucket, value in sorted(series.get(name, {}).items())
+            ]
+            for name in names
+        }
+    }
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'METRICS',
+    'HealthAggregator',
+    'observe_request',
+    'observe_llm',
+    'add_llm_tokens',
+    'record_chat_turn',
+    'flush_health_metrics',
+    'rollup_health_metrics',
+    'start_health_recorder',
+    'stop_health_recorder',
+    'query_health_metrics'
+]
@@ -0,0 +1,309 @@
+# ============================================
+# LLM ADMISSION CONTROL (concurrency + rate limits)
+# File: backend/app/utils/llm_admission.py
+# ============================================
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+from redis.exceptions import RedisError
+
+from app.cache import cache
+from app.utils.llm_router import LLMUnavailableError
+from app.utils.metrics import (
+    LLM_ADMISSION_WAIT_SECONDS,
+    LLM_ADMISSION_REJECTED,
+    LLM_ADMISSION_QUEUE_DEPTH,
+    LLM_CALLS_IN_FLIGHT
+)
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Số lượt gọi LLM đồng thời tối đa trong mỗi worker process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Lượt thường chờ trong hàng đợi có giới hạn; lượt khủng hoảng luôn được xếp trước
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "100"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "15"))
+# Giới hạn toàn cục (mọi worker, qua Redis) theo hạn mức của Groq; 0 = tắt
+LLM_RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", "0"))
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "0"))
+LLM_RATE_LIMIT_KEY = os.getenv("LLM_RATE_LIMIT_KEY", "llm:ratelimit:groq")
+
+CRISIS = "crisis"
+NORMAL = "normal"
+
+
+class LLMAdmissionError(LLMUnavailableError):
+    """Turn not admitted (queue full or waited too long): answered with the fallback"""
+
+
+# ============================================
+# PER-PROCESS PRIORITY SEMAPHORE
+# ============================================
+
+class PriorityLimiter:
+    """
+    Semaphore with two wait queues: crisis waiters are always served first
+
+    A released slot is handed directly to the next waiter, so a newly
+    arriving normal turn cannot overtake queued ones. Normal waiters are
+    bounded (queue_size) and time out; crisis waiters are neither.
+    """
+
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self._active = 0
+        self._waiters: Dict[str, deque] = {CRISIS: deque(), NORMAL: deque()}
+
+    def _queued(self, priority: str) -> int:
+        return sum(1 for waiter in self._waiters[priority] if not waiter.done())
+
+    def _publish(self):
+        LLM_CALLS_IN_FLIGHT.set(self._active)
+        for priority, waiters in self._waiters.items():
+            LLM_ADMISSION_QUEUE_DEPTH.labels(priority).set(self._queued(priority))
+
+    async def acquire(self, priority: str, timeout: Optional[float]):
+        ahead = self._queued(CRISIS) + (self._queued(NORMAL) if priority == NORMAL else 0)
+        if self.limit <= 0 or (self._active < self.limit and not ahead):
+            self._active += 1
+            self._publish()
+            return
+
+        if priority == NORMAL and self._queued(NORMAL) >= self.queue_size:
+            raise LLMAdmissionError("LLM queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        self._publish()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            raise LLMAdmissionError(f"waited more than {timeout:g}s for an LLM slot")
+        except BaseException:
+            # Được cấp slot đúng lúc bị hủy: trả lại cho người kế tiếp
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            try:
+                self._waiters[priority].remove(waiter)
+            except ValueError:
+                pass
+            self._publish()
+
+    def release(self):
+        for priority in (CRISIS, NORMAL):
+            waiters = self._waiters[priority]
+            while waiters:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    self._publish()
+                    return
+        self._active -= 1
+        self._publish()
+
+
+# ============================================
+# GLOBAL TOKEN BUCKETS (REDIS)
+# ============================================
+# Hai bucket (request/phút, token/phút) nạp lại liên tục theo TIME của Redis,
+# kiểm tra và trừ nguyên tử trong một script. Trả về số ms cần chờ (0 = được đi).
+# force=1 (lượt khủng hoảng): trừ luôn dù không đủ, các lượt thường chờ lâu hơn.
+
+_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local wait = 0
+local levels = {}
+for i = 1, 2 do
+    local capacity = tonumber(ARGV[(i - 1) * 2 + 1])
+    local cost = tonumber(ARGV[(i - 1) * 2 + 2])
+    if capacity > 0 then
+        local state = redis.call('HMGET', KEYS[i], 'level', 'ts')
+        local level = tonumber(state[1]) or capacity
+        local ts = tonumber(state[2]) or now
+        level = math.min(capacity, level + (now - ts) * capacity / 60000)
+        local needed = math.min(cost, capacity)
+        if cost > 0 and level < needed then
+            wait = math.max(wait, (needed - level) * 60000 / capacity)
+        end
+        levels[i] = level
+    end
+end
+if wait == 0 or ARGV[5] == '1' then
+    for i = 1, 2 do
+        if levels[i] then
+            levels[i] = math.min(tonumber(ARGV[(i - 1) * 2 + 1]), levels[i] - tonumber(ARGV[(i - 1) * 2 + 2]))
+        end
+    end
+    wait = 0
+end
+for i = 1, 2 do
+    if levels[i] then
+        redis.call('HSET', KEYS[i], 'level', levels[i], 'ts', now)
+        redis.call('PEXPIRE', KEYS[i], 120000)
+    end
+end
+return math.ceil(wait)
+"""
+
+# Script đăng ký trên client async hiện tại (client gắn với event loop)
+_bucket_script = None
+_bucket_client = None
+
+
+async def _take(requests: int, tokens: int, force: bool = False) -> int:
+    """
+    Try to take from the global buckets (async Redis client, off the loop)
+
+    Returns:
+        Milliseconds to wait before retrying (0 = taken). Without Redis
+        the limit is not enforced (fail open, the semaphore still applies).
+    """
+    global _bucket_script, _bucket_client
+    if not (LLM_RPM_LIMIT or LLM_TPM_LIMIT):
+        return 0
+    client = cache.aclient
+    if client is None:
+        return 0
+    try:
+        if _bucket_client is not client:
+            _bucket_script = client.register_script(_BUCKET_SCRIPT)
+            _bucket_client = client
+        return int(await _bucket_script(
+            keys=[f"{LLM_RATE_LIMIT_KEY}:rpm", f"{LLM_RATE_LIMIT_KEY}:tpm"],
+            args=[LLM_RPM_LIMIT, requests, LLM_TPM_LIMIT, tokens, "1" if force else "0"]
+        ))
+    except RedisError as e:
+        logger.warning(f"⚠️  LLM rate limit check failed, not enforced: {e}")
+        return 0
+
+
+async def _wait_for_budget(tokens: int, force: bool, deadline: Optional[float]):
+    while True:
+        wait_ms = await _take(1, tokens, force)
+        if not wait_ms:
+            return
+        wait = wait_ms / 1000
+        if deadline is not None and time.monotonic() + wait > deadline:
+            raise LLMAdmissionError("LLM rate limit budget exhausted")
+        await asyncio.sleep(wait)
+
+
+async def refund_tokens(tokens: int):
+    """Give back the unused part of a token estimate"""
+    if tokens > 0 and LLM_TPM_LIMIT:
+        await _take(0, -tokens)
+
+
+# ============================================
+# ADMISSION
+# ============================================
+
+_limiter = PriorityLimiter(LLM_MAX_CONCURRENCY, LLM_QUEUE_SIZE)
+
+
+class AdmissionTicket:
+    """What a turn waited for, and its token estimate (for the refund)"""
+
+    def __init__(self, priority: str, estimated_tokens: int):
+        self.priority = priority
+        self.estimated_tokens = estimated_tokens
+        self.wait_seconds = 0.0
+        self.tokens_used = 0
+        self._hedges: Set[asyncio.Future] = set()
+
+    @property
+    def wait_ms(self) -> int:
+        return int(self.wait_seconds * 1000)
+
+    def settle(self, tokens_used: int):
+        """Record what the call actually used (the rest is refunded on exit)"""
+        self.tokens_used = tokens_used
+
+    def charge_hedge(self):
+        """
+        Charge a hedged duplicate request to the global buckets
+
+        Forced (it is already being sent) and not refunded: the tokens a
+        cancelled hedge consumed upstream are unknown.
+        """
+        if not (LLM_RPM_LIMIT or LLM_TPM_LIMIT):
+            return
+        task = asyncio.ensure_future(_take(1, self.estimated_tokens, force=True))
+        self._hedges.add(task)
+        task.add_done_callback(self._hedges.discard)
+
+    async def _refund(self):
+        if self._hedges:
+            await asyncio.gather(*self._hedges, return_exceptions=True)
+        # Lượt lỗi (không settle) được hoàn toàn bộ ước lượng
+        await refund_tokens(self.estimated_tokens - self.tokens_used)
+
+
+@asynccontextmanager
+async def llm_admission(is_crisis: bool, estimated_tokens: int) -> AsyncIterator[AdmissionTicket]:
+    """
+    Hold an LLM slot for one turn (local semaphore, then global budget)
+
+    Raises:
+        LLMAdmissionError: normal turn rejected (queue full, timed out)
+    """
+    priority = CRISIS if is_crisis else NORMAL
+    ticket = AdmissionTicket(priority, estimated_tokens)
+    started = time.monotonic()
+    # Lượt khủng hoảng không bao giờ bị từ chối vì chờ lâu
+    deadline = None if is_crisis else started + LLM_QUEUE_TIMEOUT
+
+    try:
+        await _limiter.acquire(priority, None if is_crisis else LLM_QUEUE_TIMEOUT)
+        LLM_ADMISSION_WAIT_SECONDS.labels(priority, "slot").observe(time.monotonic() - started)
+    except LLMAdmissionError:
+        LLM_ADMISSION_REJECTED.labels(priority).inc()
+        raise
+
+    charged = False
+    try:
+        budget_started = time.monotonic()
+        try:
+            await _wait_for_budget(estimated_tokens, force=is_crisis, deadline=deadline)
+        except LLMAdmissionError:
+            LLM_ADMISSION_REJECTED.labels(priority).inc()
+            raise
+        charged = True
+        LLM_ADMISSION_WAIT_SECONDS.labels(priority, "rate_limit").observe(time.monotonic() - budget_started)
+
+        ticket.wait_seconds = time.monotonic() - started
+        if ticket.wait_seconds > 1:
+            logger.info(f"⏳ LLM {priority} turn waited {ticket.wait_ms}ms for admission")
+        yield ticket
+    finally:
+        _limiter.release()
+        if charged:
+            # Chạy hết cả khi lượt bị hủy (client ngắt stream): không mất token
+            await asyncio.shield(ticket._refund())
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'LLMAdmissionError',
+    'PriorityLimiter',
+    'AdmissionTicket',
+    'llm_admission',
+    'refund_tokens'
+]
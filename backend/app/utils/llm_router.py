@@ -0,0 +1,584 @@
+# ============================================
+# LLM ROUTER (failover, circuit breakers, hedging)
+# File: backend/app/utils/llm_router.py
+# ============================================
+
+import os
+import abc
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from app.utils.metrics import (
+    LLM_REQUESTS,
+    LLM_REQUEST_SECONDS,
+    LLM_CIRCUIT_STATE,
+    LLM_HEDGED_REQUESTS
+)
+from app.utils.health_metrics import observe_llm
+
+try:
+    from openai import AsyncOpenAI
+except ImportError:
+    AsyncOpenAI = None
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# "priority": theo thứ tự LLM_BACKENDS; "latency": backend có median thấp nhất trước
+LLM_ROUTING = os.getenv("LLM_ROUTING", "priority").lower()
+# Gửi thêm request tới backend kế tiếp khi backend đầu chưa trả lời sau p95 của nó
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+# Số mẫu latency giữ lại cho mỗi backend (p50 / p95)
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+LLM_LATENCY_MIN_SAMPLES = int(os.getenv("LLM_LATENCY_MIN_SAMPLES", "20"))
+# Circuit breaker: mở sau N lỗi liên tiếp, thử lại (half-open) sau N giây
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+
+class LLMUnavailableError(Exception):
+    """No backend could answer (all failed or all circuits open)"""
+
+
+def _describe(error: Exception) -> str:
+    """Short error text for logs (timeouts have an empty str())"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"{error.response.status_code} - {error.response.text[:200]}"
+    return str(error) or type(error).__name__
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class LLMBackend(abc.ABC):
+    """
+    One chat completion provider
+
+    complete() returns {"text", "tokens_used", "model"}; stream() yields
+    {"type": "delta", "content"} chunks then one {"type": "usage",
+    "tokens_used", "model"}. Errors are raised, the router handles them.
+    """
+
+    def __init__(self, name: str, model: str, timeout: float):
+        self.name = name
+        self.model = model
+        self.timeout = timeout
+
+    @abc.abstractmethod
+    async def complete(self, messages: List[Dict], options: Dict) -> Dict:
+        ...
+
+    @abc.abstractmethod
+    def stream(self, messages: List[Dict], options: Dict) -> AsyncIterator[Dict]:
+        ...
+
+    async def aclose(self):
+        pass
+
+
+class HTTPChatBackend(LLMBackend):
+    """
+    OpenAI-compatible /chat/completions over a pooled httpx client (Groq)
+
+    shared_client returns the app-lifetime pool when it is open; outside
+    the app (scripts) a private client is built on first use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        api_key: str,
+        shared_client: Callable[[], Optional[httpx.AsyncClient]],
+        build_client: Callable[[], httpx.AsyncClient],
+        timeout: float
+    ):
+        super().__init__(name, model, timeout)
+        # Auth gửi theo từng request để client dùng chung không gắn với 1 key
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self._shared_client = shared_client
+        self._build_client = build_client
+        self._own_client: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        client = self._shared_client()
+        if client is not None:
+            return client
+        if self._own_client is None or self._own_client.is_closed:
+            self._own_client = self._build_client()
+        return self._own_client
+
+    def _payload(self, messages: List[Dict], options: Dict, stream: bool) -> Dict:
+        payload = {"model": self.model, "messages": messages, "stream": stream, **options}
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    async def complete(self, messages: List[Dict], options: Dict) -> Dict:
+        response = await self._client().post(
+            "/chat/completions",
+            headers=self.headers,
+            json=self._payload(messages, options, stream=False)
+        )
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "text": data["choices"][0]["message"]["content"],
+            "tokens_used": data.get("usage", {}).get("total_tokens", 0),
+            "model": self.model
+        }
+
+    async def stream(self, messages: List[Dict], options: Dict) -> AsyncIterator[Dict]:
+        tokens_used = 0
+        async with self._client().stream(
+            "POST",
+            "/chat/completions",
+            headers=self.headers,
+            json=self._payload(messages, options, stream=True)
+        ) as response:
+            if response.is_error:
+                await response.aread()
+            response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+
+                chunk = json.loads(payload)
+                usage = chunk.get("usage") or chunk.get("x_groq", {}).get("usage")
+                if usage:
+                    tokens_used = usage.get("total_tokens", tokens_used)
+
+                for choice in chunk.get("choices", []):
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        yield {"type": "delta", "content": content}
+
+        yield {"type": "usage", "tokens_used": tokens_used, "model": self.model}
+
+    async def aclose(self):
+        if self._own_client is not None:
+            await self._own_client.aclose()
+            self._own_client = None
+
+
+class OpenAIBackend(LLMBackend):
+    """Any OpenAI-compatible endpoint through the openai SDK (retries left to the router)"""
+
+    def __init__(self, name: str, model: str, api_key: str, base_url: Optional[str], timeout: float):
+        super().__init__(name, model, timeout)
+        if AsyncOpenAI is None:
+            raise RuntimeError("openai package is not installed")
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+
+    async def complete(self, messages: List[Dict], options: Dict) -> Dict:
+        response = await self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=False, **options
+        )
+        return {
+            "text": response.choices[0].message.content or "",
+            "tokens_used": response.usage.total_tokens if response.usage else 0,
+            "model": self.model
+        }
+
+    async def stream(self, messages: List[Dict], options: Dict) -> AsyncIterator[Dict]:
+        tokens_used = 0
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **options
+        )
+        # Đóng response HTTP khi router hủy / aclose() giữa chừng
+        async with stream:
+            async for chunk in stream:
+                if chunk.usage:
+                    tokens_used = chunk.usage.total_tokens
+                for choice in chunk.choices:
+                    if choice.delta and choice.delta.content:
+                        yield {"type": "delta", "content": choice.delta.content}
+
+        yield {"type": "usage", "tokens_used": tokens_used, "model": self.model}
+
+    async def aclose(self):
+        await self.client.close()
+
+
+class StubBackend(LLMBackend):
+    """Local canned backend for tests and load runs (no network)"""
+
+    def __init__(
+        self,
+        name: str = "stub",
+        response: str = "Mình đang lắng nghe bạn. Bạn có thể kể thêm được không?",
+        delay: float = 0.05,
+        failure_rate: float = 0.0
+    ):
+        super().__init__(name, "stub", timeout=max(delay * 10, 1.0))
+        self.response = response
+        self.delay = delay
+        self.failure_rate = failure_rate
+
+    def _maybe_fail(self):
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("stub backend failure")
+
+    async def complete(self, messages: List[Dict], options: Dict) -> Dict:
+        await asyncio.sleep(self.delay)
+        self._maybe_fail()
+        return {"text": self.response, "tokens_used": len(self.response.split()), "model": self.model}
+
+    async def stream(self, messages: List[Dict], options: Dict) -> AsyncIterator[Dict]:
+        words = self.response.split(" ")
+        await asyncio.sleep(self.delay)
+        self._maybe_fail()
+        for i, word in enumerate(words):
+            yield {"type": "delta", "content": word if i == 0 else f" {word}"}
+        yield {"type": "usage", "tokens_used": len(words), "model": self.model}
+
+
+# ============================================
+# HEALTH TRACKING
+# ============================================
+
+class CircuitBreaker:
+    """
+    closed → open after N consecutive failures → half-open after reset_timeout
+
+    Half-open lets a single probe request through; its outcome closes or
+    re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def available(self) -> bool:
+        """Could a request go through now (does not take the probe slot)"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self._opened_at >= self.reset_timeout
+        return not self._probing
+
+    def allow(self) -> bool:
+        """Take permission for one request"""
+        if self.state == self.CLOSED:
+            return True
+        if not self.available():
+            return False
+        self.state = self.HALF_OPEN
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self):
+        """Request abandoned without an outcome (hedge loser)"""
+        self._probing = False
+
+
+class LatencyTracker:
+    """Sliding window of request durations (seconds)"""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile, None until LLM_LATENCY_MIN_SAMPLES samples exist"""
+        if len(self._samples) < LLM_LATENCY_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class _BackendState:
+    """A backend with its breaker and latency window"""
+
+    _STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.OPEN: 1, CircuitBreaker.HALF_OPEN: 2}
+
+    def __init__(self, backend: LLMBackend):
+        self.backend = backend
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+
+    @property
+    def name(self) -> str:
+        return self.backend.name
+
+    def publish_state(self):
+        LLM_CIRCUIT_STATE.labels(self.name).set(self._STATE_VALUES[self.breaker.state])
+
+    def hedge_delay(self) -> Optional[float]:
+        p95 = self.latency.percentile(0.95)
+        return None if p95 is None else max(p95, LLM_HEDGE_MIN_DELAY)
+
+
+# ============================================
+# ROUTER
+# ============================================
+
+class LLMRouter:
+    """
+    Ordered failover across backends
+
+    - Backends with an open circuit are skipped.
+    - Crisis turns (fastest=True) go to the lowest-median healthy backend.
+    - With hedging, complete() starts the next backend once the current
+      one exceeds its own p95, and keeps whichever answers first.
+    - stream() fails over only before the first token: a reply is never
+      stitched together from two models.
+    """
+
+    def __init__(self, backends: List[LLMBackend], routing: str = LLM_ROUTING, hedge: bool = LLM_HEDGE):
+        self._states = [_BackendState(backend) for backend in backends]
+        self.routing = routing
+        self.hedge = hedge
+        for state in self._states:
+            state.publish_state()
+
+    @property
+    def backends(self) -> List[LLMBackend]:
+        return [state.backend for state in self._states]
+
+    def _ordered(self, fastest: bool = False) -> List[_BackendState]:
+        states = [state for state in self._states if state.breaker.available()]
+        if fastest or self.routing == "latency":
+            # Chưa đủ mẫu: xếp sau, giữ thứ tự cấu hình (sort ổn định)
+            def median(state):
+                value = state.latency.percentile(0.5)
+                return float("inf") if value is None else value
+            states.sort(key=median)
+        return states
+
+    def _finish(self, state: _BackendState, started: float, error: Optional[Exception] = None):
+        elapsed = time.monotonic() - started
+        LLM_REQUEST_SECONDS.labels(state.name).observe(elapsed)
+        if error is None:
+            state.latency.observe(elapsed)
+            observe_llm(elapsed)
+            state.breaker.record_success()
+            LLM_REQUESTS.labels(state.name, "ok").inc()
+        else:
+            state.breaker.record_failure()
+            LLM_REQUESTS.labels(state.name, "error").inc()
+            logger.error(f"LLM backend {state.name} failed: {_describe(error)}")
+        state.publish_state()
+
+    async def _attempt(self, state: _BackendState, messages: List[Dict], options: Dict) -> Dict:
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                state.backend.complete(messages, options), state.backend.timeout
+            )
+        except asyncio.CancelledError:
+            # Thua trong hedge: không tính là lỗi của backend
+            state.breaker.release()
+            LLM_REQUESTS.labels(state.name, "cancelled").inc()
+            raise
+        except Exception as e:
+            self._finish(state, started, e)
+            raise
+        self._finish(state, started)
+        return {**result, "backend": state.name}
+
+    async def complete(
+        self,
+        messages: List[Dict],
+        options: Dict,
+        fastest: bool = False,
+        on_hedge: Optional[Callable[[], None]] = None
+    ) -> Dict:
+        """
+        Chat completion from the first backend that answers
+
+        on_hedge: called for every hedged duplicate request sent (so the
+        caller can charge it to its rate limits)
+
+        Raises:
+            LLMUnavailableError: every candidate failed or was unavailable
+        """
+        candidates = self._ordered(fastest)
+        if self.hedge and len(candidates) > 1:
+            return await self._complete_hedged(candidates, messages, options, on_hedge)
+
+        errors = []
+        for state in candidates:
+            if not state.breaker.allow():
+                continue
+            try:
+                return await self._attempt(state, messages, options)
+            except Exception as e:
+                errors.append(f"{state.name}: {_describe(e)}")
+        raise LLMUnavailableError("; ".join(errors) or "no healthy LLM backend")
+
+    async def _complete_hedged(
+        self,
+        candidates: List[_BackendState],
+        messages: List[Dict],
+        options: Dict,
+        on_hedge: Optional[Callable[[], None]] = None
+    ) -> Dict:
+        remaining = iter(candidates)
+        running: Dict[asyncio.Task, _BackendState] = {}
+        errors = []
+        last: Optional[_BackendState] = None
+
+        def launch() -> bool:
+            nonlocal last
+            for state in remaining:
+                if state.breaker.allow():
+                    running[asyncio.create_task(self._attempt(state, messages, options))] = state
+                    last = state
+                    return True
+            return False
+
+        launch()
+        try:
+            while running:
+                delay = last.hedge_delay() if last is not None else None
+                done, _ = await asyncio.wait(
+                    running, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Quá p95 của backend vừa gửi: gửi song song tới backend kế tiếp
+                    if launch():
+                        LLM_HEDGED_REQUESTS.labels(last.name).inc()
+                        if on_hedge is not None:
+                            on_hedge()
+                    else:
+                        last = None  # hết backend, chỉ còn chờ
+                    continue
+
+                for task in done:
+                    state = running.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(f"{state.name}: {_describe(task.exception())}")
+                if not running:
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        raise LLMUnavailableError("; ".join(errors) or "no healthy LLM backend")
+
+    async def stream(self, messages: List[Dict], options: Dict, fastest: bool = False) -> AsyncIterator[Dict]:
+        """
+        Stream from the first backend that produces a token
+
+        Raises:
+            LLMUnavailableError: no backend produced a first token
+            Exception: the backend failed after tokens were already sent
+        """
+        errors = []
+        for state in self._ordered(fastest):
+            if not state.breaker.allow():
+                continue
+
+            started = time.monotonic()
+            events = state.backend.stream(messages, options).__aiter__()
+            try:
+                try:
+                    # Thời gian chờ token đầu tiên theo timeout của backend
+                    first = await asyncio.wait_for(events.__anext__(), state.backend.timeout)
+                except StopAsyncIteration:
+                    self._finish(state, started)
+                    return
+                except Exception as e:
+                    self._finish(state, started, e)
+                    errors.append(f"{state.name}: {_describe(e)}")
+                    continue
+
+                try:
+                    yield {**first, "backend": state.name}
+                    async for event in events:
+                        yield {**event, "backend": state.name}
+                except Exception as e:
+                    self._finish(state, started, e)
+                    raise
+                except BaseException:
+                    # Client ngắt kết nối giữa chừng: không phải lỗi của backend
+                    state.breaker.release()
+                    raise
+                self._finish(state, started)
+                return
+            finally:
+                await events.aclose()
+
+        raise LLMUnavailableError("; ".join(errors) or "no healthy LLM backend")
+
+    def health(self) -> List[Dict]:
+        """Breaker state and latency of every backend (status endpoints)"""
+        return [
+            {
+                "backend": state.name,
+                "model": state.backend.model,
+                "circuit": state.breaker.state,
+                "p50_seconds": state.latency.percentile(0.5),
+                "p95_seconds": state.latency.percentile(0.95)
+            }
+            for state in self._states
+        ]
+
+    async def aclose(self):
+        for state in self._states:
+            try:
+                await state.backend.aclose()
+            except Exception as e:
+                logger.warning(f"⚠️  Closing LLM backend {state.name} failed: {e}")
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'LLMUnavailableError',
+    'LLMBackend',
+    'HTTPChatBackend',
+    'OpenAIBackend',
+    'StubBackend',
+    'CircuitBreaker',
+    'LatencyTracker',
+    'LLMRouter'
+]
@@ -0,0 +1,282 @@
+# ============================================
+# PROMETHEUS METRICS
+# File: backend/app/utils/metrics.py
+# ============================================
+
+import os
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+
+# Tất cả metric của ứng dụng được khai báo tại đây (một registry, không trùng tên)
+
+# ============================================
+# MULTI-PROCESS MODE
+# ============================================
+# Nhiều worker (gunicorn / uvicorn --workers): mỗi process ghi metric vào file
+# mmap trong PROMETHEUS_MULTIPROC_DIR, /metrics gộp file của mọi worker.
+# Biến này phải có trước khi prometheus_client được import (đặt trong môi
+# trường, không phải trong .env), và thư mục phải rỗng khi khởi động
+# (gunicorn.conf.py xóa sẵn trong on_starting).
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# ============================================
+# WORKER POOL (CPU-bound offload)
+# ============================================
+
+EXECUTOR_TASKS_IN_FLIGHT = Gauge(
+    "executor_tasks_in_flight",
+    "Tasks submitted to the worker pool and not finished yet (queued + running)",
+    ["kind"],
+    multiprocess_mode="livesum"
+)
+
+EXECUTOR_QUEUE_WAIT_SECONDS = Histogram(
+    "executor_queue_wait_seconds",
+    "Time a task waited for a free worker",
+    ["kind"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+EXECUTOR_TASK_SECONDS = Histogram(
+    "executor_task_seconds",
+    "Run time of a task inside the worker pool",
+    ["kind", "task"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+EXECUTOR_TASK_ERRORS = Counter(
+    "executor_task_errors_total",
+    "Tasks that raised inside the worker pool",
+    ["kind", "task"]
+)
+
+
+# ============================================
+# SESSION CACHE
+# ============================================
+
+SESSION_CACHE_LOOKUPS = Counter(
+    "session_cache_lookups_total",
+    "Session token lookups by cache tier that answered (local_hit, redis_hit, miss)",
+    ["result"]
+)
+
+
+# ============================================
+# SESSION ACTIVITY WRITE-BEHIND
+# ============================================
+
+ACTIVITY_BUFFER_PENDING = Gauge(
+    "activity_buffer_pending",
+    "Sessions with last_activity waiting for the next bulk flush",
+    multiprocess_mode="livesum"
+)
+
+ACTIVITY_FLUSHED_ROWS = Counter(
+    "activity_flushed_rows_total",
+    "Session rows written by bulk last_activity flushes"
+)
+
+ACTIVITY_FLUSH_ERRORS = Counter(
+    "activity_flush_errors_total",
+    "Bulk last_activity flushes that failed (entries kept for retry)"
+)
+
+
+# ============================================
+# BACKGROUND TASK QUEUE
+# ============================================
+
+BACKGROUND_QUEUE_DEPTH = Gauge(
+    "background_queue_depth",
+    "Tasks waiting in the in-process background queue",
+    multiprocess_mode="livesum"
+)
+
+BACKGROUND_TASKS = Counter(
+    "background_tasks_total",
+    "Background tasks by outcome (ok, error, dropped)",
+    ["task", "status"]
+)
+
+BACKGROUND_TASK_SECONDS = Histogram(
+    "background_task_seconds",
+    "Run time of a background task",
+    ["task"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+# ============================================
+# LLM ROUTER
+# ============================================
+
+LLM_REQUESTS = Counter(
+    "llm_requests_total",
+    "LLM backend attempts by outcome (ok, error, cancelled)",
+    ["backend", "outcome"]
+)
+
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds",
+    "Duration of an LLM backend attempt (full reply, or full stream)",
+    ["backend"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0)
+)
+
+LLM_CIRCUIT_STATE = Gauge(
+    "llm_circuit_state",
+    "Circuit breaker state per LLM backend (0 closed, 1 open, 2 half-open; highest across workers)",
+    ["backend"],
+    multiprocess_mode="livemax"
+)
+
+LLM_HEDGED_REQUESTS = Counter(
+    "llm_hedged_requests_total",
+    "Hedge requests started because the previous backend passed its p95",
+    ["backend"]
+)
+
+
+# ============================================
+# LLM ADMISSION CONTROL
+# ============================================
+
+LLM_CALLS_IN_FLIGHT = Gauge(
+    "llm_calls_in_flight",
+    "LLM turns holding a slot of a worker's admission semaphore",
+    multiprocess_mode="livesum"
+)
+
+LLM_ADMISSION_QUEUE_DEPTH = Gauge(
+    "llm_admission_queue_depth",
+    "LLM turns waiting for a slot, by priority (crisis, normal)",
+    ["priority"],
+    multiprocess_mode="livesum"
+)
+
+LLM_ADMISSION_WAIT_SECONDS = Histogram(
+    "llm_admission_wait_seconds",
+    "Time a turn waited before its LLM call (slot = local semaphore, rate_limit = global bucket)",
+    ["priority", "stage"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+)
+
+LLM_ADMISSION_REJECTED = Counter(
+    "llm_admission_rejected_total",
+    "LLM turns answered with the fallback because they were not admitted",
+    ["priority"]
+)
+
+
+# ============================================
+# LLM RESPONSE CACHE
+# ============================================
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "response_cache_lookups_total",
+    "Chat turns by response cache outcome (hit, coalesced, miss, bypass)",
+    ["result"]
+)
+
+
+# ============================================
+# HTTP & CHAT PIPELINE
+# ============================================
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "Request latency by route template (streaming responses: until headers are sent)",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+CHAT_STAGE_SECONDS = Histogram(
+    "chat_stage_seconds",
+    "Time spent in each stage of a chat request",
+    ["endpoint", "stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+LLM_TOKENS_USED = Counter(
+    "llm_tokens_used_total",
+    "Tokens reported by the LLM for stored replies (cached replies count 0)",
+    ["model"]
+)
+
+
+# ============================================
+# DATABASE POOLS
+# ============================================
+
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Connection pool state (size, checked_out, checked_in, overflow), summed across workers",
+    ["engine", "state"],
+    multiprocess_mode="livesum"
+)
+
+
+# ============================================
+# REGISTRY (/metrics)
+# ============================================
+
+def metrics_registry():
+    """
+    Registry served at /metrics
+
+    Single process: the default registry. Multi-process: a fresh registry
+    collecting the files of every worker, so any worker answers a scrape
+    with the totals of all of them.
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def mark_worker_dead(pid: int = None):
+    """
+    Drop the live gauges of an exited worker (its counters are kept)
+
+    Args:
+        pid: Worker process id (default: the current process)
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'PROMETHEUS_MULTIPROC_DIR',
+    'metrics_registry',
+    'mark_worker_dead',
+    'EXECUTOR_TASKS_IN_FLIGHT',
+    'EXECUTOR_QUEUE_WAIT_SECONDS',
+    'EXECUTOR_TASK_SECONDS',
+    'EXECUTOR_TASK_ERRORS',
+    'SESSION_CACHE_LOOKUPS',
+    'ACTIVITY_BUFFER_PENDING',
+    'ACTIVITY_FLUSHED_ROWS',
+    'ACTIVITY_FLUSH_ERRORS',
+    'BACKGROUND_QUEUE_DEPTH',
+    'BACKGROUND_TASKS',
+    'BACKGROUND_TASK_SECONDS',
+    'LLM_REQUESTS',
+    'LLM_REQUEST_SECONDS',
+    'LLM_CIRCUIT_STATE',
+    'LLM_HEDGED_REQUESTS',
+    'LLM_CALLS_IN_FLIGHT',
+    'LLM_ADMISSION_QUEUE_DEPTH',
+    'LLM_ADMISSION_WAIT_SECONDS',
+    'LLM_ADMISSION_REJECTED',
+    'RESPONSE_CACHE_LOOKUPS',
+    'HTTP_REQUEST_SECONDS',
+    'CHAT_STAGE_SECONDS',
+    'LLM_TOKENS_USED',
+    'DB_POOL_CONNECTIONS'
+]
@@ -0,0 +1,150 @@
+# ============================================
+# CONTENT MODERATION ENGINE
+# File: backend/app/utils/moderation.py
+# ============================================
+
+import logging
+import re
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Ký tự được giữ lại khi chuẩn hóa (chữ, số, khoảng trắng, tiếng Việt có dấu)
+_PUNCTUATION_RE = re.compile(
+    r'[^\w\sáàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]'
+)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(message: str) -> str:
+    """
+    Chuẩn hóa tin nhắn để tăng độ chính xác phát hiện
+    - Loại bỏ dấu câu
+    - Chuẩn hóa khoảng trắng
+    - Giữ nguyên tiếng Việt có dấu
+    """
+    if not message:
+        return ""
+    normalized = _PUNCTUATION_RE.sub(' ', message.lower())
+    return _WHITESPACE_RE.sub(' ', normalized).strip()
+
+
+# ============================================
+# MODERATION RESULT
+# ============================================
+
+class ModerationResult:
+    """
+    Result of a single moderation pass over one message
+
+    Attributes:
+        normalized: Normalized message text (reused by CrisisDetector)
+        hits: Every matched rule: {'kind', 'nhom', 'tu_khoa', 'index'}
+    """
+
+    def __init__(self, normalized: str, hits: List[Dict]):
+        self.normalized = normalized
+        self.hits = hits
+
+    @property
+    def violations(self) -> List[Dict]:
+        return [hit for hit in self.hits if hit['kind'] == 'violation']
+
+    @property
+    def crisis_hits(self) -> List[Dict]:
+        return [hit for hit in self.hits if hit['kind'] == 'crisis']
+
+    @property
+    def is_crisis(self) -> bool:
+        return any(hit['kind'] == 'crisis' for hit in self.hits)
+
+    @property
+    def violation_group(self) -> Optional[str]:
+        """Group of the first violation rule in list order (None if clean)"""
+        violations = self.violations
+        if not violations:
+            return None
+        return min(violations, key=lambda hit: hit['index'])['nhom']
+
+
+# ============================================
+# MODERATION ENGINE
+# ============================================
+
+class ModerationEngine:
+    """
+    Single-pass scanner for violation and crisis keyword rules
+
+    All rule regexes are compiled at construction into one lookahead
+    alternation with a named group per rule, so one finditer() over the
+    normalized message reports every start position that matches some
+    rule. At those (rare) positions the remaining rules are also tried,
+    so overlapping hits from different groups are never lost.
+    """
+
+    def __init__(self, violation_items: List[Dict], crisis_items: List[Dict]):
+        self._rules: List[Dict] = []
+
+        # Crisis rules first: ưu tiên an toàn khi nhiều rule khớp cùng vị trí
+        for kind, items in (('crisis', crisis_items), ('violation', violation_items)):
+            for index, item in enumerate(items):
+                try:
+                    compiled = re.compile(item["regex"], re.I | re.U)
+                except re.error as e:
+                    logger.error(f"Regex error for keyword {item['tu_khoa']}: {e}")
+                    continue
+                self._rules.append({
+                    'kind': kind,
+                    'nhom': item["nhom"],
+                    'tu_khoa': item["tu_khoa"],
+                    'index': index,
+                    'pattern': compiled
+                })
+
+        self._pattern = None
+        if self._rules:
+            alternation = '|'.join(
+                f'(?P<r{i}>{rule["pattern"].pattern})' for i, rule in enumerate(self._rules)
+            )
+            self._pattern = re.compile(f'(?=(?:{alternation}))', re.I | re.U)
+
+        logger.info(
+            f"✅ Moderation engine compiled: "
+            f"{sum(1 for r in self._rules if r['kind'] == 'violation')} violation rules, "
+            f"{sum(1 for r in self._rules if r['kind'] == 'crisis')} crisis rules"
+        )
+
+    def scan(self, message: str) -> ModerationResult:
+        """Normalize once and scan all rules"""
+        return self.scan_normalized(normalize_text(message))
+
+    def scan_normalized(self, normalized: str) -> ModerationResult:
+        """Scan an already-normalized message"""
+        if self._pattern is None or not normalized:
+            return ModerationResult(normalized, [])
+
+        matched = set()
+        for match in self._pattern.finditer(normalized):
+            first = int(match.lastgroup[1:])
+            matched.add(first)
+            position = match.start()
+            for i in range(first + 1, len(self._rules)):
+                if i not in matched and self._rules[i]['pattern'].match(normalized, position):
+                    matched.add(i)
+
+        hits = [
+            {key: self._rules[i][key] for key in ('kind', 'nhom', 'tu_khoa', 'index')}
+            for i in sorted(matched)
+        ]
+        return ModerationResult(normalized, hits)
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'normalize_text',
+    'ModerationResult',
+    'ModerationEngine'
+]
@@ -2,9 +2,15 @@
 # File: backend/app/utils/monitoring.py
 # ***************************************************
 
+import time
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 
+from app.utils.background import register_task
+from app.utils.metrics import HTTP_REQUEST_SECONDS, CHAT_STAGE_SECONDS, LLM_TOKENS_USED
+from app.utils import health_metrics
+
 # Tạo logger instance
 logger = logging.getLogger(__name__)
 
@@ -139,6 +145,39 @@ class ComplianceLogger:
 # HELPER FUNCTIONS (OPTIONAL)
 # ============================================
 
+def observe_api_request(route: str, method: str, status_code: int, duration_s: float):
+    """
+    Record request latency in Prometheus and the health metrics (no log line)
+    
+    Args:
+        route: Route template ("/api/v1/messages/{message_id}"), never the
+            raw path, so label cardinality stays bounded
+        method: HTTP method
+        status_code: HTTP status code
+        duration_s: Thời gian xử lý (seconds)
+    """
+    HTTP_REQUEST_SECONDS.labels(method, route, str(status_code)).observe(duration_s)
+    health_metrics.observe_request(duration_s)
+
+
+@contextmanager
+def track_stage(endpoint: str, stage: str):
+    """
+    Time one stage of a chat request into chat_stage_seconds
+    
+    Usage:
+        with track_stage("send", "crisis_detection"):
+            ...
+    
+    The time is recorded even if the stage raises.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        CHAT_STAGE_SECONDS.labels(endpoint, stage).observe(time.perf_counter() - started)
+
+
 def log_api_request(endpoint: str, method: str, status_code: int, duration_ms: float):
     """
     Ghi log API request (general purpose)
@@ -149,6 +188,8 @@ def log_api_request(endpoint: str, method: str, status_code: int, duration_ms: f
         status_code: HTTP status code
         duration_ms: Thời gian xử lý (milliseconds)
     """
+    observe_api_request(endpoint, method, status_code, duration_ms / 1000)
+    
     log_data = {
         "event": "API_REQUEST",
         "endpoint": endpoint,
@@ -166,7 +207,13 @@ def log_api_request(endpoint: str, method: str, status_code: int, duration_ms: f
         logger.info(f"✅ API SUCCESS: {log_data}")
 
 
-def log_ai_processing(session_id: str, model: str, tokens_used: int, processing_time_ms: float):
+def log_ai_processing(
+    session_id: str,
+    model: str,
+    tokens_used: int,
+    processing_time_ms: float,
+    queue_wait_ms: float = 0
+):
     """
     Ghi log AI processing (không có nội dung tin nhắn)
     
@@ -174,7 +221,8 @@ def log_ai_processing(session_id: str, model: str, tokens_used: int, processing_
         session_id: ID phiên chat
         model: Model AI được sử dụng
         tokens_used: Số tokens đã dùng
-        processing_time_ms: Thời gian xử lý
+        processing_time_ms: Thời gian xử lý (bao gồm thời gian chờ hàng đợi)
+        queue_wait_ms: Thời gian chờ được gọi LLM (hàng đợi + rate limit)
     """
     log_data = {
         "event": "AI_PROCESSING",
@@ -182,17 +230,34 @@ def log_ai_processing(session_id: str, model: str, tokens_used: int, processing_
         "model": model,
         "tokens_used": tokens_used,
         "processing_time_ms": processing_time_ms,
+        "queue_wait_ms": queue_wait_ms,
         "timestamp": datetime.utcnow().isoformat()
     }
+    if tokens_used:
+        LLM_TOKENS_USED.labels(model).inc(tokens_used)
+        health_metrics.add_llm_tokens(tokens_used)
     logger.info(f"🤖 AI PROCESSING: {log_data}")
 
 
+# ============================================
+# BACKGROUND TASKS (enqueue() from request handlers)
+# ============================================
+
+register_task("compliance.crisis_detected", ComplianceLogger.log_crisis_detection)
+register_task("compliance.violation", ComplianceLogger.log_violation)
+register_task("compliance.message_sent", ComplianceLogger.log_message_sent)
+register_task("compliance.session_created", ComplianceLogger.log_session_created)
+register_task("analytics.ai_processing", log_ai_processing)
+
+
 # ============================================
 # EXPORT
 # ============================================
 
 __all__ = [
     'ComplianceLogger',
+    'observe_api_request',
+    'track_stage',
     'log_api_request',
     'log_ai_processing'
 ]
\ No newline at end of file
@@ -0,0 +1,112 @@
+# ============================================
+# KEYSET (CURSOR) PAGINATION
+# File: backend/app/utils/pagination.py
+# ============================================
+
+import json
+import base64
+import binascii
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, or_, text
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# CURSORS
+# ============================================
+# Cursor = vị trí (created_at, id) của dòng cuối trang trước, mã hóa base64
+# để client coi như chuỗi mờ (không tự tạo / sửa).
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Opaque cursor pointing at one row"""
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Position of a cursor produced by encode_cursor()
+
+    Raises:
+        ValueError: Malformed cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def after_cursor(created_col, id_col, cursor: Tuple[datetime, UUID], descending: bool = False):
+    """
+    WHERE clause for rows after a cursor in (created_at, id) order
+
+    The redundant created_at bound keeps it an index range scan on
+    created_at (e.g. idx_session_messages after the session_id prefix).
+    """
+    created_at, row_id = cursor
+    if descending:
+        return and_(
+            created_col <= created_at,
+            or_(created_col < created_at, and_(created_col == created_at, id_col < row_id))
+        )
+    return and_(
+        created_col >= created_at,
+        or_(created_col > created_at, and_(created_col == created_at, id_col > row_id))
+    )
+
+
+def next_cursor(rows, limit: int) -> Optional[str]:
+    """Cursor of the last row if the page is full (None = no more rows)"""
+    if len(rows) < limit or not rows:
+        return None
+    return encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+# ============================================
+# APPROXIMATE TOTALS
+# ============================================
+
+def approximate_table_rows(db, table: str) -> int:
+    """
+    Row count estimate from pg_class.reltuples (kept by ANALYZE / autovacuum)
+
+    O(1) regardless of table size; -1 (never analyzed) is returned as 0.
+    """
+    value = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+        {"table": table}
+    ).scalar()
+    return max(int(value or 0), 0)
+
+
+def estimate_query_rows(db, query) -> int:
+    """
+    Planner row estimate of a filtered query (EXPLAIN, nothing is executed)
+    """
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'encode_cursor',
+    'decode_cursor',
+    'after_cursor',
+    'next_cursor',
+    'approximate_table_rows',
+    'estimate_query_rows'
+]
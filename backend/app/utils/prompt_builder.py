@@ -0,0 +1,174 @@
+# ============================================
+# PROMPT BUILDER (TOKEN BUDGET)
+# File: backend/app/utils/prompt_builder.py
+# ============================================
+
+import os
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Ngân sách token cho phần input (system + context + history + user)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+# Giới hạn riêng cho đoạn KNOWLEDGE_BASE chèn vào system prompt
+PROMPT_CONTEXT_TOKEN_BUDGET = int(os.getenv("PROMPT_CONTEXT_TOKEN_BUDGET", "1200"))
+# Ước lượng ký tự / token (tiếng Việt có dấu với tokenizer Llama 3 ~ 3)
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "3"))
+
+# Chi phí cố định của mỗi message trong chat template (role, delimiters)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+CONTEXT_HEADER = (
+    "\n\n[CONTEXT TỪ DỮ LIỆU CƠ SỞ]\n"
+    "BẠN PHẢI SỬ DỤNG THÔNG TIN SAU ĐÂY ĐỂ TRẢ LỜI: \n"
+)
+CONTEXT_FOOTER = "\n[KẾT THÚC CONTEXT]"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text
+
+    Groq does not expose the Llama tokenizer, so a chars-per-token ratio
+    is used; it only has to be good enough to keep prompts in budget.
+    """
+    if not text:
+        return 0
+    return int(len(text) / PROMPT_CHARS_PER_TOKEN) + 1
+
+
+def message_tokens(message: Dict) -> int:
+    """Estimated tokens of one chat message including template overhead"""
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a text to at most max_tokens, on paragraph boundaries when possible
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    kept = []
+    used = 0
+    for paragraph in text.split("\n\n"):
+        cost = estimate_tokens(paragraph) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(paragraph)
+        used += cost
+
+    if kept:
+        return "\n\n".join(kept)
+    # Đoạn đầu tiên đã quá dài: cắt theo ký tự
+    return text[:int(max_tokens * PROMPT_CHARS_PER_TOKEN)]
+
+
+# ============================================
+# PROMPT BUILDER
+# ============================================
+
+class PromptBuilder:
+    """
+    Assemble chat messages within a token budget
+
+    The base and crisis system prompts are rendered and token-counted once
+    at construction; base + retrieved-context variants are rendered on
+    first use and kept in an LRU cache (the same knowledge chunks are
+    retrieved for many messages). Per turn only history trimming is left:
+    the newest messages are kept until the budget is spent.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        crisis_prompt: str,
+        token_budget: int = PROMPT_TOKEN_BUDGET,
+        context_token_budget: int = PROMPT_CONTEXT_TOKEN_BUDGET,
+        cache_size: int = 256
+    ):
+        self.token_budget = token_budget
+        self.context_token_budget = context_token_budget
+        self._system_prompt = system_prompt
+        self._base = self._render(system_prompt)
+        self._crisis = self._render(crisis_prompt)
+        self._with_context = lru_cache(maxsize=cache_size)(self._render_with_context)
+
+        logger.info(
+            f"✅ Prompt builder ready: base={self._base['tokens']} tokens, "
+            f"budget={token_budget} tokens"
+        )
+
+    @staticmethod
+    def _render(content: str) -> Dict:
+        message = {"role": "system", "content": content}
+        return {"message": message, "tokens": message_tokens(message)}
+
+    def _render_with_context(self, context: str) -> Dict:
+        context = trim_to_tokens(context, self.context_token_budget)
+        return self._render(self._system_prompt + CONTEXT_HEADER + context + CONTEXT_FOOTER)
+
+    def system_message(self, context: Optional[str] = None, is_crisis: bool = False) -> Dict:
+        """System message (and its token count) for a retrieved context"""
+        if is_crisis:
+            return self._crisis
+        if not context:
+            return self._base
+        return self._with_context(context)
+
+    def build(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict]] = None,
+        context: Optional[str] = None,
+        is_crisis: bool = False,
+        history_limit: int = 10
+    ) -> List[Dict]:
+        """
+        Build the messages list for /chat/completions
+
+        Args:
+            user_message: Current user message
+            conversation_history: Previous messages, oldest first
+            context: Retrieved knowledge text to include (None = no context)
+            is_crisis: Use the crisis prompt (no knowledge context)
+            history_limit: Max number of history messages
+
+        Returns:
+            [system, *history, user] within the token budget
+        """
+        system = self.system_message(context, is_crisis)
+        user = {"role": "user", "content": user_message}
+        remaining = self.token_budget - system["tokens"] - message_tokens(user)
+
+        # Giữ tin nhắn gần nhất trước, bỏ dần tin cũ khi vượt ngân sách
+        candidates = (conversation_history or [])[-history_limit:] if history_limit > 0 else []
+        history = []
+        for message in reversed(candidates):
+            cost = message_tokens(message)
+            if cost > remaining:
+                break
+            history.append(message)
+            remaining -= cost
+        history.reverse()
+
+        return [system["message"], *history, user]
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'PROMPT_TOKEN_BUDGET',
+    'estimate_tokens',
+    'message_tokens',
+    'trim_to_tokens',
+    'PromptBuilder'
+]
@@ -0,0 +1,140 @@
+# ============================================
+# RESPONSE CACHE + SINGLE-FLIGHT (generic opening turns)
+# File: backend/app/utils/response_cache.py
+# ============================================
+
+import os
+import asyncio
+import hashlib
+import logging
+import unicodedata
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.cache import acache_json, aget_json
+from app.utils.moderation import normalize_text, ModerationResult
+from app.utils.metrics import RESPONSE_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Tắt mặc định: chỉ bật khi chấp nhận trả lời giống nhau cho lời chào/câu hỏi chung
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# Tin nhắn dài thường mang chi tiết cá nhân: không cache
+RESPONSE_CACHE_MAX_CHARS = int(os.getenv("RESPONSE_CACHE_MAX_CHARS", "120"))
+RESPONSE_CACHE_PREFIX = "llm:response:"
+
+# Một request upstream cho mỗi key đang chờ trong worker này
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+# ============================================
+# ELIGIBILITY & KEYS
+# ============================================
+
+def is_cacheable_turn(
+    user_message: str,
+    conversation_history: Optional[List[Dict]],
+    is_crisis: bool,
+    moderation: Optional[ModerationResult] = None
+) -> bool:
+    """
+    Only first turns (no history) with a short message and no crisis signal
+
+    Crisis turns always bypass the cache, whichever detector flagged them.
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return False
+    if is_crisis or (moderation is not None and moderation.is_crisis):
+        return False
+    if conversation_history:
+        return False
+    return 0 < len(user_message or "") <= RESPONSE_CACHE_MAX_CHARS
+
+
+def response_cache_key(system_prompt: str, user_message: str) -> str:
+    """
+    Key of (system prompt variant, normalized user message)
+
+    "Chào Banana!" and "chào  banana" share a key; a different retrieved
+    context (hence system prompt) gives a different key.
+    """
+    normalized = normalize_text(unicodedata.normalize('NFC', user_message))
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(system_prompt.encode()).digest())
+    digest.update(normalized.encode())
+    return RESPONSE_CACHE_PREFIX + digest.hexdigest()
+
+
+# ============================================
+# LOOKUP
+# ============================================
+
+async def _produce(key: str, produce: Callable[[], Awaitable[Dict]]) -> Dict:
+    result = await produce()
+    await acache_json(
+        key,
+        {"text": result["text"], "model": result["model"], "tokens_used": result["tokens_used"]},
+        RESPONSE_CACHE_TTL
+    )
+    return result
+
+
+def _forget(key: str, task: asyncio.Task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Lỗi đã được trả cho các request đang chờ; tránh cảnh báo "never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+async def cached_completion(key: str, produce: Callable[[], Awaitable[Dict]]) -> Dict:
+    """
+    Cached completion, or one shared upstream call for concurrent misses
+
+    produce() runs in its own task: a caller that disconnects does not
+    cancel the call other callers are waiting on. Errors are not cached.
+
+    Returns:
+        The completion dict with "cached": True when no upstream call
+        was made for this caller
+    """
+    cached = await aget_json(key)
+    if cached is not None:
+        RESPONSE_CACHE_LOOKUPS.labels(result="hit").inc()
+        return {**cached, "cached": True}
+
+    task = _inflight.get(key)
+    if task is not None:
+        RESPONSE_CACHE_LOOKUPS.labels(result="coalesced").inc()
+        result = await asyncio.shield(task)
+        return {**result, "cached": True}
+
+    RESPONSE_CACHE_LOOKUPS.labels(result="miss").inc()
+    task = asyncio.ensure_future(_produce(key, produce))
+    _inflight[key] = task
+    task.add_done_callback(lambda done: _forget(key, done))
+    result = await asyncio.shield(task)
+    return {**result, "cached": False}
+
+
+def record_bypass():
+    """Count a turn that was not eligible (hit rate = hit / all lookups)"""
+    if RESPONSE_CACHE_ENABLED:
+        RESPONSE_CACHE_LOOKUPS.labels(result="bypass").inc()
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'RESPONSE_CACHE_ENABLED',
+    'is_cacheable_turn',
+    'response_cache_key',
+    'cached_completion',
+    'record_bypass'
+]
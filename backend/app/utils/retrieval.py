@@ -0,0 +1,290 @@
+# ============================================
+# KNOWLEDGE RETRIEVAL (BM25)
+# File: backend/app/utils/retrieval.py
+# ============================================
+
+import os
+import re
+import math
+import logging
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.cache import cache
+
+try:
+    from .knowledge_base import KNOWLEDGE_BASE
+except ImportError:
+    KNOWLEDGE_BASE = {}
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+RETRIEVAL_MAX_CHARS = int(os.getenv("RETRIEVAL_MAX_CHARS", "2400"))
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "1.5"))
+# Bỏ các đoạn có điểm thấp hơn tỉ lệ này so với đoạn tốt nhất
+RETRIEVAL_RELATIVE_SCORE = 0.4
+
+# ContentItem.type được đưa vào chỉ mục (phân tách bằng dấu phẩy)
+KNOWLEDGE_CONTENT_TYPES = [
+    t.strip() for t in os.getenv("KNOWLEDGE_CONTENT_TYPES", "knowledge").split(",") if t.strip()
+]
+KNOWLEDGE_CHANNEL = os.getenv("KNOWLEDGE_CHANNEL", "knowledge:changed")
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r'\w+', re.U)
+
+# Hư từ phổ biến: xuất hiện ở mọi đoạn, không giúp xếp hạng
+STOPWORDS = {
+    'và', 'là', 'của', 'có', 'cho', 'các', 'những', 'một', 'được', 'trong',
+    'với', 'này', 'khi', 'thì', 'mà', 'để', 'không', 'như', 'về', 'từ',
+    'đến', 'cũng', 'nhưng', 'hay', 'hoặc', 'bạn', 'mình', 'tôi', 'em',
+    'anh', 'chị', 'gì', 'nào', 'sao', 'rất', 'quá', 'lắm', 'đã', 'đang',
+    'sẽ', 'ra', 'vào', 'lại', 'nên', 'phải', 'bị', 'do', 'vì', 'nếu',
+    'ở', 'đó', 'đây', 'thế', 'ai', 'nhiều', 'ít', 'người', 'việc', 'cách',
+}
+
+
+def strip_diacritics(text: str) -> str:
+    """Bỏ dấu tiếng Việt: 'căng thẳng' → 'cang thang'"""
+    decomposed = unicodedata.normalize('NFD', text)
+    stripped = ''.join(ch for ch in decomposed if unicodedata.category(ch) != 'Mn')
+    return stripped.replace('đ', 'd').replace('Đ', 'D')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Index terms for a Vietnamese text
+
+    Syllables plus syllable bigrams (most Vietnamese words have two
+    syllables), each with and without diacritics so unaccented queries
+    ("cang thang") still match accented content.
+    """
+    syllables = [
+        s for s in _TOKEN_RE.findall(unicodedata.normalize('NFC', text.lower()))
+        if s not in STOPWORDS
+    ]
+    terms = list(syllables)
+    terms.extend(f"{a}_{b}" for a, b in zip(syllables, syllables[1:]))
+
+    plain = [strip_diacritics(term) for term in terms]
+    terms.extend(p for p, t in zip(plain, terms) if p != t)
+    return terms
+
+
+# ============================================
+# BM25 INDEX
+# ============================================
+
+class KnowledgeIndex:
+    """
+    In-memory BM25 inverted index over knowledge chunks
+
+    Built once (startup / content change) and swapped atomically;
+    search() only reads, so it is safe from any thread.
+    """
+
+    def __init__(self, chunks: List[Dict]):
+        self.chunks = chunks
+        self._postings: Dict[str, List[tuple]] = defaultdict(list)
+        self._lengths: List[int] = []
+
+        for doc_id, chunk in enumerate(chunks):
+            terms = tokenize(chunk['text'])
+            self._lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._postings[term].append((doc_id, tf))
+
+        count = len(chunks)
+        self._avg_length = (sum(self._lengths) / count) if count else 0.0
+        self._idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K, min_score: float = RETRIEVAL_MIN_SCORE) -> List[Dict]:
+        """
+        Top-k chunks for a query
+
+        Returns:
+            [{'section', 'text', 'source', 'score'}] best first
+        """
+        if not self.chunks:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for doc_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc_id] / self._avg_length)
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        if not scores:
+            return []
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        threshold = max(min_score, ranked[0][1] * RETRIEVAL_RELATIVE_SCORE)
+        return [
+            {**self.chunks[doc_id], 'score': score}
+            for doc_id, score in ranked[:k]
+            if score >= threshold
+        ]
+
+
+def split_chunks(text: str, section: str, source: str) -> List[Dict]:
+    """Split a knowledge text into paragraph chunks"""
+    chunks = []
+    for paragraph in re.split(r'\n\s*\n', text or ''):
+        lines = [line.strip() for line in paragraph.splitlines() if line.strip()]
+        if lines:
+            chunks.append({'section': section, 'text': '\n'.join(lines), 'source': source})
+    return chunks
+
+
+def _collect_chunks(db: Optional[Session] = None) -> List[Dict]:
+    """KNOWLEDGE_BASE paragraphs + published knowledge ContentItem rows"""
+    chunks = []
+    for section, text in KNOWLEDGE_BASE.items():
+        chunks.extend(split_chunks(text, section, 'knowledge_base'))
+
+    if db is not None and KNOWLEDGE_CONTENT_TYPES:
+        from app.admin.models import ContentItem
+
+        items = db.query(ContentItem).filter(
+            ContentItem.type.in_(KNOWLEDGE_CONTENT_TYPES),
+            ContentItem.is_published == True
+        ).order_by(ContentItem.order_index).all()
+        for item in items:
+            section = item.category or item.title or item.type
+            chunks.extend(split_chunks(item.content, section, f'content:{item.id}'))
+
+    return chunks
+
+
+# ============================================
+# PROCESS-WIDE INDEX
+# ============================================
+
+_index: Optional[KnowledgeIndex] = None
+_index_lock = threading.Lock()
+_listener = None
+
+
+def build_knowledge_index(db: Optional[Session] = None) -> KnowledgeIndex:
+    """
+    (Re)build the index and swap it in
+
+    Args:
+        db: Database session; without it only KNOWLEDGE_BASE is indexed
+    """
+    global _index
+    index = KnowledgeIndex(_collect_chunks(db))
+    with _index_lock:
+        _index = index
+    logger.info(f"📚 Knowledge index built: {len(index.chunks)} chunks, {len(index._idf)} terms")
+    return index
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """Current index (KNOWLEDGE_BASE only until the app builds the full one)"""
+    index = _index
+    if index is None:
+        index = build_knowledge_index()
+    return index
+
+
+def retrieve_chunks(query: str, k: int = RETRIEVAL_TOP_K, max_chars: int = RETRIEVAL_MAX_CHARS) -> List[Dict]:
+    """Top-k chunks for a message, limited to max_chars in total"""
+    if not query:
+        return []
+
+    selected = []
+    used = 0
+    for chunk in get_knowledge_index().search(query, k):
+        if used + len(chunk['text']) > max_chars:
+            continue
+        selected.append(chunk)
+        used += len(chunk['text'])
+    return selected
+
+
+def retrieve_context(query: str, k: int = RETRIEVAL_TOP_K, max_chars: int = RETRIEVAL_MAX_CHARS) -> str:
+    """Relevant knowledge text for a message ("" if nothing matches)"""
+    return "\n\n".join(chunk['text'] for chunk in retrieve_chunks(query, k, max_chars))
+
+
+def _rebuild_from_db(_message=None):
+    """Rebuild with a fresh DB session (pub/sub thread or admin request)"""
+    from app.database import get_db_context
+
+    try:
+        with get_db_context() as db:
+            build_knowledge_index(db)
+    except Exception as e:
+        logger.error(f"Knowledge index rebuild failed: {e}")
+
+
+def notify_knowledge_changed() -> bool:
+    """
+    Rebuild the index on every worker after knowledge content changed
+
+    Call after committing ContentItem changes of a knowledge type. Workers
+    (this one included) rebuild on their pub/sub thread; without Redis
+    only this process is rebuilt.
+
+    Returns:
+        True if the notification was published to Redis
+    """
+    if _listener is not None and cache.publish(KNOWLEDGE_CHANNEL, str(os.getpid())):
+        return True
+    _rebuild_from_db()
+    return False
+
+
+def start_knowledge_listener():
+    """Subscribe this worker to knowledge change notifications"""
+    global _listener
+    if _listener is None:
+        _listener = cache.subscribe(KNOWLEDGE_CHANNEL, _rebuild_from_db)
+    return _listener
+
+
+def stop_knowledge_listener():
+    """Stop the pub/sub listener thread (shutdown)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'KNOWLEDGE_CONTENT_TYPES',
+    'strip_diacritics',
+    'tokenize',
+    'KnowledgeIndex',
+    'build_knowledge_index',
+    'get_knowledge_index',
+    'retrieve_chunks',
+    'retrieve_context',
+    'notify_knowledge_changed',
+    'start_knowledge_listener',
+    'stop_knowledge_listener'
+]
@@ -0,0 +1,159 @@
+# ============================================
+# ENCRYPTED MODEL FIELDS (envelope + legacy CBC)
+# File: backend/app/utils/sealed_fields.py
+# ============================================
+
+import os
+import logging
+from typing import Dict, List, Optional
+
+from app.utils.encryption import seal, needs_rotation, read_encrypted_many
+from app.utils.executor import run_in_worker
+
+logger = logging.getLogger(__name__)
+
+# Mã hóa lại ngay khi đọc: dữ liệu CBC cũ và envelope của khóa không còn active
+LAZY_REENCRYPT = os.getenv("ENCRYPTION_LAZY_REENCRYPT", "true").lower() == "true"
+
+
+def sealed_fields(obj) -> Dict[str, tuple]:
+    """field → (envelope attr, legacy ciphertext attr, legacy IV attr)"""
+    return type(obj).__sealed_fields__
+
+
+def _field_values(objs: List) -> tuple:
+    """Field names + flat (envelope, ciphertext, iv) tuples of many rows"""
+    names = list(sealed_fields(objs[0]))
+    spec = sealed_fields(objs[0])
+    fields = []
+    for obj in objs:
+        for name in names:
+            sealed = getattr(obj, spec[name][0])
+            # psycopg2 trả bytea dạng memoryview: chuyển sang bytes (pickle được)
+            fields.append((
+                bytes(sealed) if sealed is not None else None,
+                getattr(obj, spec[name][1]),
+                getattr(obj, spec[name][2])
+            ))
+    return names, fields
+
+
+def _by_row(names: List[str], values: List[Optional[str]], rows: int) -> List[Dict[str, Optional[str]]]:
+    width = len(names)
+    return [dict(zip(names, values[i * width:(i + 1) * width])) for i in range(rows)]
+
+
+def read_fields_many(objs: List) -> List[Dict[str, Optional[str]]]:
+    """
+    Decrypt every encrypted field of many rows in one batch
+
+    Rows may mix envelope and legacy CBC fields.
+
+    Returns:
+        One {field: plaintext} dict per row ("" if empty, None on failure)
+    """
+    if not objs:
+        return []
+    names, fields = _field_values(objs)
+    return _by_row(names, read_encrypted_many(fields), len(objs))
+
+
+async def read_fields_many_async(objs: List) -> List[Dict[str, Optional[str]]]:
+    """read_fields_many() with the decryption on the worker pool"""
+    if not objs:
+        return []
+    names, fields = _field_values(objs)
+    values = await run_in_worker(read_encrypted_many, fields)
+    return _by_row(names, values, len(objs))
+
+
+def read_fields(obj) -> Dict[str, Optional[str]]:
+    """Decrypt every encrypted field of one row"""
+    return read_fields_many([obj])[0]
+
+
+def write_fields(obj, **values: Optional[str]):
+    """
+    Encrypt values into the envelope columns of a row
+
+    Legacy CBC columns of the written fields are cleared; a shared legacy
+    IV column is cleared once no legacy ciphertext uses it anymore.
+    """
+    spec = sealed_fields(obj)
+    for name, value in values.items():
+        sealed_attr, legacy_attr, _ = spec[name]
+        setattr(obj, sealed_attr, seal(value))
+        setattr(obj, legacy_attr, None)
+
+    still_legacy = {iv for _, legacy, iv in spec.values() if getattr(obj, legacy) is not None}
+    for _, _, iv_attr in spec.values():
+        if iv_attr not in still_legacy:
+            setattr(obj, iv_attr, None)
+
+
+def _is_stale(obj, sealed: str, legacy: str) -> bool:
+    """Field stored as legacy CBC or sealed with a rotated-out key"""
+    envelope = getattr(obj, sealed)
+    if envelope is None:
+        return getattr(obj, legacy) is not None
+    return needs_rotation(envelope)
+
+
+def has_stale_fields(obj) -> bool:
+    """True if any field is still legacy CBC or not under the active key"""
+    return any(
+        _is_stale(obj, sealed, legacy)
+        for sealed, legacy, _ in sealed_fields(obj).values()
+    )
+
+
+def reencrypt_stale(obj, values: Dict[str, Optional[str]]) -> bool:
+    """
+    Re-seal already-decrypted stale fields of a row with the active key
+
+    Fields that failed to decrypt (None) are left untouched.
+
+    Returns:
+        True if the row was changed (caller commits)
+    """
+    spec = sealed_fields(obj)
+    migrate = {
+        name: values[name]
+        for name, (sealed, legacy, _) in spec.items()
+        if _is_stale(obj, sealed, legacy) and values.get(name) is not None
+    }
+    if not migrate:
+        return False
+    write_fields(obj, **migrate)
+    return True
+
+
+def reencrypt_on_read(objs: List, values: List[Dict[str, Optional[str]]]) -> int:
+    """
+    Lazy migration hook for read paths (ENCRYPTION_LAZY_REENCRYPT)
+
+    Returns:
+        Number of rows changed (commit if > 0)
+    """
+    if not LAZY_REENCRYPT:
+        return 0
+    changed = sum(1 for obj, row in zip(objs, values) if reencrypt_stale(obj, row))
+    if changed:
+        logger.info(f"🔐 Re-encrypted {changed} stale {type(objs[0]).__name__} rows")
+    return changed
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'LAZY_REENCRYPT',
+    'read_fields',
+    'read_fields_many',
+    'read_fields_many_async',
+    'write_fields',
+    'has_stale_fields',
+    'reencrypt_stale',
+    'reencrypt_on_read'
+]
@@ -0,0 +1,241 @@
+# ============================================
+# SESSION LOOKUP CACHE (worker LRU → Redis → Postgres)
+# File: backend/app/utils/session_cache.py
+# ============================================
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.cache import (
+    cache,
+    cache_json,
+    get_json,
+    acache_json,
+    aget_json,
+    generate_session_cache_key,
+    generate_messages_cache_key,
+    invalidate_session_cache
+)
+from app.models.session import Session as SessionModel
+from app.utils.metrics import SESSION_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Tầng 1: LRU trong mỗi worker (TTL ngắn vì không có invalidation đồng bộ tuyệt đối)
+SESSION_CACHE_LOCAL_TTL = float(os.getenv("SESSION_CACHE_LOCAL_TTL", "5"))
+SESSION_CACHE_LOCAL_SIZE = int(os.getenv("SESSION_CACHE_LOCAL_SIZE", "10000"))
+# Tầng 2: Redis, dùng chung giữa các worker
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", "300"))
+SESSION_CACHE_CHANNEL = os.getenv("SESSION_CACHE_CHANNEL", "session:invalidated")
+
+_COLUMNS = [column.key for column in SessionModel.__table__.columns]
+_DATETIME_COLUMNS = {
+    column.key for column in SessionModel.__table__.columns
+    if isinstance(column.type, DateTime)
+}
+
+
+# ============================================
+# SNAPSHOTS
+# ============================================
+
+def _snapshot(session: SessionModel) -> Dict:
+    """JSON-safe column values of a loaded session row"""
+    data = {}
+    for key in _COLUMNS:
+        value = getattr(session, key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, UUID):
+            value = str(value)
+        data[key] = value
+    return data
+
+
+def _restore(data: Dict) -> SessionModel:
+    """
+    Detached SessionModel from a snapshot
+
+    It carries an identity key, so Session.merge(load=False) attaches it
+    as a persistent row without a SELECT; changed attributes (touch(),
+    crisis mode) are flushed as a normal UPDATE.
+    """
+    values = dict(data)
+    values['id'] = UUID(values['id'])
+    for key in _DATETIME_COLUMNS:
+        if values.get(key):
+            values[key] = datetime.fromisoformat(values[key])
+    session = SessionModel(**values)
+    make_transient_to_detached(session)
+    return session
+
+
+# ============================================
+# PER-WORKER LRU
+# ============================================
+
+class _LocalCache:
+    """Thread-safe LRU of session snapshots with a TTL"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return data
+
+    def put(self, token: str, data: Dict):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = _LocalCache(SESSION_CACHE_LOCAL_SIZE, SESSION_CACHE_LOCAL_TTL)
+_listener = None
+
+
+# ============================================
+# PUBLIC API
+# ============================================
+
+def _local_session(session_token: str) -> Optional[SessionModel]:
+    data = _local.get(session_token)
+    if data is None:
+        return None
+    SESSION_CACHE_LOOKUPS.labels(result="local_hit").inc()
+    return _restore(data)
+
+
+def _redis_session(session_token: str, data: Optional[Dict]) -> Optional[SessionModel]:
+    if data is None:
+        SESSION_CACHE_LOOKUPS.labels(result="miss").inc()
+        return None
+    SESSION_CACHE_LOOKUPS.labels(result="redis_hit").inc()
+    _local.put(session_token, data)
+    return _restore(data)
+
+
+def get_cached_session(session_token: str) -> Optional[SessionModel]:
+    """
+    Cached session row (detached), or None on a miss
+
+    Callers attach it with db.merge(session, load=False).
+    Blocking Redis call: sync endpoints only, use the async version on
+    the event loop.
+    """
+    session = _local_session(session_token)
+    if session is not None:
+        return session
+    return _redis_session(session_token, get_json(generate_session_cache_key(session_token)))
+
+
+async def get_cached_session_async(session_token: str) -> Optional[SessionModel]:
+    """get_cached_session() for async endpoints (Redis via the async client)"""
+    session = _local_session(session_token)
+    if session is not None:
+        return session
+    return _redis_session(session_token, await aget_json(generate_session_cache_key(session_token)))
+
+
+def cache_session(session: SessionModel):
+    """Store a session freshly loaded from (or committed to) Postgres"""
+    data = _snapshot(session)
+    _local.put(session.session_token, data)
+    cache_json(generate_session_cache_key(session.session_token), data, SESSION_CACHE_TTL)
+
+
+async def cache_session_async(session: SessionModel):
+    """cache_session() for async endpoints"""
+    data = _snapshot(session)
+    _local.put(session.session_token, data)
+    await acache_json(generate_session_cache_key(session.session_token), data, SESSION_CACHE_TTL)
+
+
+def invalidate_session(session_token: str):
+    """
+    Drop a session from every tier on every worker
+
+    Call after committing a change to the row (refresh, delete, crisis mode).
+    """
+    _local.pop(session_token)
+    invalidate_session_cache(session_token)
+    cache.publish(SESSION_CACHE_CHANNEL, session_token)
+
+
+async def invalidate_session_async(session_token: str):
+    """invalidate_session() for async endpoints"""
+    _local.pop(session_token)
+    await cache.adelete(
+        generate_session_cache_key(session_token),
+        generate_messages_cache_key(session_token)
+    )
+    await cache.apublish(SESSION_CACHE_CHANNEL, session_token)
+
+
+def start_session_cache_listener():
+    """Subscribe this worker to invalidations from other workers"""
+    global _listener
+    if _listener is None:
+        _listener = cache.subscribe(SESSION_CACHE_CHANNEL, _local.pop)
+    return _listener
+
+
+def stop_session_cache_listener():
+    """Stop the pub/sub listener thread (shutdown)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    _local.clear()
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+__all__ = [
+    'get_cached_session',
+    'get_cached_session_async',
+    'cache_session',
+    'cache_session_async',
+    'invalidate_session',
+    'invalidate_session_async',
+    'start_session_cache_listener',
+    'stop_session_cache_listener'
+]
@@ -0,0 +1,71 @@
+# ============================================
+# Microbenchmark: per-row vs batch encryption
+# File: backend/scripts/bench_encryption.py
+#
+# Usage: python scripts/bench_encryption.py [rows] [chars]
+# ============================================
+
+import sys
+import os
+import time
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.utils.encryption import (
+    encrypt_message,
+    decrypt_message,
+    encrypt_many,
+    decrypt_many
+)
+
+SAMPLE_TEXT = (
+    "Dạo này mình thấy rất áp lực vì kỳ thi sắp tới, "
+    "mình không biết nên bắt đầu ôn tập từ đâu. "
+)
+
+
+def make_rows(rows: int, chars: int):
+    """Random Vietnamese-ish plaintexts of about `chars` characters"""
+    texts = []
+    for _ in range(rows):
+        start = random.randint(0, len(SAMPLE_TEXT) - 1)
+        text = (SAMPLE_TEXT * (chars // len(SAMPLE_TEXT) + 2))[start:start + chars]
+        texts.append(text)
+    return texts
+
+
+def bench(label: str, func, rows: int, repeat: int = 5) -> float:
+    """Best-of-N rows per second"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    rate = rows / best
+    print(f"  {label:<28} {rate:>12,.0f} rows/s   ({best * 1000:.2f} ms)")
+    return rate
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    chars = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    texts = make_rows(rows, chars)
+    pairs = [encrypt_message(text) for text in texts]
+    assert decrypt_many(pairs) == texts, "decrypt_many mismatch"
+
+    print(f"\n🔐 AES-256-CBC benchmark: {rows} rows x ~{chars} chars\n")
+
+    print("Decrypt:")
+    loop = bench("decrypt_message (loop)", lambda: [decrypt_message(c, iv) for c, iv in pairs], rows)
+    batch = bench("decrypt_many (batch)", lambda: decrypt_many(pairs), rows)
+    print(f"  → speedup x{batch / loop:.2f}\n")
+
+    print("Encrypt:")
+    loop = bench("encrypt_message (loop)", lambda: [encrypt_message(t) for t in texts], rows)
+    batch = bench("encrypt_many (batch)", lambda: encrypt_many(texts), rows)
+    print(f"  → speedup x{batch / loop:.2f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# ============================================
+# Fake OpenAI-compatible LLM server (router / failover testing)
+# File: backend/scripts/fake_llm_server.py
+#
+# Usage: python scripts/fake_llm_server.py [--port 8090] [--latency 0.3]
+#            [--jitter 0.2] [--error-rate 0.1] [--stall-rate 0.05]
+#
+# Point a backend at it, e.g.:
+#   LLM_BACKENDS=groq,openai GROQ_API_BASE=http://127.0.0.1:8090/v1
+#   OPENAI_API_KEY=x OPENAI_BASE_URL=http://127.0.0.1:8091/v1
+# ============================================
+
+import json
+import time
+import random
+import asyncio
+import argparse
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY = (
+    "Mình hiểu cảm giác của bạn. Áp lực thi cử là điều rất nhiều bạn học sinh gặp phải. "
+    "Bạn có muốn kể thêm điều gì khiến bạn lo lắng nhất không?"
+)
+
+app = FastAPI(title="Fake LLM server")
+config = argparse.Namespace(latency=0.3, jitter=0.2, error_rate=0.0, stall_rate=0.0, chunk_delay=0.02)
+stats = {"requests": 0, "errors": 0, "stalls": 0}
+
+
+async def _delay_or_fail():
+    """Simulated time to first token; may return an error response or stall"""
+    stats["requests"] += 1
+    if random.random() < config.error_rate:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"message": "fake upstream error"}}, status_code=503)
+    if random.random() < config.stall_rate:
+        # Treo lâu hơn mọi timeout hợp lý: dùng để thử hedge / timeout
+        stats["stalls"] += 1
+        await asyncio.sleep(300)
+    await asyncio.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+    return None
+
+
+def _usage():
+    tokens = len(REPLY.split())
+    return {"prompt_tokens": 100, "completion_tokens": tokens, "total_tokens": 100 + tokens}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake-model")
+
+    error = await _delay_or_fail()
+    if error is not None:
+        return error
+
+    if not body.get("stream"):
+        return {
+            "id": f"chatcmpl-{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": REPLY},
+                "finish_reason": "stop"
+            }],
+            "usage": _usage()
+        }
+
+    async def events():
+        words = REPLY.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else f" {word}"}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(config.chunk_delay)
+        final = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [],
+            "usage": _usage()
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- random seconds added to latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds between streamed chunks")
+    args = parser.parse_args()
+
+    for key in ("latency", "jitter", "error_rate", "stall_rate", "chunk_delay"):
+        setattr(config, key, getattr(args, key))
+
+    print(f"🤖 Fake LLM server on http://{args.host}:{args.port}/v1 "
+          f"(latency={args.latency}s±{args.jitter}, errors={args.error_rate:.0%}, stalls={args.stall_rate:.0%})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
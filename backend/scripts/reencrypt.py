@@ -0,0 +1,173 @@
+# ============================================
+# Re-encrypt stale rows with the active key (key rotation / CBC migration)
+# File: backend/scripts/reencrypt.py
+#
+# Usage: python scripts/reencrypt.py [--batch-size N] [--max-rows-per-second R]
+#                                    [--checkpoint FILE] [--table T] [--dry-run]
+#
+# A row is stale if a field is still legacy AES-CBC or an envelope was
+# sealed with a key other than ENCRYPTION_ACTIVE_KEY. Rotation:
+#   1. add the new key to ENCRYPTION_KEYS on every worker (old keys stay)
+#   2. set ENCRYPTION_ACTIVE_KEY to it and restart: new writes use it,
+#      reads re-seal lazily (ENCRYPTION_LAZY_REENCRYPT)
+#   3. run this script until it reports 0 rows (re-encrypted and failed),
+#      then drop the old key
+#
+# Each row is counted once: re-encrypted, failed (a field does not decrypt:
+# its other fields are still re-sealed, the row stays stale) or unchanged.
+#
+# conversation_context blobs are not swept: each turn re-seals its
+# session's window with the active key, and a window that no longer
+# decrypts (old key dropped) is rebuilt from the session's messages.
+#
+# Each batch is its own short transaction (FOR UPDATE SKIP LOCKED, keyset
+# on the primary key); progress is checkpointed so the job can be stopped
+# and resumed. Rows locked by requests are skipped: run again to catch them.
+# ============================================
+
+import sys
+import os
+import json
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import or_, and_, func
+
+from app.database import get_db_context
+from app.models import Message, Feedback, Story, ContactForm, TrainingData
+from app.utils.encryption import ACTIVE_KEY_ID, envelope_header
+from app.utils.sealed_fields import read_fields_many, reencrypt_stale
+
+MODELS = [Message, Story, Feedback, ContactForm, TrainingData]
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(__file__), ".reencrypt_checkpoint.json")
+
+
+def stale_filter(model):
+    """Rows with at least one legacy CBC field or envelope of another key"""
+    header = envelope_header()
+    conditions = []
+    for sealed, legacy, _ in model.__sealed_fields__.values():
+        sealed_col, legacy_col = getattr(model, sealed), getattr(model, legacy)
+        conditions.append(and_(legacy_col.isnot(None), sealed_col.is_(None)))
+        conditions.append(and_(sealed_col.isnot(None), func.substring(sealed_col, 1, 2) != header))
+    return or_(*conditions)
+
+
+# ============================================
+# CHECKPOINT
+# ============================================
+
+def load_checkpoint(path: str) -> dict:
+    """{table: last id} for the current active key (reset when the key changes)"""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get("active_key") != ACTIVE_KEY_ID:
+        return {}
+    return state.get("tables", {})
+
+
+def save_checkpoint(path: str, tables: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"active_key": ACTIVE_KEY_ID, "tables": tables}, f)
+    os.replace(tmp, path)
+
+
+# ============================================
+# SWEEP
+# ============================================
+
+def sweep(model, args, tables: dict) -> tuple:
+    """
+    Re-encrypt every stale row of one table, batch by batch
+
+    Returns:
+        (rows re-encrypted, rows that could not be decrypted)
+    """
+    table = model.__tablename__
+    id_type = model.id.type.python_type
+    last_id = id_type(tables[table]) if tables.get(table) is not None else None
+    migrated = failed = unchanged = 0
+
+    while True:
+        started = time.monotonic()
+        with get_db_context() as db:
+            query = db.query(model).filter(stale_filter(model))
+            if last_id is not None:
+                query = query.filter(model.id > last_id)
+            rows = (
+                query.order_by(model.id)
+                .limit(args.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not rows:
+                break
+
+            for row, values in zip(rows, read_fields_many(rows)):
+                if any(value is None for value in values.values()):
+                    if not args.dry_run:
+                        reencrypt_stale(row, values)
+                    failed += 1
+                    print(f"⚠️  {table} {row.id}: field(s) failed to decrypt, left as is")
+                elif args.dry_run or reencrypt_stale(row, values):
+                    migrated += 1
+                else:
+                    unchanged += 1
+
+            last_id = rows[-1].id
+            if args.dry_run:
+                db.rollback()
+
+        if not args.dry_run:
+            tables[table] = str(last_id)
+            save_checkpoint(args.checkpoint, tables)
+        print(f"   {table}: {migrated} rows {'stale' if args.dry_run else 're-encrypted'} (last id {last_id})")
+
+        # Rate limit: keep the job at most max_rows_per_second
+        if args.max_rows_per_second > 0:
+            budget = len(rows) / args.max_rows_per_second
+            time.sleep(max(0.0, budget - (time.monotonic() - started)))
+
+    # Table done: the next run rescans it from the start (rows skipped as locked)
+    if not args.dry_run:
+        tables[table] = None
+        save_checkpoint(args.checkpoint, tables)
+    if failed:
+        print(f"⚠️  {table}: {failed} rows could not be decrypted (missing key?)")
+    if unchanged:
+        print(f"   {table}: {unchanged} rows unchanged")
+    return migrated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encrypt stale rows with the active key")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-rows-per-second", type=float, default=2000, help="0 = unlimited")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Resume state file")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+    parser.add_argument("--table", action="append", help="Only these tables (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Count rows without writing")
+    args = parser.parse_args()
+
+    tables = {} if args.restart else load_checkpoint(args.checkpoint)
+    models = [m for m in MODELS if not args.table or m.__tablename__ in args.table]
+
+    print(f"🔐 Re-encrypting stale rows with key id {ACTIVE_KEY_ID}...")
+    total = total_failed = 0
+    for model in models:
+        migrated, failed = sweep(model, args, tables)
+        total += migrated
+        total_failed += failed
+    print(f"✅ Done: {total} rows {'stale' if args.dry_run else 're-encrypted'}")
+    if total_failed:
+        print(f"⚠️  {total_failed} rows could not be decrypted: keep their key(s) in ENCRYPTION_KEYS")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.database import get_db_context
 from app.models import BlockedKeyword, SchemaVersion
+from app.utils.crisis_detection import notify_keywords_changed
 
 def seed_crisis_keywords():
     """Seed crisis detection keywords"""
@@ -38,6 +39,7 @@ def seed_crisis_keywords():
             db.add(kw)
         
         db.commit()
+        notify_keywords_changed()
         print(f"✅ Seeded {len(keywords)} crisis keywords")
 
 if __name__ == "__main__":
@@ -140,8 +140,30 @@ const ChatInterface = () => {
     try {
       setIsTyping(true); 
       
-      // Call API
-      const response = await messageService.sendMessage(sessionId, content);
+      // Call API (streaming: hiển thị từng phần câu trả lời ngay khi nhận được)
+      const tempAiMessageId = `ai-${Date.now()}`;
+      let streamStarted = false;
+
+      const response = await messageService.sendMessageStream(sessionId, content, {
+        onDelta: (chunk) => {
+          if (!streamStarted) {
+            streamStarted = true;
+            setIsTyping(false);
+            setMessages(prev => [...prev, {
+              id: tempAiMessageId,
+              role: 'assistant',
+              content: chunk,
+              timestamp: new Date().toISOString()
+            }]);
+            return;
+          }
+          setMessages(prev => prev.map(msg =>
+            msg.id === tempAiMessageId
+              ? { ...msg, content: msg.content + chunk }
+              : msg
+          ));
+        }
+      });
 
       // Update user message with real ID
       setMessages(prev => prev.map(msg =>
@@ -150,9 +172,9 @@ const ChatInterface = () => {
           : msg
       ));
 
-      // Add AI message
+      // Replace streamed AI message with the stored one
       const aiMessage = {
-        id: response.ai_message?.id || `ai-${Date.now()}`,
+        id: response.ai_message?.id || tempAiMessageId,
         role: 'assistant',
         content: response.ai_message?.content || response.content || 'Xin lỗi, tôi không thể trả lời lúc này.',
         timestamp: response.ai_message?.created_at || new Date().toISOString(),
@@ -160,7 +182,10 @@ const ChatInterface = () => {
         processing_time_ms: response.ai_message?.processing_time_ms
       };
 
-      setMessages(prev => [...prev, aiMessage]); 
+      setMessages(prev => streamStarted
+        ? prev.map(msg => (msg.id === tempAiMessageId ? aiMessage : msg))
+        : [...prev, aiMessage]
+      );
 
       // Check for server-side crisis detection
       if (response.crisis_detected || response.crisis_info) {
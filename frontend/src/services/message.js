@@ -4,6 +4,24 @@
  */
 
 import api from './api';
+import { API_BASE_URL } from '../utils/constants';
+
+/**
+ * Parse one Server-Sent Event block ("event: x\ndata: {...}")
+ */
+function parseSseEvent(block) {
+  let event = 'message';
+  const dataLines = [];
+  for (const line of block.split('\n')) {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      dataLines.push(line.slice(5).trim());
+    }
+  }
+  if (dataLines.length === 0) return null;
+  return { event, data: JSON.parse(dataLines.join('\n')) };
+}
 
 /**
  * Message Service
@@ -37,6 +55,76 @@ class MessageService {
     }
   }
 
+  /**
+   * Send message and stream the AI reply (Server-Sent Events)
+   *
+   * Callbacks:
+   * - onMeta({ user_message, crisis_info }) as soon as the user message is stored
+   * - onDelta(text) for every chunk of the AI reply
+   * Resolves with the same shape as sendMessage() once the reply is saved.
+   */
+  async sendMessageStream(sessionId, content, { onMeta, onDelta } = {}) {
+    const response = await fetch(`${API_BASE_URL}/messages/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'text/event-stream'
+      },
+      body: JSON.stringify({
+        content: content,
+        session_token: sessionId
+      })
+    });
+
+    if (!response.ok || !response.body) {
+      const error = new Error(`Stream request failed: ${response.status}`);
+      error.response = { status: response.status };
+      throw error;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let meta = {};
+    let done = null;
+
+    while (true) {
+      const { value, done: finished } = await reader.read();
+      if (finished) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const parsed = parseSseEvent(buffer.slice(0, boundary));
+        buffer = buffer.slice(boundary + 2);
+        if (!parsed) continue;
+
+        if (parsed.event === 'meta') {
+          meta = parsed.data;
+          onMeta?.(parsed.data);
+        } else if (parsed.event === 'delta') {
+          onDelta?.(parsed.data.content);
+        } else if (parsed.event === 'done') {
+          done = parsed.data;
+        }
+      }
+    }
+
+    if (!done) {
+      throw new Error('Stream ended before the reply was saved');
+    }
+
+    return {
+      user_message: meta.user_message,
+      ai_message: done.ai_message,
+      crisis_info: done.crisis_info,
+      // Legacy fields for backward compatibility
+      message_id: done.ai_message.id,
+      ai_response: done.ai_message.content,
+      crisis_detected: done.ai_message.is_crisis_detected || false
+    };
+  }
+
   /**
    * Get session messages
    */